@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from src.infrastructure.external.ai_gateway import close_ai_gateway
+from src.image_downloader import close_image_downloader
+from src.prompt_utils import load_task_prompt
+from src.reanalysis import Reanalyzer, find_task_for_results, resolve_results_path
+from src.scraper import (
+    _as_int,
+    _get_ai_cache_settings,
+    _get_batch_settings,
+    _get_prompt_compaction_settings,
+)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="使用当前的 prompt 对已保存的结果文件重新进行AI分析（不打开浏览器，支持断点续跑）。",
+        epilog="""
+使用示例:
+  # 修改评判标准后，重新分析任务对应的结果文件，输出到 jsonl/<原文件名>.reanalyzed.jsonl
+  python reanalyze.py "Sony_A7M4_full_data.jsonl"
+
+  # 指定任务、并发数，完成后替换原结果文件
+  python reanalyze.py "Sony_A7M4_full_data.jsonl" --task-name "Sony A7M4" --workers 16 --replace
+""",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("results_file", help="结果文件路径，或 jsonl/ 目录下的文件名")
+    parser.add_argument("--task-name", type=str, help="使用哪个任务的 prompt 和 AI 设置（默认按结果文件名匹配任务关键字）")
+    parser.add_argument("--config", type=str, default="config.json", help="任务配置文件路径（默认为 config.json）")
+    parser.add_argument("--output", type=str, help="输出文件路径（默认为 <原文件名>.reanalyzed.jsonl）")
+    parser.add_argument("--workers", type=int, default=None, help="同时分析的商品数（默认读取 REANALYZE_WORKERS，8）")
+    parser.add_argument("--replace", action="store_true", help="完成后用输出文件替换原结果文件")
+    parser.add_argument("--restart", action="store_true", help="忽略断点，从头开始")
+    args = parser.parse_args()
+
+    results_path = resolve_results_path(args.results_file)
+    if not os.path.exists(results_path):
+        sys.exit(f"错误: 结果文件 '{results_path}' 不存在。")
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            tasks_config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        sys.exit(f"错误: 读取或解析配置文件 '{args.config}' 失败: {e}")
+
+    task = find_task_for_results(tasks_config, results_path, args.task_name)
+    if not task:
+        sys.exit("错误: 未找到与结果文件对应的任务，请使用 --task-name 指定。")
+    try:
+        prompt_text = load_task_prompt(task)
+    except OSError as e:
+        sys.exit(f"错误: 任务 '{task.get('task_name')}' 的prompt文件读取失败: {e}")
+    if not prompt_text:
+        sys.exit(f"错误: 任务 '{task.get('task_name')}' 未配置prompt文件。")
+
+    cache_settings = _get_ai_cache_settings(task)
+    workers = args.workers if args.workers is not None else _as_int(os.getenv("REANALYZE_WORKERS"), 8)
+    reanalyzer = Reanalyzer(
+        results_path,
+        prompt_text,
+        output_path=args.output,
+        workers=workers,
+        compaction=_get_prompt_compaction_settings(task),
+        batch=_get_batch_settings(task),
+        use_cache=cache_settings["enabled"],
+        cache_ttl=cache_settings["ttl"],
+    )
+    if args.restart:
+        reanalyzer.reset()
+
+    print(f"--- 开始重新分析 '{results_path}'（任务: {task.get('task_name')}，并发: {reanalyzer.workers}）---")
+    try:
+        await reanalyzer.run()
+    finally:
+        await close_image_downloader()
+        await close_ai_gateway()
+    if args.replace:
+        reanalyzer.replace_source()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,7 +4,11 @@ import os
 import argparse
 import json
 
+from src.browser_pool import close_browser_pool
 from src.config import STATE_FILE
+from src.image_downloader import close_image_downloader
+from src.infrastructure.external.ai_gateway import close_ai_gateway
+from src.infrastructure.external.notification_clients import close_notification_http_client
 from src.scraper import scrape_xianyu
 
 
@@ -132,7 +136,14 @@ async def main():
         coroutines.append(scrape_xianyu(task_config=task_conf, debug_limit=args.debug_limit))
 
     # 并发执行所有任务
-    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    try:
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+    finally:
+        # 所有任务共享同一个浏览器池、图片下载、AI 和通知的连接池，全部结束后统一关闭
+        await close_browser_pool()
+        await close_image_downloader()
+        await close_ai_gateway()
+        await close_notification_http_client()
 
     print("\n--- 所有任务执行完毕 ---")
     for i, result in enumerate(results):
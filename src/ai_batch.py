@@ -0,0 +1,118 @@
+"""
+批量AI分析
+逐个分析时每个商品都要把数 KB 的评判标准重复发送一次。批量模式把同一任务中陆续到达的商品攒成一批
+（最多 N 个，或等待超过 max_wait 秒），在一次请求中发送一份评判标准和多个紧凑的商品记录，
+要求模型按商品ID返回结论数组；没有拿到有效结论的商品由调用方再单独分析。
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class BatchSettings:
+    enabled: bool = False
+    max_items: int = 8
+    max_wait: float = 60.0
+    tokens_per_item: int = 800
+
+
+def record_item_id(record: dict) -> str:
+    return str((record.get("商品信息") or {}).get("商品ID"))
+
+
+def build_batch_prompt(product_jsons: List[str], prompt_text: str) -> str:
+    products = ",\n".join(product_jsons)
+    return f"""请基于你的专业知识和我的要求，逐个分析以下 {len(product_jsons)} 个商品的JSON数据：
+
+```json
+[
+{products}
+]
+```
+
+{prompt_text}
+
+注意：本次需要同时分析多个商品。请只输出一个JSON对象，格式为 {{"results": [...]}}，
+results 数组中每个商品对应一个元素，元素的结构与上面要求的单个商品分析结果完全相同，
+并额外包含字段 "商品ID"（与输入中的商品ID一致）。不要遗漏任何商品。
+"""
+
+
+def split_batch_results(parsed) -> Dict[str, dict]:
+    """把模型返回的结论数组按商品ID整理成字典；兼容直接返回数组的情况。"""
+    if isinstance(parsed, dict):
+        parsed = parsed.get("results")
+    if not isinstance(parsed, list):
+        return {}
+    results = {}
+    for entry in parsed:
+        if isinstance(entry, dict) and entry.get("商品ID") not in (None, ""):
+            results[str(entry["商品ID"])] = entry
+    return results
+
+
+class AIBatcher:
+    """把单个商品的分析请求攒批。submit 返回该商品的结论，批量请求失败或缺少该商品时返回 None。"""
+
+    def __init__(
+        self,
+        analyze_batch: Callable[[List[dict]], Awaitable[Dict[str, dict]]],
+        max_items: int = 8,
+        max_wait: float = 60.0,
+        closing_wait: float = 1.0,
+    ):
+        self.analyze_batch = analyze_batch
+        self.max_items = max(1, max_items)
+        self.max_wait = max(0.0, max_wait)
+        self.closing_wait = closing_wait
+        self.batches = 0
+        self.items = 0
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+        self._closing = False
+
+    async def submit(self, record: dict) -> Optional[dict]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        if len(self._pending) >= self.max_items:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.closing_wait if self._closing else self.max_wait)
+        self._timer = None
+        self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._run_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run_batch(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.analyze_batch([record for record, _ in batch])
+        except Exception as e:
+            print(f"   [批量分析] 批量请求失败，{len(batch)} 个商品将单独分析: {e}")
+            results = {}
+        for record, future in batch:
+            if not future.done():
+                future.set_result(results.get(record_item_id(record)))
+
+    async def close(self) -> None:
+        """不再等待凑满一批：立即发送已积攒的商品，之后到达的商品只做短暂聚合。"""
+        self._closing = True
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
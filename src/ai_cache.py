@@ -0,0 +1,98 @@
+"""
+AI 结论缓存
+按“规范化后的商品记录哈希 + prompt 哈希 + 模型名”缓存AI分析结果。重新上架、擦亮的商品虽然商品ID变了，
+但标题、售价与卖家情况不变，命中缓存后无需再请求一次大模型；prompt 文件或模型变化后键随之变化，旧结论自然失效。
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from src.config import DATA_DIR
+from src.utils import open_sqlite
+
+
+AI_CACHE_PATH = os.path.join(DATA_DIR, "ai_verdict_cache.sqlite")
+
+# 与商品本身无关、每次上架或每次爬取都会变化的字段，不参与哈希
+VOLATILE_RECORD_FIELDS = ("爬取时间", "搜索关键字", "任务名称", "ai_analysis")
+VOLATILE_ITEM_FIELDS = ("商品ID", "商品链接", "“想要”人数", "浏览量", "发布时间", "商品主图链接", "商品图片列表")
+VOLATILE_SELLER_FIELDS = ("卖家头像链接", "卖家发布的商品列表", "卖家收到的评价列表")
+
+
+def record_content_hash(record: dict, include_images: bool = False) -> str:
+    """商品记录去掉易变字段后的规范化哈希。附加图片分析时图片列表也参与哈希。"""
+    normalized = {k: v for k, v in record.items() if k not in VOLATILE_RECORD_FIELDS}
+    item = dict(normalized.get("商品信息") or {})
+    images = item.get("商品图片列表") if include_images else None
+    for field in VOLATILE_ITEM_FIELDS:
+        item.pop(field, None)
+    if images:
+        item["商品图片列表"] = images
+    normalized["商品信息"] = item
+    seller = dict(normalized.get("卖家信息") or {})
+    for field in VOLATILE_SELLER_FIELDS:
+        seller.pop(field, None)
+    normalized["卖家信息"] = seller
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def verdict_cache_key(content_hash: str, prompt_hash: str, model_name: Optional[str]) -> str:
+    return hashlib.sha256(f"{content_hash}|{prompt_hash}|{model_name or ''}".encode("utf-8")).hexdigest()
+
+
+class AIVerdictCache:
+    def __init__(self, path: str = AI_CACHE_PATH):
+        self.path = path
+        self._conn = open_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "cache_key TEXT PRIMARY KEY, prompt_hash TEXT, model_name TEXT, verdict TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, cache_key: str, ttl: float) -> Optional[dict]:
+        """返回 TTL 内的缓存结论，并附带缓存标记。"""
+        row = self._conn.execute(
+            "SELECT verdict, created_at FROM verdicts WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] >= ttl:
+            return None
+        try:
+            verdict = json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+        verdict["cached"] = True
+        verdict["cached_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(row[1]))
+        return verdict
+
+    def put(self, cache_key: str, prompt_hash: str, model_name: Optional[str], verdict: dict) -> None:
+        stored = {k: v for k, v in verdict.items() if k not in ("cached", "cached_at")}
+        self._conn.execute(
+            "INSERT INTO verdicts (cache_key, prompt_hash, model_name, verdict, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(cache_key) DO UPDATE SET verdict = excluded.verdict, created_at = excluded.created_at",
+            (cache_key, prompt_hash, model_name, json.dumps(stored, ensure_ascii=False), time.time()),
+        )
+        self._conn.commit()
+
+    def purge_older_than(self, max_age_seconds: float) -> int:
+        cursor = self._conn.execute("DELETE FROM verdicts WHERE created_at < ?", (time.time() - max_age_seconds,))
+        self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_cache: Optional[AIVerdictCache] = None
+
+
+def get_ai_verdict_cache() -> AIVerdictCache:
+    global _cache
+    if _cache is None:
+        _cache = AIVerdictCache()
+    return _cache
@@ -0,0 +1,108 @@
+"""
+AI 多级分析（级联）
+绝大多数商品最终都是不推荐，完整的评判 prompt 和 4000 token 的长输出大多花在明显不合格的商品上。
+级联模式先用便宜、快速的模型（或同一模型配合极简输出要求）给出 0~1 的候选分数，
+低于阈值的直接判定为不推荐，只有候选商品才进入完整分析；两级各自的耗时与通过率会被统计。
+"""
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from src.prompt_compaction import CompactionSettings
+
+
+# 初筛只需要很少的上下文：卖家评价/商品列表各保留少量条目
+TRIAGE_COMPACTION = CompactionSettings(enabled=True, token_budget=1500, ratings_keep=3, items_keep=0)
+
+TRIAGE_INSTRUCTIONS = """你是二手商品的初筛助手。请根据下面的购买要求，快速判断该商品是否值得进一步详细分析。
+只输出一个JSON对象，不要输出其他内容，格式为：{"score": 0到1之间的数字, "reason": "不超过30字的理由"}
+score 表示该商品满足购买要求的可能性；明显不符合要求（品类不对、求购、配件、价格离谱、卖家信誉差等）时给出接近 0 的分数，拿不准时给出较高的分数。"""
+
+
+@dataclass
+class CascadeSettings:
+    enabled: bool = False
+    triage_model: Optional[str] = None
+    threshold: float = 0.3
+    triage_max_tokens: int = 200
+
+
+@dataclass
+class CascadeStats:
+    triaged: int = 0
+    passed: int = 0
+    failed: int = 0
+    triage_seconds: float = 0.0
+    full_calls: int = 0
+    full_seconds: float = 0.0
+
+    def record_triage(self, seconds: float, passed: bool, failed: bool = False) -> None:
+        self.triaged += 1
+        self.triage_seconds += seconds
+        if passed:
+            self.passed += 1
+        if failed:
+            self.failed += 1
+
+    def record_full(self, seconds: float) -> None:
+        self.full_calls += 1
+        self.full_seconds += seconds
+
+    def format(self) -> str:
+        rate = f"{self.passed / self.triaged * 100:.0f}%" if self.triaged else "N/A"
+        triage_avg = self.triage_seconds / self.triaged if self.triaged else 0.0
+        full_avg = self.full_seconds / self.full_calls if self.full_calls else 0.0
+        return (
+            f"初筛 {self.triaged} 次（平均 {triage_avg:.1f}s，通过率 {rate}，失败放行 {self.failed} 次），"
+            f"完整分析 {self.full_calls} 次（平均 {full_avg:.1f}s）"
+        )
+
+
+def build_triage_prompt(product_json: str, prompt_text: str) -> str:
+    return f"""{TRIAGE_INSTRUCTIONS}
+
+购买要求：
+{prompt_text}
+
+商品数据：
+{product_json}
+"""
+
+
+def _extract_json_object(text: str) -> Optional[dict]:
+    text = (text or "").strip()
+    try:
+        parsed = json.loads(text)
+        return parsed if isinstance(parsed, dict) else None
+    except json.JSONDecodeError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(text[start:end + 1])
+        return parsed if isinstance(parsed, dict) else None
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_triage_response(text: str) -> Optional[Tuple[float, str]]:
+    """解析初筛模型的输出，返回 (分数, 理由)；无法解析时返回 None（调用方应放行到完整分析）。"""
+    parsed = _extract_json_object(text)
+    if not parsed:
+        return None
+    try:
+        score = float(parsed.get("score"))
+    except (TypeError, ValueError):
+        return None
+    return min(1.0, max(0.0, score)), str(parsed.get("reason") or "")
+
+
+def triage_rejection(score: float, reason: str, settings: CascadeSettings, model: Optional[str]) -> dict:
+    """初筛未通过时写入 final_record['ai_analysis'] 的结论。"""
+    return {
+        "is_recommended": False,
+        "reason": f"初筛未通过: {reason}" if reason else "初筛未通过",
+        "risk_tags": [],
+        "cascade": {"tier": "triage", "model": model, "score": score, "threshold": settings.threshold},
+    }
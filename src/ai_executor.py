@@ -0,0 +1,189 @@
+"""
+共享的 AI 请求执行器
+所有 AI 调用（爬虫流水线与 AIAnalysisService）都经由这里发出：进程内限制并发数，
+跨进程按每分钟请求数（RPM）与每分钟 token 数（TPM）限流——滑动窗口记录在 SQLite 中，
+同时运行的多个爬虫任务进程共享同一份服务商额度。遇到 429 时按 retry-after 退避，并让所有进程一起暂停。
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+from src.config import DATA_DIR
+from src.utils import open_sqlite
+
+
+AI_RATE_LIMIT_DB_PATH = os.path.join(DATA_DIR, "ai_rate_limit.sqlite")
+WINDOW_SECONDS = 60.0
+
+T = TypeVar("T")
+
+
+class AIRateLimitStore:
+    """滑动窗口限流状态：最近一分钟内的请求及其 token 数，以及 429 之后的全局冷却时间。"""
+
+    def __init__(self, path: str = AI_RATE_LIMIT_DB_PATH):
+        self.path = path
+        # 各方法通过 asyncio.to_thread 在线程池中执行，锁保证同一时刻只有一个线程使用连接
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path, check_same_thread=False)
+        self._conn.isolation_level = None
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS requests (id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, tokens INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cooldown (id INTEGER PRIMARY KEY CHECK (id = 1), until REAL NOT NULL)")
+
+    def try_reserve(self, tokens: int, rpm: int, tpm: int) -> Tuple[Optional[int], float]:
+        """尝试在窗口内登记一次请求。成功返回 (登记ID, 0)，否则返回 (None, 还需等待的秒数)。rpm/tpm 为 0 表示不限。"""
+        with self._lock:
+            return self._try_reserve(tokens, rpm, tpm)
+
+    def _try_reserve(self, tokens: int, rpm: int, tpm: int) -> Tuple[Optional[int], float]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = self._conn.execute("SELECT until FROM cooldown WHERE id = 1").fetchone()
+            if row and row[0] > now:
+                self._conn.execute("COMMIT")
+                return None, row[0] - now
+
+            self._conn.execute("DELETE FROM requests WHERE ts <= ?", (now - WINDOW_SECONDS,))
+            count, used, oldest = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(ts) FROM requests"
+            ).fetchone()
+            over_rpm = rpm > 0 and count + 1 > rpm
+            # 单个请求超过 TPM 时只要求窗口为空，避免永远等不到
+            over_tpm = tpm > 0 and count > 0 and used + tokens > tpm
+            if over_rpm or over_tpm:
+                self._conn.execute("COMMIT")
+                return None, max(0.2, oldest + WINDOW_SECONDS - now)
+
+            cursor = self._conn.execute("INSERT INTO requests (ts, tokens) VALUES (?, ?)", (now, tokens))
+            self._conn.execute("COMMIT")
+            return cursor.lastrowid, 0.0
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def settle(self, reservation_id: int, tokens: int) -> None:
+        """请求完成后用服务商返回的实际 token 用量更新登记。"""
+        with self._lock:
+            self._conn.execute("UPDATE requests SET tokens = ? WHERE id = ?", (tokens, reservation_id))
+
+    def set_cooldown(self, seconds: float) -> None:
+        until = time.time() + seconds
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cooldown (id, until) VALUES (1, ?) "
+                "ON CONFLICT(id) DO UPDATE SET until = MAX(cooldown.until, excluded.until)",
+                (until,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """从 429 响应头中读取 retry-after-ms / retry-after（秒数或 HTTP 日期）。"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AIExecutor:
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_rate_limit_retries: int = 5,
+        output_token_reserve: int = 1000,
+        store: Optional[AIRateLimitStore] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm = max(0, rpm)
+        self.tpm = max(0, tpm)
+        self.max_rate_limit_retries = max(0, max_rate_limit_retries)
+        # 登记 TPM 时按“输入 token 估算 + 预留输出”计，请求完成后再用实际用量修正
+        self.output_token_reserve = max(0, output_token_reserve)
+        self.store = store or AIRateLimitStore()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _reserve(self, tokens: int) -> Optional[int]:
+        while True:
+            # BEGIN IMMEDIATE 可能因其他进程持有写锁而阻塞，放到线程池中执行，不阻塞事件循环
+            reservation_id, wait = await asyncio.to_thread(self.store.try_reserve, tokens, self.rpm, self.tpm)
+            if reservation_id is not None:
+                return reservation_id
+            print(f"   [AI限流] 已达到 RPM/TPM 上限或处于 429 冷却期，等待 {wait:.1f} 秒。")
+            await asyncio.sleep(wait)
+
+    async def run(self, call: Callable[[], Awaitable[T]], input_tokens: int = 0) -> T:
+        """在并发与速率限制下执行一次 AI 请求；429 时按 retry-after 退避后重试。"""
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                reservation_id = await self._reserve(input_tokens + self.output_token_reserve)
+                try:
+                    result = await call()
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt >= self.max_rate_limit_retries:
+                        raise
+                    delay = retry_after_seconds(e)
+                    if delay is None:
+                        delay = min(60.0, 2.0 * (2 ** attempt))
+                    delay += random.uniform(0, 1)
+                    attempt += 1
+                    await asyncio.to_thread(self.store.set_cooldown, delay)
+                    print(f"   [AI限流] 服务商返回 429，{delay:.1f} 秒后进行第 {attempt} 次重试。")
+                    await asyncio.sleep(delay)
+                    continue
+                usage = getattr(result, "usage", None)
+                total_tokens = getattr(usage, "total_tokens", None)
+                if reservation_id is not None and isinstance(total_tokens, int):
+                    await asyncio.to_thread(self.store.settle, reservation_id, total_tokens)
+                return result
+
+
+_executor: Optional[AIExecutor] = None
+
+
+def get_ai_executor() -> AIExecutor:
+    global _executor
+    if _executor is None:
+        _executor = AIExecutor(
+            max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", 4)),
+            rpm=int(os.getenv("AI_RPM_LIMIT", 0)),
+            tpm=int(os.getenv("AI_TPM_LIMIT", 0)),
+            max_rate_limit_retries=int(os.getenv("AI_429_MAX_RETRIES", 5)),
+            output_token_reserve=int(os.getenv("AI_TPM_OUTPUT_RESERVE", 1000)),
+        )
+    return _executor
@@ -0,0 +1,111 @@
+"""
+流式解析 AI 结论
+以流的方式接收模型输出，增量扫描顶层 JSON 对象：
+- 顶层字段的值一完整就解析出来，is_recommended 和 reason 到齐后立即回调（例如提前发送通知）；
+- 看到顶层对象的右花括号就结束，不再等待模型继续输出 JSON 之后的多余内容。
+"""
+import json
+from typing import Any, Callable, Dict, Optional
+
+
+EARLY_FIELDS = ("is_recommended", "reason")
+
+
+class StreamingVerdictParser:
+    """
+    增量 JSON 扫描器。feed() 返回 True 表示顶层对象已经完整，可以停止接收。
+    对象之前的内容（例如 ```json 标记）会被忽略。
+    """
+
+    def __init__(self, on_verdict: Optional[Callable[[bool, str], Any]] = None):
+        self.on_verdict = on_verdict
+        self.reset()
+
+    def reset(self) -> None:
+        """重新开始（网关重试同一请求时调用）。"""
+        self.raw = ""
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._pending_key: Optional[str] = None
+        self._key: Optional[str] = None
+        self._value_start = -1
+        self._pos = 0
+        self._verdict_sent = False
+
+    @property
+    def text(self) -> str:
+        """完整的顶层对象文本；尚未完整时返回已接收的全部内容。"""
+        if self.complete:
+            return self.raw[self._start:self._pos]
+        return self.raw
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete or not chunk:
+            return self.complete
+        self.raw += chunk
+        raw = self.raw
+        while self._pos < len(raw):
+            ch = raw[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None:
+                        # 顶层的键：等待后面的冒号确认
+                        self._pending_key = raw[self._string_start:self._pos]
+                continue
+            if self._start < 0:
+                if ch == "{":
+                    self._start = self._pos - 1
+                    self._depth = 1
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = self._pos - 1
+            elif ch == ":" and self._depth == 1 and self._pending_key is not None:
+                try:
+                    self._key = json.loads(self._pending_key)
+                except json.JSONDecodeError:
+                    self._key = None
+                self._pending_key = None
+                self._value_start = self._pos
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value(self._pos - 1)
+                    self.complete = True
+                    return True
+            elif ch == "," and self._depth == 1:
+                self._finish_value(self._pos - 1)
+        return False
+
+    def _finish_value(self, end: int) -> None:
+        if self._key is None:
+            return
+        try:
+            self.fields[self._key] = json.loads(self.raw[self._value_start:end])
+        except json.JSONDecodeError:
+            pass
+        self._key = None
+        self._maybe_send_verdict()
+
+    def _maybe_send_verdict(self) -> None:
+        if self._verdict_sent or self.on_verdict is None:
+            return
+        if not all(name in self.fields for name in EARLY_FIELDS):
+            return
+        if not isinstance(self.fields["is_recommended"], bool):
+            return
+        self._verdict_sent = True
+        self.on_verdict(self.fields["is_recommended"], str(self.fields["reason"] or ""))
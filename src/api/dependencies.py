@@ -10,9 +10,6 @@ from src.services.process_service import ProcessService
 from src.services.scheduler_service import SchedulerService
 from src.infrastructure.persistence.json_task_repository import JsonTaskRepository
 from src.infrastructure.external.ai_client import AIClient
-from src.infrastructure.external.notification_clients.ntfy_client import NtfyClient
-from src.infrastructure.external.notification_clients.bark_client import BarkClient
-from src.infrastructure.external.notification_clients.telegram_client import TelegramClient
 from src.infrastructure.config.settings import notification_settings
 
 
@@ -42,15 +39,7 @@ def get_task_service() -> TaskService:
 
 def get_notification_service() -> NotificationService:
     """获取通知服务实例"""
-    clients = [
-        NtfyClient(notification_settings.ntfy_topic_url),
-        BarkClient(notification_settings.bark_url),
-        TelegramClient(
-            notification_settings.telegram_bot_token,
-            notification_settings.telegram_chat_id
-        )
-    ]
-    return NotificationService(clients)
+    return NotificationService.from_settings(notification_settings)
 
 
 def get_ai_service() -> AIAnalysisService:
@@ -1,13 +1,17 @@
 """
 结果文件管理路由
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
-from typing import List
+from typing import List, Optional
 import os
 import glob
 import json
 import aiofiles
+from src.api.dependencies import get_process_service
+from src.item_index import remove_item_index
+from src.reanalysis import ReanalysisCheckpoint, checkpoint_path_for, default_output_path
+from src.services.process_service import ProcessService
 
 
 router = APIRouter(prefix="/api/results", tags=["results"])
@@ -66,11 +70,65 @@ async def delete_result_file(filename: str):
 
     try:
         os.remove(file_path)
+        remove_item_index(file_path)
         return {"message": f"文件 {filename} 已成功删除"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"删除文件时出错: {str(e)}")
 
 
+def _validate_result_filename(filename: str) -> str:
+    if not filename.endswith(".jsonl") or "/" in filename or ".." in filename:
+        raise HTTPException(status_code=400, detail="无效的文件名")
+    filepath = os.path.join("jsonl", filename)
+    if not os.path.exists(filepath):
+        raise HTTPException(status_code=404, detail="结果文件未找到")
+    return filepath
+
+
+@router.post("/{filename}/reanalyze")
+async def start_reanalysis(
+    filename: str,
+    task_name: Optional[str] = Body(None, embed=True),
+    workers: Optional[int] = Body(None, embed=True, ge=1, le=64),
+    replace: bool = Body(False, embed=True),
+    process_service: ProcessService = Depends(get_process_service),
+):
+    """使用当前 prompt 在后台重新分析结果文件（不打开浏览器，中断后再次启动会从断点继续）"""
+    _validate_result_filename(filename)
+    if process_service.is_reanalysis_running(filename):
+        raise HTTPException(status_code=409, detail="该结果文件的重新分析已在运行中")
+    if not await process_service.start_reanalysis(filename, task_name, workers, replace):
+        raise HTTPException(status_code=500, detail="启动重新分析失败")
+    return {"message": f"已开始重新分析 {filename}"}
+
+
+@router.get("/{filename}/reanalyze")
+async def get_reanalysis_status(
+    filename: str,
+    process_service: ProcessService = Depends(get_process_service),
+):
+    """查看重新分析的进度"""
+    filepath = _validate_result_filename(filename)
+    checkpoint = ReanalysisCheckpoint.load(checkpoint_path_for(default_output_path(filepath)))
+    return {
+        "running": process_service.is_reanalysis_running(filename),
+        "lines_done": checkpoint.lines_done if checkpoint else 0,
+        "finished": checkpoint.finished if checkpoint else False,
+        "stats": checkpoint.stats if checkpoint else {},
+    }
+
+
+@router.delete("/{filename}/reanalyze")
+async def stop_reanalysis(
+    filename: str,
+    process_service: ProcessService = Depends(get_process_service),
+):
+    """停止重新分析，已完成的部分保留在断点中"""
+    if not await process_service.stop_reanalysis(filename):
+        raise HTTPException(status_code=404, detail="没有正在运行的重新分析")
+    return {"message": f"已停止重新分析 {filename}"}
+
+
 @router.get("/{filename}")
 async def get_result_file_content(
     filename: str,
@@ -12,6 +12,7 @@ from src.domain.models.task import Task, TaskCreate, TaskUpdate, TaskGenerateReq
 from src.api.routes.websocket import broadcast_message
 from src.prompt_utils import generate_criteria
 from src.utils import resolve_task_log_path
+from src.item_index import remove_item_index
 
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
@@ -237,6 +238,7 @@ async def delete_task(
             file_path = os.path.join("jsonl", filename)
             if os.path.exists(file_path):
                 os.remove(file_path)
+            remove_item_index(file_path)
     except Exception as e:
         print(f"删除任务结果文件时出错: {e}")
 
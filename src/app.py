@@ -13,6 +13,8 @@ from src.services.task_service import TaskService
 from src.services.process_service import ProcessService
 from src.services.scheduler_service import SchedulerService
 from src.infrastructure.persistence.json_task_repository import JsonTaskRepository
+from src.infrastructure.external.ai_gateway import close_ai_gateway
+from src.infrastructure.external.notification_clients import close_notification_http_client
 
 
 # 全局服务实例
@@ -51,6 +53,8 @@ async def lifespan(app: FastAPI):
     print("正在关闭应用...")
     scheduler_service.stop()
     await process_service.stop_all()
+    await close_ai_gateway()
+    await close_notification_http_client()
     print("应用已关闭")
 
 
@@ -0,0 +1,180 @@
+"""
+共享浏览器池
+按代理地址维护少量常驻的 Chromium 实例，每个任务/账号只创建独立的 BrowserContext，
+避免每次爬取尝试都完整启动和关闭一次浏览器。
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from src.config import LOGIN_IS_EDGE, RUN_HEADLESS, RUNNING_IN_DOCKER
+
+
+# 反检测启动参数
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process'
+]
+
+DIRECT_KEY = "direct"
+
+
+def build_launch_kwargs(proxy_server: Optional[str] = None) -> dict:
+    """构建 chromium.launch 的参数。"""
+    launch_kwargs = {"headless": RUN_HEADLESS, "args": list(LAUNCH_ARGS)}
+    if proxy_server:
+        launch_kwargs["proxy"] = {"server": proxy_server}
+
+    if LOGIN_IS_EDGE:
+        launch_kwargs["channel"] = "msedge"
+    else:
+        if not RUNNING_IN_DOCKER:
+            launch_kwargs["channel"] = "chrome"
+    return launch_kwargs
+
+
+@dataclass
+class PooledBrowser:
+    key: str
+    browser: Browser
+    launched_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    contexts_served: int = 0
+    active_contexts: int = 0
+    retiring: bool = False
+
+    def is_healthy(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+
+class BrowserPool:
+    """按代理地址复用的 Chromium 浏览器池。"""
+
+    def __init__(self, max_browsers: int = 2, max_contexts_per_browser: int = 50):
+        self.max_browsers = max(1, int(max_browsers))
+        self.max_contexts_per_browser = max(1, int(max_contexts_per_browser))
+        self._playwright: Optional[Playwright] = None
+        self._browsers: Dict[str, PooledBrowser] = {}
+        self._lock = asyncio.Lock()
+
+    async def _ensure_playwright(self) -> Playwright:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return self._playwright
+
+    async def _launch(self, key: str, proxy_server: Optional[str]) -> PooledBrowser:
+        playwright = await self._ensure_playwright()
+        print(f"[浏览器池] 启动新的浏览器实例 (代理: {proxy_server or '无'})")
+        browser = await playwright.chromium.launch(**build_launch_kwargs(proxy_server))
+        return PooledBrowser(key=key, browser=browser)
+
+    def _detach(self, pooled: PooledBrowser) -> None:
+        # 同一代理下可能已经启动了替代实例，只摘除 pooled 本身
+        if self._browsers.get(pooled.key) is pooled:
+            del self._browsers[pooled.key]
+
+    async def _close_browser(self, pooled: PooledBrowser) -> None:
+        self._detach(pooled)
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"[浏览器池] 关闭浏览器时出错: {e}")
+        print(f"[浏览器池] 已回收浏览器实例 (代理: {pooled.key}, 共服务 {pooled.contexts_served} 个上下文)")
+
+    async def _evict_idle_if_full(self) -> None:
+        if len(self._browsers) < self.max_browsers:
+            return
+        idle = [b for b in self._browsers.values() if b.active_contexts == 0]
+        if not idle:
+            return
+        oldest = min(idle, key=lambda b: b.last_used)
+        await self._close_browser(oldest)
+
+    async def _acquire_browser(self, proxy_server: Optional[str]) -> PooledBrowser:
+        key = proxy_server or DIRECT_KEY
+        async with self._lock:
+            pooled = self._browsers.get(key)
+            if pooled and not pooled.is_healthy():
+                if pooled.active_contexts == 0 or not pooled.browser.is_connected():
+                    await self._close_browser(pooled)
+                else:
+                    # 仍有上下文在使用，先从池中摘除，等最后一个上下文释放时再关闭
+                    self._detach(pooled)
+                pooled = None
+            if pooled is None:
+                await self._evict_idle_if_full()
+                pooled = await self._launch(key, proxy_server)
+                self._browsers[key] = pooled
+            pooled.active_contexts += 1
+            pooled.contexts_served += 1
+            pooled.last_used = time.time()
+            if pooled.contexts_served >= self.max_contexts_per_browser:
+                pooled.retiring = True
+            return pooled
+
+    async def _release_browser(self, pooled: PooledBrowser) -> None:
+        async with self._lock:
+            pooled.active_contexts = max(0, pooled.active_contexts - 1)
+            pooled.last_used = time.time()
+            detached = self._browsers.get(pooled.key) is not pooled
+            if pooled.active_contexts == 0 and (pooled.retiring or detached or not pooled.browser.is_connected()):
+                await self._close_browser(pooled)
+
+    @asynccontextmanager
+    async def context(self, proxy_server: Optional[str] = None, **context_kwargs):
+        """从池中取出浏览器，并创建一个用完即关闭的 BrowserContext。"""
+        pooled = await self._acquire_browser(proxy_server)
+        context: Optional[BrowserContext] = None
+        try:
+            context = await pooled.browser.new_context(**context_kwargs)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    print(f"[浏览器池] 关闭浏览器上下文时出错: {e}")
+            await self._release_browser(pooled)
+
+    async def close(self) -> None:
+        """关闭池中所有浏览器以及 Playwright 驱动。"""
+        async with self._lock:
+            for pooled in list(self._browsers.values()):
+                await self._close_browser(pooled)
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception as e:
+                    print(f"[浏览器池] 停止 Playwright 时出错: {e}")
+                self._playwright = None
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """获取进程内共享的浏览器池。"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            max_browsers=int(os.getenv("BROWSER_POOL_MAX_BROWSERS", "2")),
+            max_contexts_per_browser=int(os.getenv("BROWSER_POOL_MAX_CONTEXTS", "50")),
+        )
+    return _browser_pool
+
+
+async def close_browser_pool() -> None:
+    """关闭共享浏览器池（通常在进程退出前调用）。"""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
@@ -2,7 +2,6 @@ import os
 import sys
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 
 # --- AI & Notification Configuration ---
 load_dotenv()
@@ -16,6 +15,9 @@ os.makedirs(IMAGE_SAVE_DIR, exist_ok=True)
 # 任务隔离的临时图片目录前缀
 TASK_IMAGE_DIR_PREFIX = "task_images_"
 
+# 运行期持久化数据（任务状态、缓存等）目录
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
 # --- API URL Patterns ---
 API_URL_PATTERN = "h5api.m.goofish.com/h5/mtop.taobao.idlemtopsearch.pc.search"
 DETAIL_API_URL_PATTERN = "h5api.m.goofish.com/h5/mtop.taobao.idle.pc.detail"
@@ -46,6 +48,9 @@ AI_DEBUG_MODE = os.getenv("AI_DEBUG_MODE", "false").lower() == "true"
 SKIP_AI_ANALYSIS = os.getenv("SKIP_AI_ANALYSIS", "false").lower() == "true"
 ENABLE_THINKING = os.getenv("ENABLE_THINKING", "false").lower() == "true"
 ENABLE_RESPONSE_FORMAT = os.getenv("ENABLE_RESPONSE_FORMAT", "true").lower() == "true"
+AI_SEND_IMAGES = os.getenv("AI_SEND_IMAGES", "false").lower() == "true"
+AI_FORMAT_RETRIES = int(os.getenv("AI_FORMAT_RETRIES", 2))
+AI_STREAM_RESPONSES = os.getenv("AI_STREAM_RESPONSES", "false").lower() == "true"
 
 # --- Headers ---
 IMAGE_DOWNLOAD_HEADERS = {
@@ -56,31 +61,10 @@ IMAGE_DOWNLOAD_HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
-# --- Client Initialization ---
-# 检查配置是否齐全
+# --- AI Client ---
+# AI 客户端由 src/infrastructure/external/ai_gateway.py 中的 AI 网关统一创建（连接池、重试、熔断）
 if not all([BASE_URL, MODEL_NAME]):
     print("警告：未在 .env 文件中完整设置 OPENAI_BASE_URL 和 OPENAI_MODEL_NAME。AI相关功能可能无法使用。")
-    client = None
-else:
-    try:
-        if PROXY_URL:
-            print(f"正在为AI请求使用HTTP/S代理: {PROXY_URL}")
-            # httpx 会自动从环境变量中读取代理设置
-            os.environ['HTTP_PROXY'] = PROXY_URL
-            os.environ['HTTPS_PROXY'] = PROXY_URL
-
-        # openai 客户端内部的 httpx 会自动从环境变量中获取代理配置
-        client = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL)
-    except Exception as e:
-        print(f"初始化 OpenAI 客户端时出错: {e}")
-        client = None
-
-# 检查AI客户端是否成功初始化
-if not client:
-    # 在 prompt_generator.py 中，如果 client 为 None，会直接报错退出
-    # 在 spider_v2.py 中，AI分析会跳过
-    # 为了保持一致性，这里只打印警告，具体逻辑由调用方处理
-    pass
 
 # 检查关键配置
 if not all([BASE_URL, MODEL_NAME]) and 'prompt_generator.py' in sys.argv[0]:
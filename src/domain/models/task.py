@@ -3,7 +3,7 @@
 定义任务实体及其业务逻辑
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Any, Dict, Optional
 from enum import Enum
 
 
@@ -29,6 +29,8 @@ class Task(BaseModel):
     ai_prompt_base_file: str
     ai_prompt_criteria_file: str
     account_state_file: Optional[str] = None
+    pacing_profile: Optional[str] = None
+    prefilter: Optional[Dict[str, Any]] = None
     is_running: bool = False
 
     class Config:
@@ -62,6 +64,8 @@ class TaskCreate(BaseModel):
     ai_prompt_base_file: str = "prompts/base_prompt.txt"
     ai_prompt_criteria_file: str
     account_state_file: Optional[str] = None
+    pacing_profile: Optional[str] = None
+    prefilter: Optional[Dict[str, Any]] = None
 
     # 允许前端把价格字段以 number 形式提交，这里统一转成字符串或 None
     @validator('min_price', 'max_price', pre=True)
@@ -99,6 +103,8 @@ class TaskUpdate(BaseModel):
     ai_prompt_base_file: Optional[str] = None
     ai_prompt_criteria_file: Optional[str] = None
     account_state_file: Optional[str] = None
+    pacing_profile: Optional[str] = None
+    prefilter: Optional[Dict[str, Any]] = None
     is_running: Optional[bool] = None
 
 
@@ -0,0 +1,223 @@
+"""
+内容寻址的图片缓存
+原图按 URL 哈希存放在 data/image_cache 下，跨运行、跨任务复用，不再每轮下载到任务临时目录后删除；
+发送给 AI 的是按最长边缩放并重新编码的变体，变体按原图内容哈希缓存，并同时缓存其 Base64 文本。
+缓存总大小超过上限时按最近访问时间淘汰（LRU），本进程已交给分析流程的原图不会被淘汰。
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Set
+
+from src.config import DATA_DIR
+from src.utils import open_sqlite
+
+
+IMAGE_CACHE_DIR = os.path.join(DATA_DIR, "image_cache")
+VARIANT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def url_key(url: str) -> str:
+    # 闲鱼图片链接上的 .heic 后缀与查询参数不影响图片内容
+    clean_url = url.split(".heic")[0] if ".heic" in url else url
+    return hashlib.sha256(clean_url.strip().encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 同一进程内可能有多个线程同时生成同一个变体
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ImageCache:
+    def __init__(
+        self,
+        root: str = IMAGE_CACHE_DIR,
+        max_bytes: int = 512 * 1024 * 1024,
+        variant_max_side: int = 768,
+        variant_format: str = "JPEG",
+        variant_quality: int = 80,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.variant_max_side = variant_max_side
+        self.variant_format = variant_format.upper() if variant_format.upper() in VARIANT_MIME_TYPES else "JPEG"
+        self.variant_quality = variant_quality
+        # encode_variant 会在线程池中执行，锁保证同一时刻只有一个线程使用连接
+        self._lock = threading.RLock()
+        # 本次运行中已返回给调用方的原图，分析完成前可能还要读取，淘汰时跳过
+        self._pinned: Set[str] = set()
+        self._conn = open_sqlite(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_files_last_access ON files (last_access)")
+        self._conn.commit()
+
+    @property
+    def variant_mime(self) -> str:
+        return VARIANT_MIME_TYPES[self.variant_format]
+
+    def original_path(self, url: str) -> str:
+        key = url_key(url)
+        return os.path.join(self.root, "originals", key[:2], f"{key}.img")
+
+    def _variant_paths(self, content_hash: str):
+        suffix = f"{self.variant_max_side}_{self.variant_quality}.{self.variant_format.lower()}"
+        base = os.path.join(self.root, "variants", content_hash[:2], f"{content_hash}_{suffix}")
+        return base, f"{base}.b64"
+
+    def _touch(self, path: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE files SET last_access = ? WHERE path = ?", (time.time(), path))
+            self._conn.commit()
+
+    def _record(self, path: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO files (path, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, last_access = excluded.last_access",
+                (path, os.path.getsize(path), time.time()),
+            )
+            self._conn.commit()
+            self.evict()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+
+    def evict(self) -> int:
+        """总大小超过上限时，按最近访问时间从旧到新删除，直到降到上限的 90%。本进程固定的原图不删除。"""
+        with self._lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return 0
+            target = int(self.max_bytes * 0.9)
+            removed = 0
+            for path, size in self._conn.execute("SELECT path, size FROM files ORDER BY last_access").fetchall():
+                if total <= target:
+                    break
+                if path in self._pinned:
+                    continue
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    print(f"   [图片缓存] 删除缓存文件 {path} 失败: {e}")
+                    continue
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                total -= size
+                removed += 1
+            self._conn.commit()
+            return removed
+
+    def get_original(self, url: str) -> Optional[str]:
+        path = self.original_path(url)
+        if os.path.exists(path):
+            self._touch(path)
+            return path
+        return None
+
+    async def fetch_many(self, urls: Iterable[str]) -> List[Optional[str]]:
+        """返回每个 URL 对应的缓存原图路径，未缓存的并发下载后写入缓存。"""
+        # 延迟导入，避免 image_downloader 与本模块之间的循环依赖
+        from src.image_downloader import get_image_downloader
+
+        urls = list(urls)
+        results: List[Optional[str]] = [self.get_original(url) for url in urls]
+        # 先固定已命中的原图，避免下载其余图片时触发的淘汰把它们删掉
+        self._pinned.update(path for path in results if path)
+        missing = [(i, url) for i, url in enumerate(urls) if results[i] is None]
+        if missing:
+            targets = []
+            for _, url in missing:
+                path = self.original_path(url)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                targets.append((url, path))
+            downloaded = await get_image_downloader().download_many(targets)
+            for (i, _), path in zip(missing, downloaded):
+                if path:
+                    self._pinned.add(path)
+                    self._record(path)
+                results[i] = path
+        return results
+
+    def encode_variant(self, image_path: str) -> Optional[str]:
+        """返回缩放并重新编码后的图片 Base64，按原图内容哈希缓存。Pillow 不可用时退化为原图编码。"""
+        if not image_path:
+            return None
+        try:
+            with open(image_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        content_hash = hashlib.sha256(raw).hexdigest()
+        variant_path, b64_path = self._variant_paths(content_hash)
+        if os.path.exists(b64_path):
+            self._touch(b64_path)
+            with open(b64_path, "r", encoding="ascii") as f:
+                return f.read()
+
+        try:
+            data = self._render_variant(raw)
+        except Exception as e:
+            print(f"   [图片缓存] 生成缩略图失败，使用原图: {e}")
+            return base64.b64encode(raw).decode("utf-8")
+
+        encoded = base64.b64encode(data).decode("utf-8")
+        _atomic_write(variant_path, data)
+        _atomic_write(b64_path, encoded.encode("ascii"))
+        self._record(variant_path)
+        self._record(b64_path)
+        return encoded
+
+    def _render_variant(self, raw: bytes) -> bytes:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(raw)) as image:
+            image = image.convert("RGB")
+            image.thumbnail((self.variant_max_side, self.variant_max_side))
+            buffer = io.BytesIO()
+            image.save(buffer, format=self.variant_format, quality=self.variant_quality)
+            return buffer.getvalue()
+
+    async def encode_variant_async(self, image_path: str) -> Optional[str]:
+        """在线程池中执行 encode_variant，图片解码、缩放与编码不阻塞事件循环。"""
+        return await asyncio.to_thread(self.encode_variant, image_path)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_image_cache: Optional[ImageCache] = None
+
+
+def get_image_cache() -> ImageCache:
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache(
+            max_bytes=int(os.getenv("IMAGE_CACHE_MAX_MB", 512)) * 1024 * 1024,
+            variant_max_side=int(os.getenv("IMAGE_VARIANT_MAX_SIDE", 768)),
+            variant_format=os.getenv("IMAGE_VARIANT_FORMAT", "JPEG"),
+            variant_quality=int(os.getenv("IMAGE_VARIANT_QUALITY", 80)),
+        )
+    return _image_cache
+
+
+async def image_data_url(image_path: str) -> Optional[str]:
+    """生成发送给 AI 的 data URL（使用缓存的缩放变体）。"""
+    cache = get_image_cache()
+    encoded = await cache.encode_variant_async(image_path)
+    if not encoded:
+        return None
+    return f"data:{cache.variant_mime};base64,{encoded}"
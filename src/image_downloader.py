@@ -0,0 +1,136 @@
+"""
+异步图片下载器
+所有任务共用一个带连接池的 httpx.AsyncClient（keep-alive，安装了 h2 时启用 HTTP/2），
+按全局与单个域名两级限制并发，流式写入磁盘，并限制单张图片的大小与下载耗时。
+"""
+import asyncio
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from src.config import IMAGE_DOWNLOAD_HEADERS
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+class ImageDownloader:
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        per_host_concurrency: int = 4,
+        max_bytes: int = 10 * 1024 * 1024,
+        timeout: float = 20.0,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {k: v for k, v in IMAGE_DOWNLOAD_HEADERS.items() if k.lower() != "connection"}
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60,
+                ),
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname or ""
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._hosts[host] = semaphore
+        return semaphore
+
+    async def _stream_to_file(self, url: str, save_path: str) -> int:
+        # 多个任务可能同时下载同一张图片到同一路径，各自写入唯一的临时文件，完成后原子替换
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(save_path)}.", suffix=".part", dir=os.path.dirname(save_path) or "."
+        )
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with self._get_client().stream("GET", url) as response:
+                    response.raise_for_status()
+                    declared = response.headers.get("content-length")
+                    if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                        raise ImageTooLargeError(f"图片大小 {declared} 字节超过上限 {self.max_bytes}")
+                    async for chunk in response.aiter_bytes(65536):
+                        written += len(chunk)
+                        if written > self.max_bytes:
+                            raise ImageTooLargeError(f"图片超过大小上限 {self.max_bytes} 字节")
+                        f.write(chunk)
+            # mkstemp 创建的文件仅所有者可读，恢复为普通文件权限
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, save_path)
+            return written
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def download(self, url: str, save_path: str) -> Optional[str]:
+        """下载单张图片到 save_path，失败返回 None。"""
+        if os.path.exists(save_path):
+            return save_path
+        async with self._global, self._host_semaphore(url):
+            try:
+                await asyncio.wait_for(self._stream_to_file(url, save_path), timeout=self.timeout)
+                return save_path
+            except asyncio.TimeoutError:
+                print(f"   [图片] 下载超时（{self.timeout}s），已跳过: {url}")
+            except Exception as e:
+                print(f"   [图片] 下载 {url} 失败，已跳过: {e}")
+        return None
+
+    async def download_many(self, targets: Iterable[Tuple[str, str]]) -> List[Optional[str]]:
+        """并发下载多张图片，返回与输入顺序一致的保存路径（失败项为 None）。"""
+        return await asyncio.gather(*(self.download(url, path) for url, path in targets))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_downloader: Optional[ImageDownloader] = None
+
+
+def get_image_downloader() -> ImageDownloader:
+    global _downloader
+    if _downloader is None:
+        _downloader = ImageDownloader(
+            max_concurrency=int(os.getenv("IMAGE_DOWNLOAD_CONCURRENCY", 8)),
+            per_host_concurrency=int(os.getenv("IMAGE_DOWNLOAD_PER_HOST", 4)),
+            max_bytes=int(os.getenv("IMAGE_MAX_BYTES", 10 * 1024 * 1024)),
+            timeout=float(os.getenv("IMAGE_DOWNLOAD_TIMEOUT", 20)),
+        )
+    return _downloader
+
+
+async def close_image_downloader() -> None:
+    global _downloader
+    if _downloader is not None:
+        await _downloader.close()
+        _downloader = None
@@ -67,7 +67,8 @@ class NotificationSettings(_EnvSettings):
     webhook_content_type: str = _env_field("JSON", "WEBHOOK_CONTENT_TYPE")
     webhook_query_parameters: Optional[str] = _env_field(None, "WEBHOOK_QUERY_PARAMETERS")
     webhook_body: Optional[str] = _env_field(None, "WEBHOOK_BODY")
-    pcurl_to_mobile: bool = _env_field(True, "PCURL_TO_MOBILE")
+    # 与 src.config.PCURL_TO_MOBILE 保持一致：未配置时通知中只附电脑端链接
+    pcurl_to_mobile: bool = _env_field(False, "PCURL_TO_MOBILE")
 
     def has_any_notification_enabled(self) -> bool:
         """检查是否配置了任何通知服务"""
@@ -2,23 +2,24 @@
 AI 客户端封装
 提供统一的 AI 调用接口
 """
-import os
+import asyncio
 import json
-import base64
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Union
 from datetime import datetime
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from src.infrastructure.config.settings import AISettings
 from src.infrastructure.config.env_manager import env_manager
+from src.infrastructure.external.ai_gateway import get_ai_gateway, item_deadline
+from src.image_cache import get_image_cache
+from src.prompt_compaction import compact_product_record, estimate_tokens
 
 
 class AIClient:
-    """AI 客户端封装"""
+    """AI 客户端封装（实际请求经由进程内共享的 AI 网关发出）"""
 
     def __init__(self):
         self.settings: Optional[AISettings] = None
-        self.client: Optional[AsyncOpenAI] = None
         self.refresh()
 
     def _load_settings(self) -> None:
@@ -27,40 +28,21 @@ class AIClient:
 
     def refresh(self) -> None:
         self._load_settings()
-        self.client = self._initialize_client()
+        get_ai_gateway().refresh(self.settings)
 
-    def _initialize_client(self) -> Optional[AsyncOpenAI]:
-        """初始化 OpenAI 客户端"""
-        if not self.settings or not self.settings.is_configured():
-            print("警告：AI 配置不完整，AI 功能将不可用")
-            return None
-
-        try:
-            if self.settings.proxy_url:
-                print(f"正在为 AI 请求使用代理: {self.settings.proxy_url}")
-                os.environ['HTTP_PROXY'] = self.settings.proxy_url
-                os.environ['HTTPS_PROXY'] = self.settings.proxy_url
-
-            return AsyncOpenAI(
-                api_key=self.settings.api_key,
-                base_url=self.settings.base_url
-            )
-        except Exception as e:
-            print(f"初始化 AI 客户端失败: {e}")
-            return None
+    @property
+    def client(self) -> Optional[AsyncOpenAI]:
+        return get_ai_gateway().client
 
     def is_available(self) -> bool:
         """检查 AI 客户端是否可用"""
-        return self.client is not None
+        return get_ai_gateway().is_available()
 
     @staticmethod
     def encode_image(image_path: str) -> Optional[str]:
-        """将图片编码为 Base64"""
-        if not image_path or not os.path.exists(image_path):
-            return None
+        """将图片编码为 Base64（使用缓存中缩放后的变体）"""
         try:
-            with open(image_path, "rb") as f:
-                return base64.b64encode(f.read()).decode('utf-8')
+            return get_image_cache().encode_variant(image_path)
         except Exception as e:
             print(f"编码图片失败: {e}")
             return None
@@ -68,7 +50,7 @@ class AIClient:
     async def analyze(
         self,
         product_data: Dict,
-        image_paths: List[str],
+        image_paths: Union[List[str], Callable[[], Awaitable[List[str]]]],
         prompt_text: str
     ) -> Optional[Dict]:
         """
@@ -76,7 +58,7 @@ class AIClient:
 
         Args:
             product_data: 商品数据
-            image_paths: 图片路径列表
+            image_paths: 图片路径列表，或按需下载图片并返回路径列表的协程函数
             prompt_text: 分析提示词
 
         Returns:
@@ -87,16 +69,20 @@ class AIClient:
             return None
 
         try:
-            messages = self._build_messages(product_data, image_paths, prompt_text)
+            if callable(image_paths):
+                image_paths = await image_paths()
+            messages = await self._build_messages(product_data, image_paths, prompt_text)
             response = await self._call_ai(messages)
             return self._parse_response(response)
         except Exception as e:
             print(f"AI 分析失败: {e}")
             return None
 
-    def _build_messages(self, product_data: Dict, image_paths: List[str], prompt_text: str) -> List[Dict]:
+    async def _build_messages(self, product_data: Dict, image_paths: List[str], prompt_text: str) -> List[Dict]:
         """构建 AI 消息"""
-        product_json = json.dumps(product_data, ensure_ascii=False, indent=2)
+        compacted = compact_product_record(product_data, prompt_text)
+        print(f"AI 输入压缩: {compacted.format()}")
+        product_json = compacted.text
         text_prompt = f"""请基于你的专业知识和我的要求，分析以下完整的商品JSON数据：
 
 ```json
@@ -109,11 +95,12 @@ class AIClient:
 
         # 先添加图片
         for path in image_paths:
-            base64_img = self.encode_image(path)
+            # 图片缩放与编码在线程池中执行，不阻塞事件循环
+            base64_img = await asyncio.to_thread(self.encode_image, path)
             if base64_img:
                 user_content.append({
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}
+                    "image_url": {"url": f"data:{get_image_cache().variant_mime};base64,{base64_img}"}
                 })
 
         # 再添加文本
@@ -137,12 +124,12 @@ class AIClient:
         if self.settings.enable_thinking:
             request_params["extra_body"] = {"enable_thinking": False}
 
-        response = await self.client.chat.completions.create(**request_params)
-
-        # 兼容不同 API 响应格式
-        if hasattr(response, 'choices'):
-            return response.choices[0].message.content
-        return response
+        input_tokens = sum(
+            estimate_tokens(part.get("text", "")) for part in messages[0]["content"] if isinstance(part, dict)
+        )
+        return await get_ai_gateway().chat_text(
+            input_tokens=input_tokens, deadline=item_deadline(), **request_params
+        )
 
     def _parse_response(self, response_text: str) -> Optional[Dict]:
         """解析 AI 响应"""
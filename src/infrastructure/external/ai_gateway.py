@@ -0,0 +1,289 @@
+"""
+AI 网关
+进程内唯一的 AI 调用出口：持有一个调优过的 httpx 连接池（keep-alive、连接数上限），
+OpenAI SDK 自身的重试关闭，由网关统一做带抖动的指数退避；服务商持续故障时熔断，快速失败；
+每次调用可以带一个截止时间，保证单个商品的最坏耗时有上限。请求经由 AIExecutor 做跨进程限流。
+"""
+import asyncio
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from src.ai_executor import AIExecutor, get_ai_executor
+from src.infrastructure.config.settings import AISettings
+from src.prompt_compaction import estimate_tokens
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求未发出。"""
+
+
+class AIDeadlineExceeded(Exception):
+    """超过了本次分析的截止时间。"""
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后打开，reset_timeout 秒后进入半开状态，只放行一个试探请求。"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """试探请求没有给出服务是否恢复的结论（截止时间到、被取消）时重新熔断，等待下一次试探。"""
+        if self._probing:
+            self._probing = False
+            self.opened_at = time.monotonic()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                print(f"   [AI网关] 连续失败 {self.failures} 次，熔断 {self.reset_timeout:.0f} 秒。")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+def is_retryable(error: Exception) -> bool:
+    """网络错误、超时与 5xx 可以重试；429 已由 AIExecutor 按 retry-after 处理过，其他 4xx 重试无意义。"""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, httpx.TransportError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+def counts_as_outage(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    return is_retryable(error) or status == 429
+
+
+def _connection_key(settings: AISettings) -> tuple:
+    return settings.api_key, settings.base_url, settings.proxy_url
+
+
+class AIGateway:
+    def __init__(
+        self,
+        settings: Optional[AISettings] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 20.0,
+        request_timeout: float = 90.0,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        breaker: Optional[CircuitBreaker] = None,
+        executor: Optional[AIExecutor] = None,
+        client: Optional[AsyncOpenAI] = None,
+    ):
+        self.settings = settings or AISettings()
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = executor
+        self._http: Optional[httpx.AsyncClient] = None
+        self.client = client if client is not None else self._build_client()
+
+    @property
+    def executor(self) -> AIExecutor:
+        return self._executor or get_ai_executor()
+
+    def _build_client(self) -> Optional[AsyncOpenAI]:
+        if not self.settings.is_configured():
+            print("警告：未完整设置 OPENAI_BASE_URL 和 OPENAI_MODEL_NAME，AI 功能将不可用。")
+            return None
+        try:
+            if self.settings.proxy_url:
+                print(f"正在为 AI 请求使用代理: {self.settings.proxy_url}")
+            self._http = httpx.AsyncClient(
+                proxy=self.settings.proxy_url or None,
+                timeout=httpx.Timeout(self.request_timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=60,
+                ),
+            )
+            return AsyncOpenAI(
+                api_key=self.settings.api_key or "EMPTY",
+                base_url=self.settings.base_url,
+                http_client=self._http,
+                max_retries=0,
+            )
+        except Exception as e:
+            print(f"初始化 AI 客户端失败: {e}")
+            return None
+
+    def is_available(self) -> bool:
+        return self.client is not None
+
+    def refresh(self, settings: Optional[AISettings] = None) -> None:
+        """配置变化后重建客户端（Web 端修改 AI 设置时调用），旧连接池在事件循环中异步关闭。"""
+        settings = settings or AISettings()
+        if self.client is not None and settings.is_configured() and _connection_key(settings) == _connection_key(self.settings):
+            # 连接相关配置没变，只更新模型名等参数，保留连接池
+            self.settings = settings
+            return
+        old_http = self._http
+        self._http = None
+        self.settings = settings
+        self.client = self._build_client()
+        self.breaker.record_success()
+        if old_http is not None:
+            try:
+                asyncio.get_running_loop().create_task(old_http.aclose())
+            except RuntimeError:
+                pass
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter：在 [0, min(上限, base * 2^attempt)] 中随机
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _request(self, make_call, input_tokens: int, deadline: Optional[float], on_retry=None):
+        if not self.is_available():
+            raise RuntimeError("AI 客户端未初始化")
+
+        attempt = 0
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise AIDeadlineExceeded("已超过本次分析的截止时间")
+            is_probe = self.breaker.state == "half_open"
+            if not self.breaker.allow():
+                raise CircuitOpenError("AI 服务熔断中，暂不发送请求" if attempt == 0 else "AI 服务熔断中，停止重试")
+            try:
+                call = self.executor.run(make_call, input_tokens=input_tokens)
+                response = await (asyncio.wait_for(call, timeout=remaining) if remaining is not None else call)
+                self.breaker.record_success()
+                return response
+            except asyncio.TimeoutError:
+                raise AIDeadlineExceeded("已超过本次分析的截止时间")
+            except Exception as e:
+                if counts_as_outage(e):
+                    self.breaker.record_failure()
+                else:
+                    # 服务给出了响应（例如 400/401），说明服务本身可用
+                    self.breaker.record_success()
+                attempt += 1
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                error_name = type(e).__name__
+                delay = self._backoff(attempt - 1)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+            finally:
+                if is_probe:
+                    self.breaker.release_probe()
+            print(f"   [AI网关] 请求失败（{error_name}），{delay:.1f} 秒后第 {attempt + 1} 次尝试。")
+            await asyncio.sleep(delay)
+            if on_retry is not None:
+                on_retry()
+
+    async def chat(self, input_tokens: int = 0, deadline: Optional[float] = None, **params):
+        """
+        发送一次 chat.completions 请求，返回原始响应。
+        deadline 为 time.monotonic() 时间点，超过后不再重试并抛出 AIDeadlineExceeded。
+        """
+        return await self._request(
+            lambda: self.client.chat.completions.create(**params), input_tokens, deadline
+        )
+
+    async def chat_text(self, input_tokens: int = 0, deadline: Optional[float] = None, **params) -> str:
+        response = await self.chat(input_tokens=input_tokens, deadline=deadline, **params)
+        # 兼容不同API响应格式，部分兼容服务直接返回字符串
+        if hasattr(response, "choices"):
+            return response.choices[0].message.content
+        return response
+
+    async def chat_stream(self, sink, input_tokens: int = 0, deadline: Optional[float] = None, **params) -> str:
+        """
+        以流式方式请求，把增量文本逐段交给 sink.feed()；feed 返回 True 时立即关闭流，不再接收后续输出。
+        重试前会调用 sink.reset()。返回 sink.text。
+        """
+        async def _consume():
+            stream = await self.client.chat.completions.create(stream=True, **params)
+            try:
+                async for chunk in stream:
+                    choices = getattr(chunk, "choices", None)
+                    delta = choices[0].delta.content if choices else None
+                    if delta and sink.feed(delta):
+                        break
+            finally:
+                await stream.close()
+            # 流式响应通常不带 usage，按输出文本估算后登记到 TPM
+            return SimpleNamespace(usage=SimpleNamespace(total_tokens=input_tokens + estimate_tokens(sink.raw)))
+
+        await self._request(_consume, input_tokens, deadline, on_retry=sink.reset)
+        return sink.text
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_gateway: Optional[AIGateway] = None
+
+
+def get_ai_gateway() -> AIGateway:
+    global _gateway
+    if _gateway is None:
+        _gateway = AIGateway(
+            max_attempts=int(os.getenv("AI_MAX_ATTEMPTS", 3)),
+            backoff_base=float(os.getenv("AI_BACKOFF_BASE", 1)),
+            backoff_max=float(os.getenv("AI_BACKOFF_MAX", 20)),
+            request_timeout=float(os.getenv("AI_REQUEST_TIMEOUT", 90)),
+            max_connections=int(os.getenv("AI_HTTP_MAX_CONNECTIONS", 20)),
+            max_keepalive=int(os.getenv("AI_HTTP_MAX_KEEPALIVE", 10)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("AI_CIRCUIT_FAILURES", 5)),
+                reset_timeout=float(os.getenv("AI_CIRCUIT_RESET", 60)),
+            ),
+        )
+    return _gateway
+
+
+async def close_ai_gateway() -> None:
+    global _gateway
+    if _gateway is not None:
+        await _gateway.close()
+        _gateway = None
+
+
+def item_deadline() -> float:
+    """单个商品AI分析的截止时间点（包含格式重试在内的总耗时上限）。"""
+    return time.monotonic() + float(os.getenv("AI_ITEM_DEADLINE", 180))
@@ -1,3 +1,19 @@
-from .base import NotificationClient
+from .base import NotificationClient, close_notification_http_client, get_notification_http_client
+from .bark_client import BarkClient
+from .gotify_client import GotifyClient
+from .ntfy_client import NtfyClient
+from .telegram_client import TelegramClient
+from .webhook_client import WebhookClient
+from .wecom_client import WeComClient
 
-__all__ = ["NotificationClient"]
+__all__ = [
+    "NotificationClient",
+    "BarkClient",
+    "GotifyClient",
+    "NtfyClient",
+    "TelegramClient",
+    "WebhookClient",
+    "WeComClient",
+    "close_notification_http_client",
+    "get_notification_http_client",
+]
@@ -1,25 +1,71 @@
 """
 通知客户端基类
-定义通知客户端的统一接口
+定义通知客户端的统一接口。所有渠道共用一个带连接池的 httpx.AsyncClient，
+每个渠道各自有超时和重试，失败不会影响其他渠道。
 """
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional
+
+import httpx
+
+from src.utils import convert_goofish_link
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_notification_http_client() -> httpx.AsyncClient:
+    """所有通知渠道共享的异步 HTTP 客户端（keep-alive 连接池）。"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def close_notification_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 class NotificationClient(ABC):
     """通知客户端抽象基类"""
 
-    def __init__(self, enabled: bool = False):
+    # 日志中显示的渠道名称
+    channel_name = "通知"
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        pcurl_to_mobile: bool = False,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         self._enabled = enabled
+        self.timeout = timeout if timeout is not None else float(os.getenv("NOTIFY_TIMEOUT", 10))
+        self.retries = max(0, retries if retries is not None else int(os.getenv("NOTIFY_RETRIES", 2)))
+        self.pcurl_to_mobile = pcurl_to_mobile
+        self._http_client = http_client
 
     def is_enabled(self) -> bool:
         """检查客户端是否启用"""
         return self._enabled
 
-    @abstractmethod
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http_client or get_notification_http_client()
+
     async def send(self, product_data: Dict, reason: str) -> bool:
         """
-        发送通知
+        发送通知（带本渠道的超时和重试）
 
         Args:
             product_data: 商品数据
@@ -28,6 +74,26 @@ class NotificationClient(ABC):
         Returns:
             是否发送成功
         """
+        if not self.is_enabled():
+            return False
+
+        for attempt in range(self.retries + 1):
+            try:
+                await asyncio.wait_for(self._send(product_data, reason), timeout=self.timeout)
+                print(f"   -> {self.channel_name} 通知发送成功。")
+                return True
+            except Exception as e:
+                error = "超时" if isinstance(e, asyncio.TimeoutError) else e
+                if attempt < self.retries:
+                    print(f"   -> {self.channel_name} 通知发送失败: {error}，{2 ** attempt} 秒后重试...")
+                    await asyncio.sleep(2 ** attempt)
+                else:
+                    print(f"   -> 发送 {self.channel_name} 通知失败: {error}")
+        return False
+
+    @abstractmethod
+    async def _send(self, product_data: Dict, reason: str) -> None:
+        """发送一次通知，失败时抛出异常。"""
         pass
 
     def _format_message(self, product_data: Dict, reason: str) -> Dict[str, str]:
@@ -35,10 +101,19 @@ class NotificationClient(ABC):
         title = product_data.get('商品标题', 'N/A')
         price = product_data.get('当前售价', 'N/A')
         link = product_data.get('商品链接', '#')
+        mobile_link = convert_goofish_link(link) if self.pcurl_to_mobile else None
+
+        if mobile_link:
+            message = f"价格: {price}\n原因: {reason}\n手机端链接: {mobile_link}\n电脑端链接: {link}"
+        else:
+            message = f"价格: {price}\n原因: {reason}\n链接: {link}"
 
         return {
             'title': title,
             'price': price,
             'link': link,
-            'reason': reason
+            'mobile_link': mobile_link,
+            'reason': reason,
+            'notification_title': f"🚨 新推荐! {title[:30]}...",
+            'message': message,
         }
@@ -0,0 +1,30 @@
+"""
+Gotify 通知客户端
+"""
+from typing import Dict
+from .base import NotificationClient
+
+
+class GotifyClient(NotificationClient):
+    """Gotify 通知客户端"""
+
+    channel_name = "Gotify"
+
+    def __init__(self, gotify_url: str = None, token: str = None, **kwargs):
+        super().__init__(enabled=bool(gotify_url and token), **kwargs)
+        self.gotify_url = gotify_url
+        self.token = token
+
+    async def _send(self, product_data: Dict, reason: str) -> None:
+        """发送 Gotify 通知（multipart/form-data）"""
+        msg_data = self._format_message(product_data, reason)
+        response = await self.http.post(
+            f"{self.gotify_url}/message",
+            params={"token": self.token},
+            files={
+                'title': (None, msg_data['notification_title']),
+                'message': (None, msg_data['message']),
+                'priority': (None, '5')
+            },
+        )
+        response.raise_for_status()
@@ -0,0 +1,103 @@
+"""
+通用 Webhook 通知客户端
+"""
+import json
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from .base import NotificationClient
+
+
+class WebhookClient(NotificationClient):
+    """通用 Webhook 通知客户端，支持 GET 查询参数和 POST JSON/表单请求体，模板中可使用 {{title}}、{{content}} 占位符"""
+
+    channel_name = "Webhook"
+
+    def __init__(
+        self,
+        webhook_url: str = None,
+        method: str = "POST",
+        headers: Optional[str] = None,
+        content_type: str = "JSON",
+        query_parameters: Optional[str] = None,
+        body: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(enabled=bool(webhook_url), **kwargs)
+        self.webhook_url = webhook_url
+        self.method = (method or "POST").upper()
+        self.headers = headers
+        self.content_type = (content_type or "JSON").upper()
+        self.query_parameters = query_parameters
+        self.body = body
+        if self.webhook_url and self.method not in ("GET", "POST"):
+            print(f"   -> [警告] 不支持的 WEBHOOK_METHOD: {self.method}，Webhook 通知已禁用。")
+            self._enabled = False
+
+    @staticmethod
+    def _replace_placeholders(template_str: str, title: str, content: str) -> str:
+        if not template_str:
+            return ""
+        # 对内容进行JSON转义，避免换行符和特殊字符破坏JSON格式
+        safe_title = json.dumps(title, ensure_ascii=False)[1:-1]
+        safe_content = json.dumps(content, ensure_ascii=False)[1:-1]
+        # 同时支持旧的${title}${content}和新的{{title}}{{content}}格式
+        return (
+            template_str.replace("${title}", safe_title).replace("${content}", safe_content)
+            .replace("{{title}}", safe_title).replace("{{content}}", safe_content)
+        )
+
+    def _build_url(self, title: str, content: str) -> str:
+        if not self.query_parameters:
+            return self.webhook_url
+        try:
+            params = json.loads(self._replace_placeholders(self.query_parameters, title, content))
+        except json.JSONDecodeError:
+            print("   -> [警告] Webhook 查询参数格式错误，请检查 .env 中的 WEBHOOK_QUERY_PARAMETERS。")
+            return self.webhook_url
+        # 解析原始URL并追加新参数
+        url_parts = list(urlparse(self.webhook_url))
+        query = dict(parse_qsl(url_parts[4]))
+        query.update(params)
+        url_parts[4] = urlencode(query)
+        return urlunparse(url_parts)
+
+    def _build_headers(self) -> Dict[str, str]:
+        if not self.headers:
+            return {}
+        try:
+            return json.loads(self.headers)
+        except json.JSONDecodeError:
+            print("   -> [警告] Webhook 请求头格式错误，请检查 .env 中的 WEBHOOK_HEADERS。")
+            return {}
+
+    async def _send(self, product_data: Dict, reason: str) -> None:
+        """发送 Webhook 通知"""
+        msg_data = self._format_message(product_data, reason)
+        title, content = msg_data['notification_title'], msg_data['message']
+        url = self._build_url(title, content)
+        headers = self._build_headers()
+
+        if self.method == "GET":
+            response = await self.http.get(url, headers=headers)
+        else:
+            json_payload = None
+            data = None
+            if self.body:
+                body_str = self._replace_placeholders(self.body, title, content)
+                has_content_type = 'Content-Type' in headers or 'content-type' in headers
+                try:
+                    if self.content_type == "JSON":
+                        json_payload = json.loads(body_str)
+                        if not has_content_type:
+                            headers['Content-Type'] = 'application/json; charset=utf-8'
+                    elif self.content_type == "FORM":
+                        data = json.loads(body_str)
+                        if not has_content_type:
+                            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                    else:
+                        print(f"   -> [警告] 不支持的 WEBHOOK_CONTENT_TYPE: {self.content_type}。")
+                except json.JSONDecodeError:
+                    print("   -> [警告] Webhook 请求体格式错误，请检查 .env 中的 WEBHOOK_BODY。")
+            response = await self.http.post(url, headers=headers, json=json_payload, data=data)
+        response.raise_for_status()
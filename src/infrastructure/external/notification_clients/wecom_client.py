@@ -0,0 +1,48 @@
+"""
+企业微信机器人通知客户端
+"""
+from typing import Dict
+from .base import NotificationClient
+
+
+class WeComClient(NotificationClient):
+    """企业微信群机器人通知客户端（Markdown 消息，链接可点击）"""
+
+    channel_name = "企业微信"
+
+    def __init__(self, webhook_url: str = None, **kwargs):
+        super().__init__(enabled=bool(webhook_url), **kwargs)
+        self.webhook_url = webhook_url
+
+    @staticmethod
+    def _to_markdown(title: str, message: str) -> str:
+        markdown_content = f"## {title}\n\n"
+        for line in message.split('\n'):
+            if line.startswith('手机端链接:') or line.startswith('电脑端链接:') or line.startswith('链接:'):
+                # 提取链接部分并转换为Markdown超链接
+                label, url = line.split(':', 1)
+                url = url.strip()
+                if url and url != '#':
+                    markdown_content += f"- **{label}:** [{url}]({url})\n"
+                else:
+                    markdown_content += f"- **{label}:** 暂无链接\n"
+            elif line:
+                markdown_content += f"- {line}\n"
+            else:
+                markdown_content += "\n"
+        return markdown_content
+
+    async def _send(self, product_data: Dict, reason: str) -> None:
+        """发送企业微信通知"""
+        msg_data = self._format_message(product_data, reason)
+        payload = {
+            "msgtype": "markdown",
+            "markdown": {
+                "content": self._to_markdown(msg_data['notification_title'], msg_data['message'])
+            }
+        }
+        response = await self.http.post(self.webhook_url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errcode", 0) != 0:
+            raise RuntimeError(result.get("errmsg", "未知错误"))
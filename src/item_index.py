@@ -0,0 +1,200 @@
+"""
+已处理商品的持久化去重索引
+以 SQLite 保存整数商品ID，任务启动时直接打开索引，不再逐行解析整个结果 JSONL 文件。
+极少数链接中无法解析出数字ID，退化为按链接去重键保存在 link_keys 表中。
+"""
+import json
+import os
+from typing import Dict, Optional
+
+from src.utils import extract_item_id, get_link_unique_key, open_sqlite
+
+
+JSONL_DIR = "jsonl"
+INDEX_DIR = os.path.join(JSONL_DIR, ".index")
+
+
+def jsonl_path_for_keyword(keyword: str) -> str:
+    return os.path.join(JSONL_DIR, f"{keyword.replace(' ', '_')}_full_data.jsonl")
+
+
+def index_path_for_jsonl(jsonl_path: str) -> str:
+    base = os.path.splitext(os.path.basename(jsonl_path))[0]
+    return os.path.join(INDEX_DIR, f"{base}.sqlite")
+
+
+def record_item_id(record: dict) -> Optional[int]:
+    """从一条结果记录中取出整数商品ID。"""
+    item_info = record.get('商品信息', {}) or {}
+    item_id = extract_item_id(item_info.get('商品链接', ''))
+    if item_id is not None:
+        return item_id
+    raw_id = str(item_info.get('商品ID', '')).strip()
+    return int(raw_id) if raw_id.isdigit() else None
+
+
+class ProcessedItemIndex:
+    """单个关键字结果文件对应的已处理商品索引。"""
+
+    def __init__(self, jsonl_path: str, index_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.index_path = index_path or index_path_for_jsonl(jsonl_path)
+        self._conn = None
+        self._open()
+
+    def _open(self) -> None:
+        is_new = not os.path.exists(self.index_path)
+        self._conn = open_sqlite(self.index_path)
+        # 旧版本的索引没有 link_keys 表，其中的链接去重键只存在于结果文件里，需要重建一次
+        has_link_keys = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'link_keys'"
+        ).fetchone() is not None
+        self._conn.execute("CREATE TABLE IF NOT EXISTS items (item_id INTEGER PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS link_keys (link_key TEXT PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        if not os.path.exists(self.jsonl_path):
+            if not is_new and len(self):
+                print(f"LOG: 结果文件 {self.jsonl_path} 不存在，清空过期的去重索引。")
+                self._reset()
+            return
+
+        indexed_size = int(self._get_meta("jsonl_size") or 0)
+        actual_size = os.path.getsize(self.jsonl_path)
+        if is_new or not has_link_keys or self._get_meta("jsonl_size") is None or actual_size < indexed_size:
+            self.rebuild()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def _reset(self) -> None:
+        self._conn.execute("DELETE FROM items")
+        self._conn.execute("DELETE FROM link_keys")
+        self._conn.execute("DELETE FROM meta")
+        self._conn.commit()
+
+    def _sync_jsonl_size(self) -> None:
+        if os.path.exists(self.jsonl_path):
+            self._set_meta("jsonl_size", os.path.getsize(self.jsonl_path))
+
+    def rebuild(self) -> int:
+        """从 JSONL 结果文件重建索引，返回索引中的商品数量。"""
+        print(f"LOG: 正在从 {self.jsonl_path} 重建去重索引...")
+        self._reset()
+        batch = []
+        try:
+            with open(self.jsonl_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"   [警告] 文件中有一行无法解析为JSON，已跳过。")
+                        continue
+                    item_id = record_item_id(record)
+                    if item_id is not None:
+                        batch.append((item_id,))
+                    else:
+                        link = record.get('商品信息', {}).get('商品链接', '')
+                        if link:
+                            self._conn.execute(
+                                "INSERT OR IGNORE INTO link_keys (link_key) VALUES (?)", (get_link_unique_key(link),)
+                            )
+                    if len(batch) >= 1000:
+                        self._conn.executemany("INSERT OR IGNORE INTO items (item_id) VALUES (?)", batch)
+                        batch.clear()
+        except IOError as e:
+            print(f"   [警告] 读取历史文件时发生错误: {e}")
+        if batch:
+            self._conn.executemany("INSERT OR IGNORE INTO items (item_id) VALUES (?)", batch)
+        self._sync_jsonl_size()
+        self._conn.commit()
+        count = len(self)
+        print(f"LOG: 去重索引重建完成，已记录 {count} 个已处理过的商品。")
+        return count
+
+    def contains(self, link: str) -> bool:
+        item_id = extract_item_id(link)
+        if item_id is None:
+            row = self._conn.execute(
+                "SELECT 1 FROM link_keys WHERE link_key = ?", (get_link_unique_key(link),)
+            ).fetchone()
+        else:
+            row = self._conn.execute("SELECT 1 FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        return row is not None
+
+    def __contains__(self, link: str) -> bool:
+        return self.contains(link)
+
+    def add(self, link: str) -> None:
+        item_id = extract_item_id(link)
+        if item_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO link_keys (link_key) VALUES (?)", (get_link_unique_key(link),))
+            self._sync_jsonl_size()
+            self._conn.commit()
+            return
+        self.add_id(item_id)
+
+    def add_id(self, item_id: int) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO items (item_id) VALUES (?)", (int(item_id),))
+        self._sync_jsonl_size()
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM items) + (SELECT COUNT(*) FROM link_keys)"
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_indexes: Dict[str, ProcessedItemIndex] = {}
+
+
+def open_item_index(keyword: str) -> ProcessedItemIndex:
+    """打开（必要时重建）关键字对应的去重索引，同一进程内复用连接。"""
+    jsonl_path = jsonl_path_for_keyword(keyword)
+    cache_key = os.path.abspath(jsonl_path)
+    index = _indexes.get(cache_key)
+    if index is None:
+        index = ProcessedItemIndex(jsonl_path)
+        _indexes[cache_key] = index
+    return index
+
+
+def record_processed_item(keyword: str, record: dict) -> None:
+    """在结果写入 JSONL 后同步登记到索引。"""
+    try:
+        index = open_item_index(keyword)
+        item_id = record_item_id(record)
+        if item_id is not None:
+            index.add_id(item_id)
+        else:
+            link = record.get('商品信息', {}).get('商品链接', '')
+            if link:
+                index.add(link)
+    except Exception as e:
+        print(f"   [警告] 更新去重索引失败: {e}")
+
+
+def remove_item_index(jsonl_path: str) -> None:
+    """结果文件被删除时，同步删除其去重索引。"""
+    index = _indexes.pop(os.path.abspath(jsonl_path), None)
+    if index is not None:
+        index.close()
+    index_path = index_path_for_jsonl(jsonl_path)
+    for suffix in ("", "-wal", "-shm"):
+        path = index_path + suffix
+        if os.path.exists(path):
+            os.remove(path)
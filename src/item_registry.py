@@ -0,0 +1,127 @@
+"""
+跨任务共享的商品登记表
+关键字之间经常重叠，同一个商品会被多个任务搜到。这里按商品ID记录最近一次获取的详情与卖家信息，
+以及最近一次AI分析的结果和所用 prompt 的哈希；其他任务再遇到该商品时直接复用，只重跑有差异的步骤。
+SQLite WAL 模式，可被多个任务进程同时读写。
+"""
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src.config import DATA_DIR
+from src.utils import extract_item_id, open_sqlite
+
+
+ITEM_REGISTRY_PATH = os.path.join(DATA_DIR, "item_registry.sqlite")
+# 详情接口补充到商品信息中的字段，复用时覆盖到搜索结果的基础信息上
+DETAIL_FIELDS = ("商品图片列表", "商品主图链接", "“想要”人数", "浏览量", "商品描述")
+
+
+def registry_key(item_data: dict) -> Optional[str]:
+    item_id = extract_item_id(item_data.get("商品链接", ""))
+    if item_id is not None:
+        return str(item_id)
+    raw_id = str(item_data.get("商品ID") or "").strip()
+    return raw_id or None
+
+
+@dataclass
+class RegistryEntry:
+    item_id: str
+    detail: Optional[dict]
+    seller: Optional[dict]
+    fetched_at: Optional[float]
+    ai_analysis: Optional[dict]
+    prompt_hash: Optional[str]
+    analyzed_price: Optional[str]
+    analyzed_at: Optional[float]
+
+    def has_fresh_detail(self, ttl: float) -> bool:
+        return self.detail is not None and self.fetched_at is not None and time.time() - self.fetched_at < ttl
+
+    def reusable_analysis(self, prompt_hash: str, price, ttl: float) -> Optional[dict]:
+        """prompt 与售价都未变化且未过期时返回可复用的AI分析结果。"""
+        if not self.ai_analysis or self.analyzed_at is None:
+            return None
+        if self.prompt_hash != prompt_hash or self.analyzed_price != str(price):
+            return None
+        if time.time() - self.analyzed_at >= ttl:
+            return None
+        return dict(self.ai_analysis)
+
+
+def _loads(value: Optional[str]) -> Optional[dict]:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return None
+
+
+class ItemRegistry:
+    def __init__(self, path: str = ITEM_REGISTRY_PATH):
+        self.path = path
+        self._conn = open_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "item_id TEXT PRIMARY KEY, detail TEXT, seller TEXT, fetched_at REAL, "
+            "ai_analysis TEXT, prompt_hash TEXT, analyzed_price TEXT, analyzed_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, item_id: str) -> Optional[RegistryEntry]:
+        row = self._conn.execute(
+            "SELECT detail, seller, fetched_at, ai_analysis, prompt_hash, analyzed_price, analyzed_at "
+            "FROM items WHERE item_id = ?",
+            (str(item_id),),
+        ).fetchone()
+        if row is None:
+            return None
+        return RegistryEntry(
+            item_id=str(item_id),
+            detail=_loads(row[0]),
+            seller=_loads(row[1]),
+            fetched_at=row[2],
+            ai_analysis=_loads(row[3]),
+            prompt_hash=row[4],
+            analyzed_price=row[5],
+            analyzed_at=row[6],
+        )
+
+    def record_detail(self, item_id: str, item_data: dict, seller: dict) -> None:
+        detail = {field: item_data[field] for field in DETAIL_FIELDS if field in item_data}
+        self._conn.execute(
+            "INSERT INTO items (item_id, detail, seller, fetched_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(item_id) DO UPDATE SET detail = excluded.detail, seller = excluded.seller, "
+            "fetched_at = excluded.fetched_at",
+            (str(item_id), json.dumps(detail, ensure_ascii=False), json.dumps(seller, ensure_ascii=False), time.time()),
+        )
+        self._conn.commit()
+
+    def record_analysis(self, item_id: str, prompt_hash: str, price, ai_analysis: dict) -> None:
+        self._conn.execute(
+            "INSERT INTO items (item_id, ai_analysis, prompt_hash, analyzed_price, analyzed_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(item_id) DO UPDATE SET ai_analysis = excluded.ai_analysis, "
+            "prompt_hash = excluded.prompt_hash, analyzed_price = excluded.analyzed_price, "
+            "analyzed_at = excluded.analyzed_at",
+            (str(item_id), json.dumps(ai_analysis, ensure_ascii=False), prompt_hash, str(price), time.time()),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_registry: Optional[ItemRegistry] = None
+
+
+def get_item_registry() -> ItemRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ItemRegistry()
+    return _registry
@@ -0,0 +1,146 @@
+"""
+闲鱼 mtop 网关请求的签名工具与直连客户端
+签名规则: sign = md5(token & t & appKey & data)，token 取自 _m_h5_tk Cookie 的下划线前半段。
+"""
+import hashlib
+import json
+import time
+from typing import Iterable, Optional
+
+from src.config import API_URL_PATTERN, DETAIL_API_URL_PATTERN
+
+
+MTOP_APP_KEY = "34839810"
+MTOP_TOKEN_COOKIE = "_m_h5_tk"
+MTOP_BASE_URL = "https://h5api.m.goofish.com/h5"
+SEARCH_API = API_URL_PATTERN.rsplit("/", 1)[-1]
+DETAIL_API = DETAIL_API_URL_PATTERN.rsplit("/", 1)[-1]
+TOKEN_ERRORS = ("FAIL_SYS_TOKEN_EMPTY", "FAIL_SYS_TOKEN_EXOIRED", "FAIL_SYS_TOKEN_EXPIRED", "FAIL_SYS_ILLEGAL_ACCESS")
+
+
+class MtopError(Exception):
+    """mtop 接口调用失败（网络错误、签名失败或风控拦截）。"""
+
+    def __init__(self, message: str, ret=None):
+        super().__init__(message)
+        self.ret = ret or []
+
+    @property
+    def is_risk_control(self) -> bool:
+        return any("FAIL_SYS_USER_VALIDATE" in str(entry) for entry in self.ret)
+
+
+def get_mtop_token(cookies: Iterable[dict]) -> Optional[str]:
+    """从浏览器上下文的 Cookie 列表中取出 mtop 签名 token。"""
+    for cookie in cookies or []:
+        if cookie.get("name") == MTOP_TOKEN_COOKIE and cookie.get("value"):
+            return cookie["value"].split("_", 1)[0]
+    return None
+
+
+def mtop_timestamp() -> str:
+    return str(int(time.time() * 1000))
+
+
+def mtop_sign(token: str, timestamp: str, app_key: str, data: str) -> str:
+    """计算 mtop 请求签名。"""
+    raw = f"{token}&{timestamp}&{app_key}&{data}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def is_mtop_success(payload: dict) -> bool:
+    """检查 mtop 响应的 ret 字段是否表示成功。"""
+    ret = payload.get("ret") if isinstance(payload, dict) else None
+    if not ret:
+        return False
+    return any(str(entry).startswith("SUCCESS") for entry in ret)
+
+
+class MtopClient:
+    """
+    复用已登录浏览器上下文的 Cookie 与签名 token，通过 context.request 直接调用 mtop 接口，
+    不渲染页面、不加载图片和脚本。返回与页面拦截到的 JSON 完全一致的数据。
+    """
+
+    def __init__(self, context, app_key: str = MTOP_APP_KEY):
+        self.context = context
+        self.app_key = app_key
+
+    async def _token(self) -> Optional[str]:
+        return get_mtop_token(await self.context.cookies(MTOP_BASE_URL))
+
+    async def call(self, api: str, data: dict, version: str = "1.0") -> dict:
+        data_str = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        payload = {}
+        # token 过期时服务端会通过 Set-Cookie 下发新 token，重签后再试一次
+        for attempt in range(2):
+            token = await self._token() or ""
+            timestamp = mtop_timestamp()
+            params = {
+                "jsv": "2.7.2",
+                "appKey": self.app_key,
+                "t": timestamp,
+                "sign": mtop_sign(token, timestamp, self.app_key, data_str),
+                "v": version,
+                "type": "originaljson",
+                "accountSite": "xianyu",
+                "dataType": "json",
+                "timeout": "20000",
+                "api": api,
+                "sessionOption": "AutoLoginOnly",
+            }
+            try:
+                response = await self.context.request.post(
+                    f"{MTOP_BASE_URL}/{api}/{version}/",
+                    params=params,
+                    form={"data": data_str},
+                    headers={
+                        "origin": "https://www.goofish.com",
+                        "referer": "https://www.goofish.com/",
+                    },
+                    timeout=20000,
+                )
+            except Exception as e:
+                raise MtopError(f"{api} 请求失败: {e}") from e
+            if not response.ok:
+                raise MtopError(f"{api} 响应状态码异常: {response.status}")
+            try:
+                payload = await response.json()
+            except Exception as e:
+                raise MtopError(f"{api} 响应不是有效的JSON: {e}") from e
+
+            if is_mtop_success(payload):
+                return payload
+            ret = payload.get("ret") or []
+            if attempt == 0 and any(code in str(ret) for code in TOKEN_ERRORS):
+                continue
+            raise MtopError(f"{api} 调用失败: {ret}", ret=ret)
+        raise MtopError(f"{api} 调用失败: {payload.get('ret')}", ret=payload.get("ret"))
+
+    async def search(self, keyword: str, page_number: int, personal_only: bool = False,
+                     min_price=None, max_price=None, rows_per_page: int = 30) -> dict:
+        """调用搜索接口，返回与搜索页拦截到的响应相同结构的 JSON。"""
+        # 延迟导入，避免与 search_filters 循环引用
+        from src.search_filters import encode_search_filters
+
+        data = {
+            "pageNumber": page_number,
+            "keyword": keyword,
+            "fromFilter": False,
+            "rowsPerPage": rows_per_page,
+            "sortValue": "",
+            "sortField": "",
+            "customDistance": "",
+            "gps": "",
+            "propValueStr": {},
+            "customGps": "",
+            "searchReqFromPage": "pcSearch",
+            "extraFilterValue": "{}",
+            "userPositionJson": "{}",
+        }
+        data = encode_search_filters(data, personal_only, min_price, max_price)
+        return await self.call(SEARCH_API, data)
+
+    async def item_detail(self, item_id) -> dict:
+        """调用商品详情接口，返回与详情页拦截到的响应相同结构的 JSON。"""
+        return await self.call(DETAIL_API, {"itemId": str(item_id)})
@@ -0,0 +1,216 @@
+"""
+按账号的自适应节奏控制
+每个登录账号一个令牌桶，速率与调速系数持久化在 SQLite 中，多个任务进程共用同一账号时共享限速。
+触发风控后大幅降速，无风控的运行结束后缓慢提速；各类等待区间由任务的节奏档位决定。
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from src.config import DATA_DIR
+from src.utils import open_sqlite
+
+
+PACING_DB_PATH = os.path.join(DATA_DIR, "pacing.sqlite")
+
+# 消耗令牌的动作：翻页与打开商品详情，其余等待只做随机抖动
+TOKEN_ACTIONS = {"page", "detail"}
+
+
+@dataclass(frozen=True)
+class PacingProfile:
+    """节奏档位。delays 为调速系数为 1.0 时各类等待的随机区间（秒）。"""
+    name: str
+    delays: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    actions_per_minute: float = 2.0
+    burst: float = 2.0
+    min_speed: float = 0.25
+    max_speed: float = 1.0
+    risk_backoff: float = 0.5
+    clean_run_speedup: float = 1.05
+
+
+_DEFAULT_DELAYS = {
+    "item": (15, 30),
+    "page": (25, 50),
+    "detail": (3, 6),
+    "after_detail": (2, 4),
+}
+
+PACING_PROFILES: Dict[str, PacingProfile] = {
+    # 与原先硬编码的等待区间一致，且不会自动提速
+    "conservative": PacingProfile("conservative", dict(_DEFAULT_DELAYS), actions_per_minute=3.0, max_speed=1.0),
+    # 从保守区间起步，无风控时逐步提速，最多快到 3 倍
+    "balanced": PacingProfile("balanced", dict(_DEFAULT_DELAYS), actions_per_minute=3.0, burst=3.0, max_speed=3.0),
+    # 适合注册时间长、信用好的账号
+    "aggressive": PacingProfile(
+        "aggressive",
+        {"item": (8, 15), "page": (12, 25), "detail": (2, 4), "after_detail": (1, 2)},
+        actions_per_minute=6.0,
+        burst=4.0,
+        max_speed=4.0,
+        clean_run_speedup=1.1,
+    ),
+}
+
+
+def resolve_pacing_profile(task_config: dict, default: Optional[str] = None) -> PacingProfile:
+    name = str(task_config.get("pacing_profile") or default or "balanced").strip().lower()
+    profile = PACING_PROFILES.get(name)
+    if profile is None:
+        print(f"   [节奏控制] 未知的节奏档位 '{name}'，使用 balanced。")
+        profile = PACING_PROFILES["balanced"]
+    return profile
+
+
+def account_key_for(state_file: Optional[str]) -> str:
+    """账号的持久化键：登录状态文件名。"""
+    return os.path.basename(state_file) if state_file else "default"
+
+
+class PacingStore:
+    """账号调速系数与令牌桶状态的 SQLite 存储。"""
+
+    def __init__(self, path: str = PACING_DB_PATH):
+        self.path = path
+        # 异步调用方通过 asyncio.to_thread 在线程池中访问，锁保证同一时刻只有一个线程使用连接
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path, check_same_thread=False)
+        self._conn.isolation_level = None
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS accounts ("
+            "account TEXT PRIMARY KEY, speed REAL NOT NULL, tokens REAL NOT NULL, "
+            "refilled_at REAL NOT NULL, last_risk_at REAL)"
+        )
+
+    def _load(self, account: str, profile: PacingProfile) -> Tuple[float, float, float]:
+        row = self._conn.execute(
+            "SELECT speed, tokens, refilled_at FROM accounts WHERE account = ?", (account,)
+        ).fetchone()
+        if row is None:
+            return 1.0, profile.burst, time.time()
+        return row
+
+    def _save(self, account: str, speed: float, tokens: float, refilled_at: float, risk: bool = False) -> None:
+        self._conn.execute(
+            "INSERT INTO accounts (account, speed, tokens, refilled_at, last_risk_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(account) DO UPDATE SET speed = excluded.speed, tokens = excluded.tokens, "
+            "refilled_at = excluded.refilled_at, "
+            "last_risk_at = COALESCE(excluded.last_risk_at, accounts.last_risk_at)",
+            (account, speed, tokens, refilled_at, time.time() if risk else None),
+        )
+
+    def get_speed(self, account: str, profile: PacingProfile) -> float:
+        with self._lock:
+            speed = self._load(account, profile)[0]
+        return min(profile.max_speed, max(profile.min_speed, speed))
+
+    def try_acquire(self, account: str, profile: PacingProfile) -> float:
+        """尝试取一个令牌。成功返回 0，否则返回还需等待的秒数。"""
+        with self._lock:
+            return self._try_acquire(account, profile)
+
+    def _try_acquire(self, account: str, profile: PacingProfile) -> float:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            speed, tokens, refilled_at = self._load(account, profile)
+            speed = min(profile.max_speed, max(profile.min_speed, speed))
+            rate = profile.actions_per_minute * speed / 60.0
+            now = time.time()
+            tokens = min(profile.burst, tokens + max(0.0, now - refilled_at) * rate)
+            if tokens >= 1:
+                self._save(account, speed, tokens - 1, now)
+                wait = 0.0
+            else:
+                self._save(account, speed, tokens, now)
+                wait = (1 - tokens) / rate
+            self._conn.execute("COMMIT")
+            return wait
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def adjust_speed(self, account: str, profile: PacingProfile, factor: float, risk: bool = False) -> float:
+        with self._lock:
+            return self._adjust_speed(account, profile, factor, risk)
+
+    def _adjust_speed(self, account: str, profile: PacingProfile, factor: float, risk: bool) -> float:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            speed, tokens, refilled_at = self._load(account, profile)
+            speed = min(profile.max_speed, max(profile.min_speed, speed * factor))
+            if risk:
+                # 风控后清空令牌桶，下一个动作必须等待完整的补充周期
+                tokens, refilled_at = 0.0, time.time()
+            self._save(account, speed, tokens, refilled_at, risk=risk)
+            self._conn.execute("COMMIT")
+            return speed
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store: Optional[PacingStore] = None
+
+
+def get_pacing_store() -> PacingStore:
+    global _store
+    if _store is None:
+        _store = PacingStore()
+    return _store
+
+
+class AccountPacer:
+    """单个账号在一次爬取尝试中的节奏控制器。"""
+
+    def __init__(self, account: str, profile: PacingProfile, store: Optional[PacingStore] = None):
+        self.account = account
+        self.profile = profile
+        self.store = store or get_pacing_store()
+
+    @property
+    def speed(self) -> float:
+        return self.store.get_speed(self.account, self.profile)
+
+    async def pause(self, action: str) -> None:
+        """按档位区间和当前调速系数随机等待；翻页与打开详情还需从令牌桶取到令牌。"""
+        low, high = self.profile.delays.get(action, _DEFAULT_DELAYS.get(action, (1, 2)))
+        speed = await asyncio.to_thread(self.store.get_speed, self.account, self.profile)
+        delay = random.uniform(low, high) / speed
+        print(f"   [节奏控制] {action}: 等待 {delay:.2f} 秒 (档位 {self.profile.name}, 调速 x{speed:.2f})")
+        await asyncio.sleep(delay)
+        if action in TOKEN_ACTIONS:
+            await self.acquire()
+
+    async def acquire(self) -> None:
+        while True:
+            # BEGIN IMMEDIATE 可能因其他任务进程持有写锁而阻塞，放到线程池中执行，不阻塞事件循环
+            wait = await asyncio.to_thread(self.store.try_acquire, self.account, self.profile)
+            if wait <= 0:
+                return
+            print(f"   [节奏控制] 账号 {self.account} 令牌不足，额外等待 {wait:.1f} 秒。")
+            await asyncio.sleep(wait)
+
+    async def record_risk(self) -> float:
+        speed = await asyncio.to_thread(
+            self.store.adjust_speed, self.account, self.profile, self.profile.risk_backoff, True
+        )
+        print(f"   [节奏控制] 账号 {self.account} 触发风控，降速至 x{speed:.2f}。")
+        return speed
+
+    async def record_clean_run(self) -> float:
+        speed = await asyncio.to_thread(
+            self.store.adjust_speed, self.account, self.profile, self.profile.clean_run_speedup
+        )
+        print(f"   [节奏控制] 账号 {self.account} 本轮运行无风控，调速系数调整为 x{speed:.2f}。")
+        return speed
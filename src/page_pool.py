@@ -0,0 +1,103 @@
+"""
+浏览器上下文内的页面池
+详情页与卖家主页不再每次 new_page/close，而是归还后导航到 about:blank 并移除监听器再复用，
+最多保留 K 个空闲页面；同时统计创建页面与页面导航各自耗费的时间。
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+BLANK_URL = "about:blank"
+
+
+@dataclass
+class PagePoolStats:
+    created: int = 0
+    reused: int = 0
+    discarded: int = 0
+    navigations: int = 0
+    create_seconds: float = 0.0
+    navigate_seconds: float = 0.0
+    reset_seconds: float = 0.0
+
+    def format(self) -> str:
+        return (
+            f"新建页面 {self.created} 次/{self.create_seconds:.1f}s, 复用 {self.reused} 次, "
+            f"导航 {self.navigations} 次/{self.navigate_seconds:.1f}s, 重置 {self.reset_seconds:.1f}s, "
+            f"丢弃 {self.discarded} 个"
+        )
+
+
+class PagePool:
+    """单个 BrowserContext 的页面池。池中页面全部借出时会临时新建页面，归还时超出 max_idle 的页面直接关闭。"""
+
+    def __init__(self, context, max_idle: int = 2):
+        self.context = context
+        self.max_idle = max(1, max_idle)
+        self.stats = PagePoolStats()
+        self._idle: List = []
+        self._listeners: Dict[int, Dict[str, Callable]] = {}
+        self._closed = False
+
+    async def acquire(self, listeners: Optional[Dict[str, Callable]] = None):
+        """借出一个页面，并注册本次使用的事件监听器（归还时自动移除）。"""
+        page = None
+        while self._idle:
+            candidate = self._idle.pop()
+            if not candidate.is_closed():
+                page = candidate
+                self.stats.reused += 1
+                break
+            self.stats.discarded += 1
+        if page is None:
+            started = time.monotonic()
+            page = await self.context.new_page()
+            self.stats.create_seconds += time.monotonic() - started
+            self.stats.created += 1
+
+        listeners = dict(listeners or {})
+        for event, handler in listeners.items():
+            page.on(event, handler)
+        self._listeners[id(page)] = listeners
+        return page
+
+    async def release(self, page) -> None:
+        """归还页面：移除监听器并导航到空白页；页面已损坏或池已满时直接关闭。"""
+        for event, handler in self._listeners.pop(id(page), {}).items():
+            page.remove_listener(event, handler)
+        if page.is_closed():
+            self.stats.discarded += 1
+            return
+        if self._closed or len(self._idle) >= self.max_idle:
+            await page.close()
+            return
+        started = time.monotonic()
+        try:
+            await page.goto(BLANK_URL, wait_until="domcontentloaded", timeout=10000)
+        except Exception as e:
+            print(f"   [页面池] 重置页面失败，关闭该页面: {e}")
+            self.stats.discarded += 1
+            await page.close()
+            return
+        finally:
+            self.stats.reset_seconds += time.monotonic() - started
+        self._idle.append(page)
+
+    async def goto(self, page, url: str, **kwargs):
+        """page.goto 的计时包装，用于区分导航耗时与建页耗时。"""
+        started = time.monotonic()
+        try:
+            return await page.goto(url, **kwargs)
+        finally:
+            self.stats.navigate_seconds += time.monotonic() - started
+            self.stats.navigations += 1
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for page in idle:
+            try:
+                if not page.is_closed():
+                    await page.close()
+            except Exception:
+                pass
@@ -1,5 +1,7 @@
 import json
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 
 from src.config import AI_DEBUG_MODE
 from src.utils import safe_get
@@ -67,38 +69,54 @@ async def _parse_search_results_json(json_data: dict, source: str) -> list:
         return []
 
 
-async def calculate_reputation_from_ratings(ratings_json: list) -> dict:
-    """从原始评价API数据列表中，计算作为卖家和买家的好评数与好评率。"""
-    seller_total = 0
-    seller_positive = 0
-    buyer_total = 0
-    buyer_positive = 0
-
-    for card in ratings_json:
-        # 使用 safe_get 保证安全访问
-        data = await safe_get(card, 'cardData', default={})
-        role_tag = await safe_get(data, 'rateTagList', 0, 'text', default='')
-        rate_type = await safe_get(data, 'rate') # 1=好评, 0=中评, -1=差评
+@dataclass
+class RatingTally:
+    """按评价来源角色累计的好评数与评价总数。"""
+    seller_total: int = 0
+    seller_positive: int = 0
+    buyer_total: int = 0
+    buyer_positive: int = 0
 
+    def add(self, role_tag: str, rate_type) -> None:
         if "卖家" in role_tag:
-            seller_total += 1
+            self.seller_total += 1
             if rate_type == 1:
-                seller_positive += 1
+                self.seller_positive += 1
         elif "买家" in role_tag:
-            buyer_total += 1
+            self.buyer_total += 1
             if rate_type == 1:
-                buyer_positive += 1
+                self.buyer_positive += 1
+
+    def merged(self, other: "RatingTally") -> "RatingTally":
+        return RatingTally(
+            self.seller_total + other.seller_total,
+            self.seller_positive + other.seller_positive,
+            self.buyer_total + other.buyer_total,
+            self.buyer_positive + other.buyer_positive,
+        )
+
+    def to_stats(self) -> dict:
+        # 计算比率，并处理除以零的情况
+        seller_rate = f"{(self.seller_positive / self.seller_total * 100):.2f}%" if self.seller_total > 0 else "N/A"
+        buyer_rate = f"{(self.buyer_positive / self.buyer_total * 100):.2f}%" if self.buyer_total > 0 else "N/A"
+        return {
+            "作为卖家的好评数": f"{self.seller_positive}/{self.seller_total}",
+            "作为卖家的好评率": seller_rate,
+            "作为买家的好评数": f"{self.buyer_positive}/{self.buyer_total}",
+            "作为买家的好评率": buyer_rate
+        }
 
-    # 计算比率，并处理除以零的情况
-    seller_rate = f"{(seller_positive / seller_total * 100):.2f}%" if seller_total > 0 else "N/A"
-    buyer_rate = f"{(buyer_positive / buyer_total * 100):.2f}%" if buyer_total > 0 else "N/A"
 
-    return {
-        "作为卖家的好评数": f"{seller_positive}/{seller_total}",
-        "作为卖家的好评率": seller_rate,
-        "作为买家的好评数": f"{buyer_positive}/{buyer_total}",
-        "作为买家的好评率": buyer_rate
-    }
+async def calculate_reputation_from_ratings(ratings_json: list) -> dict:
+    """从原始评价API数据列表中，计算作为卖家和买家的好评数与好评率。"""
+    tally = RatingTally()
+    for card in ratings_json:
+        # 使用 safe_get 保证安全访问
+        data = await safe_get(card, 'cardData', default={})
+        role_tag = await safe_get(data, 'rateTagList', 0, 'text', default='')
+        rate_type = await safe_get(data, 'rate') # 1=好评, 0=中评, -1=差评
+        tally.add(role_tag, rate_type)
+    return tally.to_stats()
 
 
 async def _parse_user_items_data(items_json: list) -> list:
@@ -145,24 +163,81 @@ async def parse_user_head_data(head_json: dict) -> dict:
     }
 
 
+async def _parse_rating_card(card: dict) -> dict:
+    data = await safe_get(card, 'cardData', default={})
+    rate_tag = await safe_get(data, 'rateTagList', 0, 'text', default='未知角色')
+    rate_type = await safe_get(data, 'rate')
+    if rate_type == 1: rate_text = "好评"
+    elif rate_type == 0: rate_text = "中评"
+    elif rate_type == -1: rate_text = "差评"
+    else: rate_text = "未知"
+    return {
+        "评价ID": data.get('rateId'),
+        "评价内容": data.get('feedback'),
+        "评价类型": rate_text,
+        "评价来源角色": rate_tag,
+        "评价者昵称": data.get('raterUserNick'),
+        "评价时间": data.get('gmtCreate'),
+        "评价图片": await safe_get(data, 'pictCdnUrlList', default=[])
+    }
+
+
 async def parse_ratings_data(ratings_json: list) -> list:
     """解析评价列表API的JSON数据。"""
-    parsed_list = []
-    for card in ratings_json:
-        data = await safe_get(card, 'cardData', default={})
-        rate_tag = await safe_get(data, 'rateTagList', 0, 'text', default='未知角色')
-        rate_type = await safe_get(data, 'rate')
-        if rate_type == 1: rate_text = "好评"
-        elif rate_type == 0: rate_text = "中评"
-        elif rate_type == -1: rate_text = "差评"
-        else: rate_text = "未知"
-        parsed_list.append({
-            "评价ID": data.get('rateId'),
-            "评价内容": data.get('feedback'),
-            "评价类型": rate_text,
-            "评价来源角色": rate_tag,
-            "评价者昵称": data.get('raterUserNick'),
-            "评价时间": data.get('gmtCreate'),
-            "评价图片": await safe_get(data, 'pictCdnUrlList', default=[])
-        })
-    return parsed_list
+    return [await _parse_rating_card(card) for card in ratings_json]
+
+
+class IncrementalRatingCollector:
+    """
+    边滚动边统计评价，不保存完整的原始评价列表。
+    评价按时间倒序返回，遇到上次同步时最新的 rateId 即说明后面的评价都已统计过。
+    """
+
+    def __init__(self, known_rate_id: Optional[str] = None, previous_tally: Optional[RatingTally] = None,
+                 previous_ratings: Optional[list] = None, max_kept: int = 50):
+        self.known_rate_id = str(known_rate_id) if known_rate_id else None
+        self.previous_tally = previous_tally or RatingTally()
+        self.previous_ratings = list(previous_ratings or [])
+        self.max_kept = max(0, max_kept)
+        self.new_tally = RatingTally()
+        self.new_ratings = []
+        self.newest_rate_id = None
+        self.reached_known = False
+        self.seen = 0
+
+    async def add_cards(self, cards: list) -> bool:
+        """处理一页评价卡片，返回是否已遇到上次同步过的评价（可以停止滚动）。"""
+        for card in cards:
+            if self.reached_known:
+                break
+            data = await safe_get(card, 'cardData', default={})
+            rate_id = data.get('rateId')
+            rate_id = str(rate_id) if rate_id is not None else None
+            if self.known_rate_id and rate_id == self.known_rate_id:
+                self.reached_known = True
+                break
+            if self.newest_rate_id is None and rate_id:
+                self.newest_rate_id = rate_id
+            self.seen += 1
+            role_tag = await safe_get(data, 'rateTagList', 0, 'text', default='')
+            self.new_tally.add(role_tag, await safe_get(data, 'rate'))
+            if len(self.new_ratings) < self.max_kept:
+                self.new_ratings.append(await _parse_rating_card(card))
+        return self.reached_known
+
+    def _is_incremental(self, complete: bool) -> bool:
+        # 完整滚动到底仍未遇到旧的 rateId（例如评价被删除）时，以本次全量统计为准，避免重复计数
+        return self.reached_known or (self.known_rate_id is not None and not complete)
+
+    def tally(self, complete: bool) -> RatingTally:
+        if self._is_incremental(complete):
+            return self.previous_tally.merged(self.new_tally)
+        return self.new_tally
+
+    def ratings(self, complete: bool) -> list:
+        if self._is_incremental(complete):
+            return (self.new_ratings + self.previous_ratings)[:self.max_kept]
+        return self.new_ratings
+
+    def latest_rate_id(self) -> Optional[str]:
+        return self.newest_rate_id or self.known_rate_id
@@ -0,0 +1,115 @@
+"""
+分阶段异步处理流水线
+每个阶段拥有独立的工作协程池，阶段之间通过有界 asyncio.Queue 连接，
+下游处理不过来时上游的 submit 会被阻塞（背压）。
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """流水线中的一个阶段。handler 返回值会传给下一阶段，返回 None 表示到此为止。"""
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    queue_size: int = 4
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+
+
+@dataclass
+class _RunningStage:
+    stage: Stage
+    queue: asyncio.Queue
+    tasks: List[asyncio.Task] = field(default_factory=list)
+    stats: StageStats = field(default_factory=StageStats)
+
+
+class StagePipeline:
+    """由多个 Stage 串联而成的异步流水线。"""
+
+    def __init__(self, stages: List[Stage], name: str = "pipeline"):
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.name = name
+        self._stages = [
+            _RunningStage(stage=stage, queue=asyncio.Queue(maxsize=max(1, stage.queue_size)))
+            for stage in stages
+        ]
+        self._started = False
+        self._closed = False
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        for index, running in enumerate(self._stages):
+            for worker_id in range(max(1, running.stage.workers)):
+                running.tasks.append(asyncio.create_task(self._worker(index, worker_id)))
+
+    async def submit(self, item: Any) -> None:
+        """提交一个待处理对象到第一阶段；队列已满时等待。"""
+        if not self._started:
+            await self.start()
+        if self._closed:
+            raise RuntimeError(f"流水线 {self.name} 已关闭")
+        await self._stages[0].queue.put(item)
+
+    async def _worker(self, index: int, worker_id: int) -> None:
+        running = self._stages[index]
+        next_stage = self._stages[index + 1] if index + 1 < len(self._stages) else None
+        while True:
+            item = await running.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                started = time.monotonic()
+                try:
+                    result = await running.stage.handler(item)
+                    running.stats.processed += 1
+                except Exception as e:
+                    running.stats.failed += 1
+                    result = None
+                    print(f"   [流水线] 阶段 '{running.stage.name}' (worker {worker_id}) 处理失败: {type(e).__name__}: {e}")
+                finally:
+                    running.stats.busy_seconds += time.monotonic() - started
+                if result is not None and next_stage is not None:
+                    await next_stage.queue.put(result)
+            finally:
+                running.queue.task_done()
+
+    async def close(self) -> None:
+        """等待所有已提交的对象处理完毕，然后停止全部工作协程。"""
+        if not self._started or self._closed:
+            self._closed = True
+            return
+        self._closed = True
+        # 按阶段顺序逐个停止：上游全部退出后再通知下游，保证不会丢失在途对象
+        for running in self._stages:
+            for _ in running.tasks:
+                await running.queue.put(_STOP)
+            await asyncio.gather(*running.tasks, return_exceptions=True)
+        print(f"[流水线] {self.name} 已排空。{self.format_stats()}")
+
+    def stats(self) -> Dict[str, StageStats]:
+        return {running.stage.name: running.stats for running in self._stages}
+
+    def format_stats(self) -> str:
+        parts = []
+        for name, stats in self.stats().items():
+            parts.append(f"{name}: 完成 {stats.processed} / 失败 {stats.failed} / 耗时 {stats.busy_seconds:.1f}s")
+        return "; ".join(parts)
+
+    def pending(self) -> int:
+        return sum(running.queue.qsize() for running in self._stages)
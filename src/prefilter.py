@@ -0,0 +1,141 @@
+"""
+AI 分析前的规则预筛选
+按任务配置的声明式规则（价格区间、标题/描述正则、卖家信誉阈值、发货地区）检查商品，
+明显不符合要求的商品直接判定为不推荐，不再下载图片、也不请求大模型；记录中会写明触发的规则。
+
+任务配置示例（config.json 中任务的 prefilter 字段）:
+    {
+        "min_price": 3000, "max_price": 9000,
+        "exclude_patterns": ["求购", "回收", "配件|镜头盖"],
+        "include_patterns": ["(?i)a7m4|a7 ?iv"],
+        "min_seller_positive_rate": 95, "min_seller_ratings": 5,
+        "regions_include": ["上海", "江苏"], "regions_exclude": []
+    }
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Pattern
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+TEXT_FIELDS = ("商品标题", "商品描述")
+
+
+@dataclass
+class PrefilterRejection:
+    rule: str
+    detail: str
+
+    def to_analysis(self) -> dict:
+        """转换为写入 final_record['ai_analysis'] 的结论。"""
+        return {
+            "is_recommended": False,
+            "reason": f"预筛选未通过: {self.detail}",
+            "risk_tags": [],
+            "prefilter": {"rule": self.rule, "detail": self.detail},
+        }
+
+
+def parse_price(value) -> Optional[float]:
+    """解析 '¥1234'、'1,234.5'、'1.2万' 之类的价格文本，无法解析时返回 None。"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").replace(",", "")
+    match = _NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    return float(match.group()) * (10000 if "万" in text else 1)
+
+
+def _parse_rate(value) -> Optional[float]:
+    text = str(value or "").strip()
+    if not text or text.upper() == "N/A":
+        return None
+    return parse_price(text)
+
+
+def _parse_rating_total(value) -> Optional[int]:
+    # 形如 "好评数/总数"
+    text = str(value or "")
+    if "/" not in text:
+        return None
+    total = text.split("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _compile(patterns) -> List[Pattern]:
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return [re.compile(p) for p in (patterns or []) if p]
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in (value or []) if str(v).strip()]
+
+
+@dataclass
+class Prefilter:
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    include_patterns: List[Pattern] = field(default_factory=list)
+    exclude_patterns: List[Pattern] = field(default_factory=list)
+    min_seller_positive_rate: Optional[float] = None
+    min_seller_ratings: Optional[int] = None
+    regions_include: List[str] = field(default_factory=list)
+    regions_exclude: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_config(cls, config) -> Optional["Prefilter"]:
+        """根据任务的 prefilter 配置构建规则集；未配置或 enabled=false 时返回 None。"""
+        if not isinstance(config, dict) or config.get("enabled") is False:
+            return None
+        rate = config.get("min_seller_positive_rate")
+        ratings = config.get("min_seller_ratings")
+        return cls(
+            min_price=parse_price(config["min_price"]) if config.get("min_price") not in (None, "") else None,
+            max_price=parse_price(config["max_price"]) if config.get("max_price") not in (None, "") else None,
+            include_patterns=_compile(config.get("include_patterns")),
+            exclude_patterns=_compile(config.get("exclude_patterns")),
+            min_seller_positive_rate=float(rate) if rate not in (None, "") else None,
+            min_seller_ratings=int(ratings) if ratings not in (None, "") else None,
+            regions_include=_as_list(config.get("regions_include")),
+            regions_exclude=_as_list(config.get("regions_exclude")),
+        )
+
+    def evaluate(self, item_data: dict, seller_data: Optional[dict] = None) -> Optional[PrefilterRejection]:
+        """按顺序检查各条规则，返回第一条触发的规则；全部通过时返回 None。"""
+        seller_data = seller_data or {}
+
+        price = parse_price(item_data.get("当前售价"))
+        if price is not None:
+            if self.min_price is not None and price < self.min_price:
+                return PrefilterRejection("min_price", f"售价 {price:g} 低于下限 {self.min_price:g}")
+            if self.max_price is not None and price > self.max_price:
+                return PrefilterRejection("max_price", f"售价 {price:g} 高于上限 {self.max_price:g}")
+
+        text = "\n".join(str(item_data.get(f) or "") for f in TEXT_FIELDS)
+        for pattern in self.exclude_patterns:
+            match = pattern.search(text)
+            if match:
+                return PrefilterRejection("exclude_patterns", f"标题/描述包含排除词 '{match.group()}'")
+        if self.include_patterns and not any(p.search(text) for p in self.include_patterns):
+            return PrefilterRejection("include_patterns", "标题/描述不包含任何必需关键词")
+
+        region = str(item_data.get("发货地区") or "")
+        if self.regions_exclude and any(r in region for r in self.regions_exclude):
+            return PrefilterRejection("regions_exclude", f"发货地区 '{region}' 在排除列表中")
+        if self.regions_include and not any(r in region for r in self.regions_include):
+            return PrefilterRejection("regions_include", f"发货地区 '{region}' 不在允许列表中")
+
+        if self.min_seller_ratings is not None:
+            total = _parse_rating_total(seller_data.get("作为卖家的好评数"))
+            if total is not None and total < self.min_seller_ratings:
+                return PrefilterRejection("min_seller_ratings", f"卖家评价数 {total} 少于 {self.min_seller_ratings}")
+        if self.min_seller_positive_rate is not None:
+            rate = _parse_rate(seller_data.get("作为卖家的好评率"))
+            if rate is not None and rate < self.min_seller_positive_rate:
+                return PrefilterRejection(
+                    "min_seller_positive_rate", f"卖家好评率 {rate:g}% 低于 {self.min_seller_positive_rate:g}%"
+                )
+        return None
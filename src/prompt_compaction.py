@@ -0,0 +1,140 @@
+"""
+AI 输入压缩
+商品记录中卖家的完整商品列表与评价列表会让大卖家的 prompt 达到数万 token。发送前去掉缩进，
+评价与商品列表只保留最近 N 条并附上汇总统计，删除 prompt 中未引用的字段；仍超出 token 预算时逐步收紧。
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+_CJK_PATTERN = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+# prompt 未提到时删除的字段：链接、图片地址、爬取元数据等对判断没有帮助的内容
+OPTIONAL_RECORD_FIELDS = ("爬取时间", "搜索关键字", "任务名称", "ai_analysis")
+OPTIONAL_ITEM_FIELDS = ("商品链接", "商品主图链接", "商品图片列表")
+OPTIONAL_SELLER_FIELDS = ("卖家头像链接",)
+OPTIONAL_RATING_FIELDS = ("评价ID", "评价图片", "评价者昵称")
+OPTIONAL_SELLER_ITEM_FIELDS = ("商品ID", "商品主图")
+
+RATINGS_FIELD = "卖家收到的评价列表"
+SELLER_ITEMS_FIELD = "卖家发布的商品列表"
+MAX_TEXT_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符约 1 token/字，其余字符约 4 字符/token。"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class CompactionSettings:
+    enabled: bool = True
+    token_budget: int = 6000
+    ratings_keep: int = 10
+    items_keep: int = 10
+
+
+@dataclass
+class CompactionResult:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    def format(self) -> str:
+        return f"商品数据约 {self.tokens_before} -> {self.tokens_after} tokens"
+
+
+def _drop_unreferenced(data: dict, fields, prompt_text: str) -> dict:
+    return {k: v for k, v in data.items() if k not in fields or k in prompt_text}
+
+
+def _truncate(value, max_chars: int):
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "…"
+    return value
+
+
+def _summarize_ratings(ratings: list) -> dict:
+    summary = {"总条数": len(ratings)}
+    for rating in ratings:
+        rate_type = rating.get("评价类型", "未知") if isinstance(rating, dict) else "未知"
+        summary[rate_type] = summary.get(rate_type, 0) + 1
+    return summary
+
+
+def _summarize_items(items: list) -> dict:
+    summary = {"总数": len(items)}
+    for item in items:
+        status = item.get("商品状态", "未知") if isinstance(item, dict) else "未知"
+        summary[status] = summary.get(status, 0) + 1
+    return summary
+
+
+def _compact_record(
+    record: dict, prompt_text: str, ratings_keep: int, items_keep: int, max_text_chars: Optional[int]
+) -> dict:
+    compact = _drop_unreferenced(record, OPTIONAL_RECORD_FIELDS, prompt_text)
+    if isinstance(compact.get("商品信息"), dict):
+        compact["商品信息"] = _drop_unreferenced(compact["商品信息"], OPTIONAL_ITEM_FIELDS, prompt_text)
+
+    seller = compact.get("卖家信息")
+    if isinstance(seller, dict):
+        seller = _drop_unreferenced(seller, OPTIONAL_SELLER_FIELDS, prompt_text)
+        ratings = seller.get(RATINGS_FIELD)
+        if isinstance(ratings, list):
+            if len(ratings) > ratings_keep:
+                seller["卖家收到的评价概况"] = _summarize_ratings(ratings)
+            seller[RATINGS_FIELD] = [
+                {k: _truncate(v, max_text_chars) if max_text_chars else v
+                 for k, v in _drop_unreferenced(r, OPTIONAL_RATING_FIELDS, prompt_text).items()}
+                if isinstance(r, dict) else r
+                for r in ratings[:ratings_keep]
+            ]
+        items = seller.get(SELLER_ITEMS_FIELD)
+        if isinstance(items, list):
+            if len(items) > items_keep:
+                seller["卖家发布的商品概况"] = _summarize_items(items)
+            seller[SELLER_ITEMS_FIELD] = [
+                _drop_unreferenced(i, OPTIONAL_SELLER_ITEM_FIELDS, prompt_text) if isinstance(i, dict) else i
+                for i in items[:items_keep]
+            ]
+        if max_text_chars:
+            seller = {k: _truncate(v, max_text_chars) for k, v in seller.items()}
+        compact["卖家信息"] = seller
+    return compact
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def compact_product_record(
+    record: dict, prompt_text: str = "", settings: Optional[CompactionSettings] = None
+) -> CompactionResult:
+    """把商品记录序列化为发送给 AI 的紧凑 JSON，并返回压缩前后的 token 估算。"""
+    settings = settings or CompactionSettings()
+    original = json.dumps(record, ensure_ascii=False, indent=2)
+    tokens_before = estimate_tokens(original)
+    if not settings.enabled:
+        return CompactionResult(original, tokens_before, tokens_before)
+
+    ratings_keep, items_keep = max(0, settings.ratings_keep), max(0, settings.items_keep)
+    max_text_chars = None
+    text = _dumps(_compact_record(record, prompt_text, ratings_keep, items_keep, max_text_chars))
+    tokens_after = estimate_tokens(text)
+    # 超出预算时依次截断长文本、减半保留条数，直到满足预算或列表已清空
+    while tokens_after > settings.token_budget:
+        if max_text_chars is None:
+            max_text_chars = MAX_TEXT_CHARS
+        elif ratings_keep or items_keep:
+            ratings_keep, items_keep = ratings_keep // 2, items_keep // 2
+        else:
+            break
+        text = _dumps(_compact_record(record, prompt_text, ratings_keep, items_keep, max_text_chars))
+        tokens_after = estimate_tokens(text)
+    return CompactionResult(text, tokens_before, tokens_after)
+
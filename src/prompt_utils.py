@@ -6,6 +6,7 @@ import sys
 import aiofiles
 
 from src.infrastructure.external.ai_client import AIClient
+from src.infrastructure.external.ai_gateway import get_ai_gateway
 
 # The meta-prompt to instruct the AI
 META_PROMPT_TEMPLATE = """
@@ -34,6 +35,20 @@ META_PROMPT_TEMPLATE = """
 """
 
 
+def load_task_prompt(task: dict) -> str:
+    """按任务配置读取并组合最终的 AI prompt（base + criteria，或单个 ai_prompt_file），与 spider_v2.py 的规则一致。"""
+    if task.get("ai_prompt_base_file") and task.get("ai_prompt_criteria_file"):
+        with open(task["ai_prompt_base_file"], 'r', encoding='utf-8') as f_base:
+            base_prompt = f_base.read()
+        with open(task["ai_prompt_criteria_file"], 'r', encoding='utf-8') as f_criteria:
+            criteria_text = f_criteria.read()
+        return base_prompt.replace("{{CRITERIA_SECTION}}", criteria_text)
+    if task.get("ai_prompt_file"):
+        with open(task["ai_prompt_file"], 'r', encoding='utf-8') as f:
+            return f.read()
+    return ""
+
+
 async def generate_criteria(user_description: str, reference_file_path: str) -> str:
     """
     Generates a new criteria file content using AI.
@@ -69,13 +84,7 @@ async def generate_criteria(user_description: str, reference_file_path: str) ->
         if ai_client.settings.enable_thinking:
             request_params["extra_body"] = {"enable_thinking": False}
 
-        response = await ai_client.client.chat.completions.create(**request_params)
-        # 兼容不同API响应格式，检查response是否为字符串
-        if hasattr(response, 'choices'):
-            generated_text = response.choices[0].message.content
-        else:
-            # 如果response是字符串，则直接使用
-            generated_text = response
+        generated_text = await get_ai_gateway().chat_text(**request_params)
         print("AI已成功生成内容。")
         
         # 处理content可能为None或空字符串的情况
@@ -0,0 +1,300 @@
+"""
+离线重新分析（回填）
+修改 prompts/ 下的评判标准后，对 jsonl/ 中已保存的结果逐条重建 AI 输入并重新判定，不打开浏览器。
+- 按行流式读取结果文件，固定窗口内并发分析，输出按原顺序写入新文件（默认 <原文件名>.reanalyzed.jsonl）；
+- 记录中的 prompt_hash 与当前 prompt 一致、或属于规则预筛选结论的商品直接原样写出；
+- 断点文件记录已写出的行数和输出文件字节数，中断后重新运行会截断未确认的输出并从断点继续；
+- AI 请求经由 AI 网关/执行器，遵守全局 RPM/TPM 限制，结论同样写入 AI 结论缓存。
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from src.ai_batch import AIBatcher, BatchSettings
+from src.ai_cache import get_ai_verdict_cache, record_content_hash, verdict_cache_key
+from src.ai_handler import (
+    ai_analysis_uses_images,
+    download_all_images,
+    get_ai_analysis,
+    get_ai_batch_analysis,
+)
+from src.config import MODEL_NAME
+from src.item_index import JSONL_DIR, jsonl_path_for_keyword, remove_item_index
+from src.prompt_compaction import CompactionSettings
+from src.utils import prompt_hash
+
+
+REANALYZED_SUFFIX = ".reanalyzed.jsonl"
+
+
+def default_output_path(source_path: str) -> str:
+    base, _ = os.path.splitext(source_path)
+    return base + REANALYZED_SUFFIX
+
+
+def checkpoint_path_for(output_path: str) -> str:
+    return output_path + ".checkpoint.json"
+
+
+@dataclass
+class ReanalysisStats:
+    total: int = 0
+    analyzed: int = 0
+    cached: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.time)
+
+    def format(self) -> str:
+        elapsed = max(0.001, time.time() - self.started_at)
+        return (
+            f"已处理 {self.total} 条（重新分析 {self.analyzed}，缓存命中 {self.cached}，"
+            f"无需分析 {self.unchanged}，失败保留原结论 {self.failed}），"
+            f"耗时 {elapsed:.0f}s，{self.total / elapsed * 60:.0f} 条/分钟"
+        )
+
+
+@dataclass
+class ReanalysisCheckpoint:
+    source: str
+    prompt_hash: str
+    lines_done: int = 0
+    output_bytes: int = 0
+    finished: bool = False
+    stats: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ReanalysisCheckpoint"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(**data)
+        except (OSError, TypeError, ValueError):
+            return None
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def resolve_results_path(name: str) -> str:
+    """接受完整路径或 jsonl/ 下的文件名。"""
+    if os.path.exists(name) or os.path.dirname(name):
+        return name
+    return os.path.join(JSONL_DIR, name)
+
+
+def find_task_for_results(tasks: list, results_path: str, task_name: Optional[str] = None) -> Optional[dict]:
+    """按任务名查找任务；未指定时按关键字对应的结果文件名匹配。"""
+    if task_name:
+        return next((t for t in tasks if t.get("task_name") == task_name), None)
+    filename = os.path.basename(results_path)
+    return next(
+        (t for t in tasks if t.get("keyword") and os.path.basename(jsonl_path_for_keyword(t["keyword"])) == filename),
+        None,
+    )
+
+
+def needs_reanalysis(record: dict, current_prompt_hash: str) -> bool:
+    """prompt 未变化的结论和规则预筛选的结论（与评判标准无关）不需要重新分析。"""
+    analysis = record.get("ai_analysis")
+    if not isinstance(analysis, dict):
+        return True
+    if analysis.get("prefilter"):
+        return False
+    return analysis.get("prompt_hash") != current_prompt_hash or "error" in analysis
+
+
+class Reanalyzer:
+    """对单个结果文件执行重新分析。"""
+
+    def __init__(
+        self,
+        source_path: str,
+        prompt_text: str,
+        output_path: Optional[str] = None,
+        workers: int = 8,
+        compaction: Optional[CompactionSettings] = None,
+        batch: Optional[BatchSettings] = None,
+        use_cache: bool = True,
+        cache_ttl: float = 604800,
+        checkpoint_every: int = 50,
+    ):
+        self.source_path = source_path
+        self.prompt_text = prompt_text
+        self.prompt_hash = prompt_hash(prompt_text)
+        self.output_path = output_path or default_output_path(source_path)
+        self.checkpoint_path = checkpoint_path_for(self.output_path)
+        self.workers = max(1, workers)
+        self.compaction = compaction
+        self.use_images = ai_analysis_uses_images()
+        self.cache = get_ai_verdict_cache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.stats = ReanalysisStats()
+        self._semaphore = asyncio.Semaphore(self.workers)
+        self._batcher = None
+        if batch is not None and batch.enabled:
+            if self.use_images:
+                print("LOG: 已启用 AI_SEND_IMAGES，批量分析仅支持纯文本，继续逐个分析。")
+            else:
+                self._batcher = AIBatcher(
+                    lambda records: get_ai_batch_analysis(records, prompt_text, compaction, batch.tokens_per_item),
+                    max_items=batch.max_items,
+                    max_wait=batch.max_wait,
+                )
+                # 一批需要凑满 max_items 个同时等待的商品
+                self.workers = max(self.workers, batch.max_items)
+                self._semaphore = asyncio.Semaphore(self.workers)
+
+    def reset(self) -> None:
+        """丢弃断点，从头开始。"""
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _resume_checkpoint(self) -> ReanalysisCheckpoint:
+        checkpoint = ReanalysisCheckpoint.load(self.checkpoint_path)
+        if (
+            checkpoint
+            and checkpoint.source == os.path.abspath(self.source_path)
+            and checkpoint.prompt_hash == self.prompt_hash
+            and os.path.exists(self.output_path)
+            and os.path.getsize(self.output_path) >= checkpoint.output_bytes
+        ):
+            print(f"LOG: 从断点继续：已完成 {checkpoint.lines_done} 行。")
+            checkpoint.finished = False
+            return checkpoint
+        return ReanalysisCheckpoint(source=os.path.abspath(self.source_path), prompt_hash=self.prompt_hash)
+
+    async def _analyze(self, record: dict) -> Optional[dict]:
+        item_info = record.get("商品信息") or {}
+        cache_key = None
+        if self.cache:
+            cache_key = verdict_cache_key(
+                record_content_hash(record, include_images=self.use_images), self.prompt_hash, MODEL_NAME
+            )
+            cached = self.cache.get(cache_key, self.cache_ttl)
+            if cached:
+                self.stats.cached += 1
+                return cached
+
+        result = None
+        if self._batcher is not None:
+            result = await self._batcher.submit(record)
+        if result is None:
+            async def _load_images() -> list:
+                return await download_all_images(item_info.get("商品ID"), item_info.get("商品图片列表", []), "reanalysis")
+
+            result = await get_ai_analysis(
+                product_data=record,
+                prompt_text=self.prompt_text,
+                image_loader=_load_images,
+                compaction=self.compaction,
+            )
+        if result:
+            self.stats.analyzed += 1
+            if cache_key:
+                self.cache.put(cache_key, self.prompt_hash, MODEL_NAME, result)
+        return result
+
+    async def _process_line(self, line: str) -> str:
+        """返回要写入输出文件的一行（带换行符）。"""
+        if not line.strip():
+            return ""
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return line if line.endswith("\n") else line + "\n"
+        if not isinstance(record, dict) or not needs_reanalysis(record, self.prompt_hash):
+            self.stats.unchanged += 1
+            return line if line.endswith("\n") else line + "\n"
+
+        async with self._semaphore:
+            try:
+                result = await self._analyze(record)
+            except Exception as e:
+                print(f"   [重新分析] 商品 {(record.get('商品信息') or {}).get('商品ID')} 分析失败: {e}")
+                result = None
+        if result:
+            result["prompt_hash"] = self.prompt_hash
+            record["ai_analysis"] = result
+        else:
+            # 保留原结论；prompt_hash 未更新，下次运行会再次尝试
+            self.stats.failed += 1
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    async def run(self) -> ReanalysisStats:
+        checkpoint = self._resume_checkpoint()
+        source_size = os.path.getsize(self.source_path)
+        window = deque()
+        window_size = self.workers * 4
+
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        mode = "r+b" if checkpoint.lines_done and os.path.exists(self.output_path) else "wb"
+        with open(self.source_path, "r", encoding="utf-8") as source, open(self.output_path, mode) as output:
+            # 截断断点之后未确认的输出
+            output.seek(checkpoint.output_bytes)
+            output.truncate()
+
+            async def _write_oldest() -> None:
+                text = await window.popleft()
+                output.write(text.encode("utf-8"))
+                checkpoint.lines_done += 1
+                self.stats.total += 1
+                if checkpoint.lines_done % self.checkpoint_every == 0:
+                    output.flush()
+                    checkpoint.output_bytes = output.tell()
+                    checkpoint.stats = asdict(self.stats)
+                    checkpoint.save(self.checkpoint_path)
+                if self.stats.total % 500 == 0:
+                    print(f"LOG: {self.stats.format()}")
+
+            try:
+                for line_number, line in enumerate(source):
+                    if line_number < checkpoint.lines_done:
+                        continue
+                    window.append(asyncio.ensure_future(self._process_line(line)))
+                    while len(window) >= window_size:
+                        await _write_oldest()
+                if self._batcher is not None:
+                    await self._batcher.close()
+                while window:
+                    await _write_oldest()
+            finally:
+                for pending in window:
+                    pending.cancel()
+                output.flush()
+                checkpoint.output_bytes = output.tell()
+                checkpoint.stats = asdict(self.stats)
+                checkpoint.save(self.checkpoint_path)
+
+        checkpoint.finished = True
+        checkpoint.save(self.checkpoint_path)
+        if os.path.getsize(self.source_path) != source_size:
+            print("LOG: 重新分析期间结果文件有新增记录，新增部分未包含在输出中，可再次运行补齐。")
+        print(f"LOG: 重新分析完成，{self.stats.format()}，输出: {self.output_path}")
+        return self.stats
+
+    def replace_source(self) -> bool:
+        """用输出文件替换原结果文件（仅当原文件在此期间没有被追加），并让去重索引在下次启动时重建。"""
+        checkpoint = ReanalysisCheckpoint.load(self.checkpoint_path)
+        if not checkpoint or not checkpoint.finished:
+            return False
+        with open(self.source_path, "rb") as f:
+            source_lines = sum(1 for _ in f)
+        if source_lines != checkpoint.lines_done:
+            print("LOG: 原结果文件在重新分析期间发生了变化，保留输出文件，不做替换。")
+            return False
+        os.replace(self.output_path, self.source_path)
+        os.remove(self.checkpoint_path)
+        remove_item_index(self.source_path)
+        print(f"LOG: 已用重新分析的结果替换 {self.source_path}")
+        return True
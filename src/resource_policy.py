@@ -0,0 +1,120 @@
+"""
+浏览器资源拦截策略
+我们只读取页面发出的 mtop 接口 JSON，图片、视频、字体和统计脚本既浪费代理流量又拖慢页面加载。
+在 BrowserContext 上注册 route，按资源类型拦截，脚本只放行 mtop 签名和安全校验所需的部分，
+并按资源类型统计实际下载的字节数。
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font")
+# 页面主体脚本、mtop 签名 (lib-mtop) 与滑块/安全校验 (baxia, AWSC, um/fireyejs)
+DEFAULT_SCRIPT_ALLOWLIST = (
+    "goofish.com",
+    "/idlefish/",
+    "lib-mtop",
+    "/mtb/",
+    "baxia",
+    "awsc",
+    "/um.js",
+    "fireyejs",
+    "punish",
+)
+
+
+def split_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split(",") if item.strip()]
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+@dataclass
+class ResourceStats:
+    """按资源类型统计的放行请求数、下载字节数与拦截请求数。"""
+    loaded_requests: Dict[str, int] = field(default_factory=dict)
+    loaded_bytes: Dict[str, int] = field(default_factory=dict)
+    blocked_requests: Dict[str, int] = field(default_factory=dict)
+
+    def record_loaded(self, resource_type: str, size: int) -> None:
+        self.loaded_requests[resource_type] = self.loaded_requests.get(resource_type, 0) + 1
+        self.loaded_bytes[resource_type] = self.loaded_bytes.get(resource_type, 0) + max(0, size)
+
+    def record_blocked(self, resource_type: str) -> None:
+        self.blocked_requests[resource_type] = self.blocked_requests.get(resource_type, 0) + 1
+
+    def total_bytes(self) -> int:
+        return sum(self.loaded_bytes.values())
+
+    def format(self) -> str:
+        loaded = ", ".join(
+            f"{rtype} {self.loaded_requests[rtype]}次/{format_bytes(size)}"
+            for rtype, size in sorted(self.loaded_bytes.items(), key=lambda kv: kv[1], reverse=True)
+        ) or "无"
+        blocked = ", ".join(
+            f"{rtype} {count}次" for rtype, count in sorted(self.blocked_requests.items())
+        ) or "无"
+        return f"已下载 {format_bytes(self.total_bytes())} ({loaded}); 已拦截: {blocked}"
+
+
+class ResourcePolicy:
+    """按资源类型与脚本白名单决定放行或拦截请求。"""
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        block_scripts: bool = True,
+        script_allowlist: Iterable[str] = DEFAULT_SCRIPT_ALLOWLIST,
+    ):
+        self.blocked_types = {item.lower() for item in blocked_types}
+        self.block_scripts = block_scripts
+        self.script_allowlist = [item.lower() for item in script_allowlist]
+
+    def is_script_allowed(self, url: str) -> bool:
+        lowered = url.lower()
+        host = urlparse(lowered).hostname or ""
+        return any(pattern in host or pattern in lowered for pattern in self.script_allowlist)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.blocked_types:
+            return True
+        if resource_type == "script" and self.block_scripts:
+            return not self.is_script_allowed(url)
+        return False
+
+
+async def install_resource_policy(context, policy: Optional[ResourcePolicy]) -> ResourceStats:
+    """在浏览器上下文上注册拦截路由与流量统计，返回统计对象。policy 为 None 时只统计不拦截。"""
+    stats = ResourceStats()
+
+    async def _handle_route(route) -> None:
+        request = route.request
+        if policy.should_block(request.resource_type, request.url):
+            stats.record_blocked(request.resource_type)
+            await route.abort()
+        else:
+            await route.fallback()
+
+    async def _on_request_finished(request) -> None:
+        try:
+            sizes = await request.sizes()
+            size = sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        except Exception:
+            size = 0
+        stats.record_loaded(request.resource_type, size)
+
+    if policy is not None:
+        await context.route("**/*", _handle_route)
+    context.on("requestfinished", _on_request_finished)
+    return stats
@@ -1,7 +1,8 @@
 import asyncio
-import json
 import os
 import random
+import re
+import time
 from datetime import datetime
 from typing import Optional
 from urllib.parse import urlencode
@@ -9,12 +10,14 @@ from urllib.parse import urlencode
 from playwright.async_api import (
     Response,
     TimeoutError as PlaywrightTimeoutError,
-    async_playwright,
 )
 
 from src.ai_handler import (
     download_all_images,
+    ai_analysis_uses_images,
     get_ai_analysis,
+    get_ai_batch_analysis,
+    get_ai_triage,
     send_ntfy_notification,
     cleanup_task_images,
 )
@@ -22,27 +25,40 @@ from src.config import (
     AI_DEBUG_MODE,
     API_URL_PATTERN,
     DETAIL_API_URL_PATTERN,
-    LOGIN_IS_EDGE,
-    RUN_HEADLESS,
-    RUNNING_IN_DOCKER,
+    MODEL_NAME,
     STATE_FILE,
     SKIP_AI_ANALYSIS,
 )
 from src.parsers import (
+    IncrementalRatingCollector,
     _parse_search_results_json,
     _parse_user_items_data,
-    calculate_reputation_from_ratings,
-    parse_ratings_data,
     parse_user_head_data,
 )
 from src.utils import (
     format_registration_days,
-    get_link_unique_key,
     random_sleep,
     safe_get,
     save_to_jsonl,
     log_time,
+    prompt_hash,
 )
+from src.ai_batch import AIBatcher, BatchSettings
+from src.ai_cascade import CascadeSettings, CascadeStats, triage_rejection
+from src.ai_cache import get_ai_verdict_cache, record_content_hash, verdict_cache_key
+from src.browser_pool import get_browser_pool
+from src.item_index import open_item_index
+from src.item_registry import get_item_registry, registry_key
+from src.mtop import MtopClient, MtopError
+from src.page_pool import PagePool
+from src.pacing import AccountPacer, account_key_for, resolve_pacing_profile
+from src.pipeline import Stage, StagePipeline
+from src.prefilter import Prefilter
+from src.prompt_compaction import CompactionSettings
+from src.resource_policy import DEFAULT_BLOCKED_TYPES, DEFAULT_SCRIPT_ALLOWLIST, ResourcePolicy, install_resource_policy, split_list
+from src.seller_cache import RatingSyncState, get_seller_cache, normalize_rating_count
+from src.search_filters import SearchFilterRoute, is_search_response_accepted, resolve_filter_mode
+from src.task_state import is_page_exhausted, load_high_water_mark, parse_publish_time, save_high_water_mark
 from src.rotation import RotationPool, load_state_files, parse_proxy_pool, RotationItem
 
 
@@ -67,6 +83,15 @@ def _as_int(value, default: int) -> int:
         return default
 
 
+def _as_float(value, default: float) -> float:
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def _get_rotation_settings(task_config: dict) -> dict:
     account_cfg = task_config.get("account_rotation") or {}
     proxy_cfg = task_config.get("proxy_rotation") or {}
@@ -97,21 +122,309 @@ def _get_rotation_settings(task_config: dict) -> dict:
     }
 
 
-async def scrape_user_profile(context, user_id: str) -> dict:
+def _get_pipeline_settings(task_config: dict) -> dict:
+    pipeline_cfg = task_config.get("pipeline") or {}
+    ai_workers = _as_int(pipeline_cfg.get("ai_workers"), _as_int(os.getenv("PIPELINE_AI_WORKERS"), 2))
+    queue_size = _as_int(pipeline_cfg.get("queue_size"), _as_int(os.getenv("PIPELINE_QUEUE_SIZE"), 4))
+    return {
+        "ai_workers": max(1, ai_workers),
+        "queue_size": max(1, queue_size),
+    }
+
+
+def _get_incremental_settings(task_config: dict) -> dict:
+    incremental_cfg = task_config.get("incremental_crawl")
+    default_enabled = _as_bool(os.getenv("INCREMENTAL_CRAWL"), True)
+    default_stop_after = _as_int(os.getenv("INCREMENTAL_STOP_AFTER_SEEN"), 0)
+    if isinstance(incremental_cfg, dict):
+        enabled = _as_bool(incremental_cfg.get("enabled"), default_enabled)
+        stop_after_seen = _as_int(incremental_cfg.get("stop_after_seen"), default_stop_after)
+    else:
+        enabled = _as_bool(incremental_cfg, default_enabled)
+        stop_after_seen = default_stop_after
+    return {
+        "enabled": enabled,
+        "stop_after_seen": max(0, stop_after_seen),
+    }
+
+
+def _get_seller_cache_settings(task_config: dict) -> dict:
+    cache_cfg = task_config.get("seller_cache")
+    if not isinstance(cache_cfg, dict):
+        cache_cfg = {"enabled": cache_cfg}
+    enabled = _as_bool(cache_cfg.get("enabled"), _as_bool(os.getenv("SELLER_CACHE_ENABLED"), True))
+    ttl = _as_int(cache_cfg.get("ttl_sec"), _as_int(os.getenv("SELLER_CACHE_TTL"), 21600))
+    max_age = _as_int(cache_cfg.get("max_age_sec"), _as_int(os.getenv("SELLER_CACHE_MAX_AGE"), 604800))
+    refresh_by_rating_count = _as_bool(
+        cache_cfg.get("refresh_by_rating_count"),
+        _as_bool(os.getenv("SELLER_CACHE_REFRESH_BY_RATING_COUNT"), True),
+    )
+    incremental_ratings = _as_bool(
+        cache_cfg.get("incremental_ratings"),
+        _as_bool(os.getenv("SELLER_RATINGS_INCREMENTAL"), True),
+    )
+    ratings_keep = _as_int(cache_cfg.get("ratings_keep"), _as_int(os.getenv("SELLER_RATINGS_KEEP"), 50))
+    items_max = _as_int(cache_cfg.get("items_max"), _as_int(os.getenv("SELLER_ITEMS_MAX"), 100))
+    return {
+        "enabled": enabled,
+        "ttl": max(0, ttl),
+        "max_age": max(0, max_age),
+        "refresh_by_rating_count": refresh_by_rating_count,
+        "incremental_ratings": incremental_ratings,
+        "ratings_keep": max(0, ratings_keep),
+        "items_max": max(1, items_max),
+    }
+
+
+def _get_item_registry_settings(task_config: dict) -> dict:
+    registry_cfg = task_config.get("item_registry")
+    if not isinstance(registry_cfg, dict):
+        registry_cfg = {"enabled": registry_cfg}
+    enabled = _as_bool(registry_cfg.get("enabled"), _as_bool(os.getenv("ITEM_REGISTRY_ENABLED"), True))
+    detail_ttl = _as_int(registry_cfg.get("detail_ttl_sec"), _as_int(os.getenv("ITEM_REGISTRY_DETAIL_TTL"), 86400))
+    analysis_ttl = _as_int(registry_cfg.get("analysis_ttl_sec"), _as_int(os.getenv("ITEM_REGISTRY_ANALYSIS_TTL"), 604800))
+    return {
+        "enabled": enabled,
+        "detail_ttl": max(0, detail_ttl),
+        "analysis_ttl": max(0, analysis_ttl),
+    }
+
+
+def _get_ai_cache_settings(task_config: dict) -> dict:
+    cache_cfg = task_config.get("ai_cache")
+    if not isinstance(cache_cfg, dict):
+        cache_cfg = {"enabled": cache_cfg}
+    enabled = _as_bool(cache_cfg.get("enabled"), _as_bool(os.getenv("AI_CACHE_ENABLED"), True))
+    ttl = _as_int(cache_cfg.get("ttl_sec"), _as_int(os.getenv("AI_CACHE_TTL"), 604800))
+    return {"enabled": enabled, "ttl": max(0, ttl)}
+
+
+def _get_cascade_settings(task_config: dict) -> CascadeSettings:
+    """任务配置 ai_cascade 可以是 bool 或 dict（triage_model / threshold / triage_max_tokens）。"""
+    cascade_cfg = task_config.get("ai_cascade")
+    if not isinstance(cascade_cfg, dict):
+        cascade_cfg = {"enabled": cascade_cfg}
+    threshold = _as_float(cascade_cfg.get("threshold"), _as_float(os.getenv("AI_TRIAGE_THRESHOLD"), 0.3))
+    return CascadeSettings(
+        enabled=_as_bool(cascade_cfg.get("enabled"), _as_bool(os.getenv("AI_CASCADE_ENABLED"), False)),
+        triage_model=cascade_cfg.get("triage_model") or os.getenv("AI_TRIAGE_MODEL") or MODEL_NAME,
+        threshold=min(1.0, max(0.0, threshold)),
+        triage_max_tokens=max(50, _as_int(cascade_cfg.get("triage_max_tokens"), _as_int(os.getenv("AI_TRIAGE_MAX_TOKENS"), 200))),
+    )
+
+
+def _get_batch_settings(task_config: dict) -> BatchSettings:
+    """任务配置 ai_batch 可以是 bool 或 dict（max_items / max_wait_sec / tokens_per_item）。"""
+    batch_cfg = task_config.get("ai_batch")
+    if not isinstance(batch_cfg, dict):
+        batch_cfg = {"enabled": batch_cfg}
+    return BatchSettings(
+        enabled=_as_bool(batch_cfg.get("enabled"), _as_bool(os.getenv("AI_BATCH_ENABLED"), False)),
+        max_items=max(1, _as_int(batch_cfg.get("max_items"), _as_int(os.getenv("AI_BATCH_SIZE"), 8))),
+        max_wait=max(0.0, _as_float(batch_cfg.get("max_wait_sec"), _as_float(os.getenv("AI_BATCH_MAX_WAIT"), 60))),
+        tokens_per_item=max(200, _as_int(batch_cfg.get("tokens_per_item"), _as_int(os.getenv("AI_BATCH_TOKENS_PER_ITEM"), 800))),
+    )
+
+
+def _get_prompt_compaction_settings(task_config: dict) -> CompactionSettings:
+    """任务配置 prompt_compaction 可以是 bool 或 dict（token_budget / ratings_keep / items_keep）。"""
+    compaction_cfg = task_config.get("prompt_compaction")
+    if not isinstance(compaction_cfg, dict):
+        compaction_cfg = {"enabled": compaction_cfg}
+    return CompactionSettings(
+        enabled=_as_bool(compaction_cfg.get("enabled"), _as_bool(os.getenv("AI_PROMPT_COMPACTION"), True)),
+        token_budget=max(500, _as_int(compaction_cfg.get("token_budget"), _as_int(os.getenv("AI_PROMPT_TOKEN_BUDGET"), 6000))),
+        ratings_keep=max(0, _as_int(compaction_cfg.get("ratings_keep"), _as_int(os.getenv("AI_PROMPT_RATINGS_KEEP"), 10))),
+        items_keep=max(0, _as_int(compaction_cfg.get("items_keep"), _as_int(os.getenv("AI_PROMPT_ITEMS_KEEP"), 10))),
+    )
+
+
+def _get_resource_policy(task_config: dict) -> Optional[ResourcePolicy]:
+    """任务配置 resource_blocking 可以是 bool 或 dict，未启用时返回 None（只统计流量不拦截）。"""
+    blocking_cfg = task_config.get("resource_blocking")
+    if not isinstance(blocking_cfg, dict):
+        blocking_cfg = {"enabled": blocking_cfg}
+    if not _as_bool(blocking_cfg.get("enabled"), _as_bool(os.getenv("RESOURCE_BLOCKING_ENABLED"), True)):
+        return None
+
+    blocked_types = split_list(blocking_cfg.get("blocked_types")) or split_list(os.getenv("RESOURCE_BLOCKED_TYPES"))
+    block_scripts = _as_bool(blocking_cfg.get("block_scripts"), _as_bool(os.getenv("RESOURCE_BLOCK_SCRIPTS"), True))
+    script_allowlist = (
+        list(DEFAULT_SCRIPT_ALLOWLIST)
+        + split_list(blocking_cfg.get("script_allowlist"))
+        + split_list(os.getenv("RESOURCE_SCRIPT_ALLOWLIST"))
+    )
+    return ResourcePolicy(blocked_types or DEFAULT_BLOCKED_TYPES, block_scripts, script_allowlist)
+
+
+def _resolve_scrape_mode(task_config: dict) -> str:
+    """browser: 渲染搜索页和详情页并拦截接口响应；api: 复用登录态直接调用 mtop 接口。"""
+    mode = str(task_config.get("scrape_mode") or os.getenv("SCRAPE_MODE") or "browser").strip().lower()
+    return mode if mode in {"browser", "api"} else "browser"
+
+
+async def _apply_filters_by_clicking(page, personal_only: bool, min_price, max_price):
+    """通过点击页面上的筛选项应用排序/个人闲置/价格筛选，返回最后一次捕获的搜索响应。"""
+    final_response = None
+    log_time("步骤 2 - 应用筛选条件...")
+    await page.click('text=新发布')
+    await random_sleep(2, 4) # 原来是 (1.5, 2.5)
+    async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=20000) as response_info:
+        await page.click('text=最新')
+        # --- 修改: 增加排序后的等待时间 ---
+        await random_sleep(4, 7) # 原来是 (3, 5)
+    final_response = await response_info.value
+
+    if personal_only:
+        async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=20000) as response_info:
+            await page.click('text=个人闲置')
+            # --- 修改: 将固定等待改为随机等待，并加长 ---
+            await random_sleep(4, 6) # 原来是 asyncio.sleep(5)
+        final_response = await response_info.value
+
+    if min_price or max_price:
+        price_container = page.locator('div[class*="search-price-input-container"]').first
+        if await price_container.is_visible():
+            if min_price:
+                await price_container.get_by_placeholder("¥").first.fill(min_price)
+                # --- 修改: 将固定等待改为随机等待 ---
+                await random_sleep(1, 2.5) # 原来是 asyncio.sleep(5)
+            if max_price:
+                await price_container.get_by_placeholder("¥").nth(1).fill(max_price)
+                # --- 修改: 将固定等待改为随机等待 ---
+                await random_sleep(1, 2.5) # 原来是 asyncio.sleep(5)
+
+            async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=20000) as response_info:
+                await page.keyboard.press('Tab')
+                # --- 修改: 增加确认价格后的等待时间 ---
+                await random_sleep(4, 7) # 原来是 asyncio.sleep(5)
+            final_response = await response_info.value
+        else:
+            print("LOG: 警告 - 未找到价格输入容器。")
+    return final_response
+
+
+async def _open_search_results(page, keyword: str, filter_mode: str, personal_only: bool, min_price, max_price):
+    """导航到搜索结果页、检查验证弹窗并应用筛选条件，返回第一页的搜索响应。"""
+    log_time("步骤 1 - 导航到搜索结果页...")
+    # 使用 'q' 参数构建正确的搜索URL，并进行URL编码
+    params = {'q': keyword}
+    search_url = f"https://www.goofish.com/search?{urlencode(params)}"
+    log_time(f"目标URL: {search_url}")
+
+    # 在导航前安装拦截器，把排序和筛选条件直接写入搜索API请求
+    search_filter_route = None
+    if filter_mode == "encoded":
+        search_filter_route = SearchFilterRoute(page, personal_only, min_price, max_price)
+        await search_filter_route.install()
+
+    # 使用 expect_response 在导航的同时捕获初始搜索的API数据
+    async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=30000) as response_info:
+        await page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
+
+    initial_response = await response_info.value
+
+    # 等待页面加载出关键筛选元素，以确认已成功进入搜索结果页
+    await page.wait_for_selector('text=新发布', timeout=15000)
+
+    # 模拟真实用户行为：页面加载后的初始停留和浏览
+    log_time("[反爬] 模拟用户查看页面...")
+    await random_sleep(5, 10)
+
+    # --- 新增：检查是否存在验证弹窗 ---
+    baxia_dialog = page.locator("div.baxia-dialog-mask")
+    middleware_widget = page.locator("div.J_MIDDLEWARE_FRAME_WIDGET")
+    try:
+        # 等待弹窗在2秒内出现。如果出现，则执行块内代码。
+        await baxia_dialog.wait_for(state='visible', timeout=2000)
+        print("\n==================== CRITICAL BLOCK DETECTED ====================")
+        print("检测到闲鱼反爬虫验证弹窗 (baxia-dialog)，无法继续操作。")
+        print("这通常是因为操作过于频繁或被识别为机器人。")
+        print("建议：")
+        print("1. 停止脚本一段时间再试。")
+        print("2. (推荐) 在 .env 文件中设置 RUN_HEADLESS=false，以非无头模式运行，这有助于绕过检测。")
+        print(f"任务 '{keyword}' 将在此处中止。")
+        print("===================================================================")
+        raise RiskControlError("baxia-dialog")
+    except PlaywrightTimeoutError:
+        # 2秒内弹窗未出现，这是正常情况，继续执行
+        pass
+
+    # 检查是否有J_MIDDLEWARE_FRAME_WIDGET覆盖层
+    try:
+        await middleware_widget.wait_for(state='visible', timeout=2000)
+        print("\n==================== CRITICAL BLOCK DETECTED ====================")
+        print("检测到闲鱼反爬虫验证弹窗 (J_MIDDLEWARE_FRAME_WIDGET)，无法继续操作。")
+        print("这通常是因为操作过于频繁或被识别为机器人。")
+        print("建议：")
+        print("1. 停止脚本一段时间再试。")
+        print("2. (推荐) 更新登录状态文件，确保登录状态有效。")
+        print("3. 降低任务执行频率，避免被识别为机器人。")
+        print(f"任务 '{keyword}' 将在此处中止。")
+        print("===================================================================")
+        raise RiskControlError("J_MIDDLEWARE_FRAME_WIDGET")
+    except PlaywrightTimeoutError:
+        # 2秒内弹窗未出现，这是正常情况，继续执行
+        pass
+    # --- 结束新增 ---
+
+    try:
+        await page.click("div[class*='closeIconBg']", timeout=3000)
+        print("LOG: 已关闭广告弹窗。")
+    except PlaywrightTimeoutError:
+        print("LOG: 未检测到广告弹窗。")
+
+    final_response = None
+    if search_filter_route:
+        if await is_search_response_accepted(initial_response):
+            log_time(f"步骤 2 - 筛选条件已编码进搜索请求（改写 {search_filter_route.rewritten} 次），跳过UI点击。")
+            final_response = initial_response
+        else:
+            log_time("步骤 2 - 编码后的搜索请求被拒绝，回退为点击筛选。")
+            await search_filter_route.uninstall()
+            search_filter_route = None
+    if not search_filter_route:
+        final_response = await _apply_filters_by_clicking(page, personal_only, min_price, max_price)
+    return final_response if final_response and final_response.ok else initial_response
+
+
+async def scrape_user_profile(context, user_id: str, cache_settings: Optional[dict] = None,
+                              page_pool: Optional[PagePool] = None) -> dict:
     """
     【新版】访问指定用户的个人主页，按顺序采集其摘要信息、完整的商品列表和完整的评价列表。
+    启用卖家缓存时，TTL 内直接返回缓存；过期后先只读取头部信息，评价总数未变化则沿用缓存的列表与统计。
     """
+    cache_settings = cache_settings or _get_seller_cache_settings({"seller_cache": False})
+    seller_cache = get_seller_cache() if cache_settings["enabled"] else None
+    cached = seller_cache.get(user_id) if seller_cache else None
+    if cached and cached.age < cache_settings["ttl"]:
+        print(f"   -> 卖家 {user_id} 命中缓存（{int(cached.age // 60)} 分钟前采集），跳过主页采集。")
+        return dict(cached.profile)
+
     print(f"   -> 开始采集用户ID: {user_id} 的完整信息...")
     profile_data = {}
-    page = await context.new_page()
+    profile_complete = False
 
     # 为各项异步任务准备Future和数据容器
     head_api_future = asyncio.get_event_loop().create_future()
 
-    all_items, all_ratings = [], []
+    all_items = []
     stop_item_scrolling, stop_rating_scrolling = asyncio.Event(), asyncio.Event()
 
+    # 评价只做流式统计并保留少量原始评价；增量模式下遇到上次同步过的最新评价即停止滚动
+    # 评价同步进度与卖家缓存存放在同一个数据库中，关闭卖家缓存时也不做增量同步
+    incremental_ratings = bool(seller_cache) and cache_settings["incremental_ratings"]
+    rating_state = seller_cache.get_rating_state(user_id) if incremental_ratings else None
+    rating_collector = IncrementalRatingCollector(
+        known_rate_id=rating_state.newest_rate_id if rating_state else None,
+        previous_tally=rating_state.tally if rating_state else None,
+        previous_ratings=rating_state.recent_ratings if rating_state else None,
+        max_kept=cache_settings["ratings_keep"],
+    )
+    ratings_complete = False
+
     async def handle_response(response: Response):
+        nonlocal ratings_complete
         # 捕获头部摘要API
         if "mtop.idle.web.user.page.head" in response.url and not head_api_future.done():
             try:
@@ -126,7 +439,10 @@ async def scrape_user_profile(context, user_id: str) -> dict:
                 data = await response.json()
                 all_items.extend(data.get('data', {}).get('cardList', []))
                 print(f"      [API捕获] 商品列表... 当前已捕获 {len(all_items)} 件")
-                if not data.get('data', {}).get('nextPage', True):
+                if len(all_items) >= cache_settings["items_max"]:
+                    del all_items[cache_settings["items_max"]:]
+                    stop_item_scrolling.set()
+                elif not data.get('data', {}).get('nextPage', True):
                     stop_item_scrolling.set()
             except Exception as e:
                 stop_item_scrolling.set()
@@ -135,21 +451,39 @@ async def scrape_user_profile(context, user_id: str) -> dict:
         elif "mtop.idle.web.trade.rate.list" in response.url:
             try:
                 data = await response.json()
-                all_ratings.extend(data.get('data', {}).get('cardList', []))
-                print(f"      [API捕获] 评价列表... 当前已捕获 {len(all_ratings)} 条")
-                if not data.get('data', {}).get('nextPage', True):
+                reached_known = await rating_collector.add_cards(data.get('data', {}).get('cardList', []))
+                print(f"      [API捕获] 评价列表... 当前已统计 {rating_collector.seen} 条新评价")
+                if reached_known:
+                    print("      [增量同步] 已遇到上次同步过的评价，停止滚动。")
+                    stop_rating_scrolling.set()
+                elif not data.get('data', {}).get('nextPage', True):
+                    ratings_complete = True
                     stop_rating_scrolling.set()
             except Exception as e:
                 stop_rating_scrolling.set()
 
-    page.on("response", handle_response)
+    pool = page_pool or PagePool(context, max_idle=1)
+    page = await pool.acquire({"response": handle_response})
 
     try:
         # --- 任务1: 导航并采集头部信息 ---
-        await page.goto(f"https://www.goofish.com/personal?userId={user_id}", wait_until="domcontentloaded", timeout=20000)
+        await pool.goto(page, f"https://www.goofish.com/personal?userId={user_id}", wait_until="domcontentloaded", timeout=20000)
         head_data = await asyncio.wait_for(head_api_future, timeout=15)
         profile_data = await parse_user_head_data(head_data)
 
+        rating_count = normalize_rating_count(profile_data.get("卖家收到的评价总数"))
+        if (
+            cached
+            and cache_settings["refresh_by_rating_count"]
+            and cached.age < cache_settings["max_age"]
+            and rating_count is not None
+            and rating_count == cached.rating_count
+        ):
+            print(f"   -> 卖家 {user_id} 评价总数未变化 ({rating_count})，沿用缓存的商品列表与信用统计。")
+            profile_data = {**cached.profile, **profile_data}
+            seller_cache.put(user_id, profile_data)
+            return profile_data
+
         # --- 任务2: 滚动加载所有商品 (默认页面) ---
         print("      [采集阶段] 开始采集该用户的商品列表...")
         await random_sleep(2, 4) # 等待第一页商品API完成
@@ -177,22 +511,119 @@ async def scrape_user_profile(context, user_id: str) -> dict:
                     print("      [滚动超时] 评价列表可能已加载完毕。")
                     break
 
-            profile_data['卖家收到的评价列表'] = await parse_ratings_data(all_ratings)
-            reputation_stats = await calculate_reputation_from_ratings(all_ratings)
-            profile_data.update(reputation_stats)
+            profile_data['卖家收到的评价列表'] = rating_collector.ratings(ratings_complete)
+            rating_tally = rating_collector.tally(ratings_complete)
+            profile_data.update(rating_tally.to_stats())
+            # 滚动超时时既没遇到上次同步的评价也没到底，本次统计不完整，保留上次的同步进度
+            if incremental_ratings and (rating_collector.reached_known or ratings_complete):
+                seller_cache.save_rating_state(user_id, RatingSyncState(
+                    newest_rate_id=rating_collector.latest_rate_id(),
+                    tally=rating_tally,
+                    recent_ratings=profile_data['卖家收到的评价列表'],
+                ))
         else:
             print("      [警告] 未找到评价选项卡，跳过评价采集。")
+        profile_complete = True
 
     except Exception as e:
         print(f"   [错误] 采集用户 {user_id} 信息时发生错误: {e}")
     finally:
-        page.remove_listener("response", handle_response)
-        await page.close()
+        await pool.release(page)
+        if page_pool is None:
+            await pool.close()
         print(f"   -> 用户 {user_id} 信息采集完成。")
 
+    # 只缓存完整采集的结果，避免把中途失败的半成品当作有效缓存
+    if seller_cache and profile_complete:
+        seller_cache.put(user_id, profile_data)
     return profile_data
 
 
+async def _check_detail_risk(detail_json: dict) -> None:
+    """详情接口返回风控验证时，长时间休眠后抛出 RiskControlError。"""
+    ret_string = str(await safe_get(detail_json, 'ret', default=[]))
+    if "FAIL_SYS_USER_VALIDATE" in ret_string:
+        print("\n==================== CRITICAL BLOCK DETECTED ====================")
+        print("检测到闲鱼反爬虫验证 (FAIL_SYS_USER_VALIDATE)，程序将终止。")
+        long_sleep_duration = random.randint(3, 60)
+        print(f"为避免账户风险，将执行一次长时间休眠 ({long_sleep_duration} 秒) 后再退出...")
+        await asyncio.sleep(long_sleep_duration)
+        print("长时间休眠结束，现在将安全退出。")
+        print("===================================================================")
+        raise RiskControlError("FAIL_SYS_USER_VALIDATE")
+
+
+async def _apply_item_detail(page_pool: PagePool, item_data: dict, detail_json: dict,
+                             seller_cache_settings: Optional[dict] = None) -> dict:
+    """用商品详情数据补全 item_data，并采集卖家信息，返回卖家信息字典。"""
+    item_do = await safe_get(detail_json, 'data', 'itemDO', default={})
+    seller_do = await safe_get(detail_json, 'data', 'sellerDO', default={})
+
+    reg_days_raw = await safe_get(seller_do, 'userRegDay', default=0)
+    registration_duration_text = format_registration_days(reg_days_raw)
+
+    # 1. 提取卖家的芝麻信用信息
+    zhima_credit_text = await safe_get(seller_do, 'zhimaLevelInfo', 'levelName')
+
+    # 2. 提取该商品的完整图片列表
+    image_infos = await safe_get(item_do, 'imageInfos', default=[])
+    if image_infos:
+        # 使用列表推导式获取所有有效的图片URL
+        all_image_urls = [img.get('url') for img in image_infos if img.get('url')]
+        if all_image_urls:
+            # 用新的字段存储图片列表，替换掉旧的单个链接
+            item_data['商品图片列表'] = all_image_urls
+            # (可选) 仍然保留主图链接，以防万一
+            item_data['商品主图链接'] = all_image_urls[0]
+
+    item_data['“想要”人数'] = await safe_get(item_do, 'wantCnt', default=item_data.get('“想要”人数', 'NaN'))
+    item_data['浏览量'] = await safe_get(item_do, 'browseCnt', default='-')
+    # 搜索结果里没有描述，只能从详情中补全，预筛选的描述规则依赖该字段
+    item_data['商品描述'] = await safe_get(item_do, 'desc', default=item_data.get('商品描述', ''))
+    # ...[此处可添加更多从详情页解析出的商品信息]...
+
+    # 调用核心函数采集卖家信息
+    user_profile_data = {}
+    user_id = await safe_get(seller_do, 'sellerId')
+    if user_id:
+        user_profile_data = await scrape_user_profile(page_pool.context, str(user_id), seller_cache_settings, page_pool)
+    else:
+        print("   [警告] 未能从详情API中获取到卖家ID。")
+    user_profile_data['卖家芝麻信用'] = zhima_credit_text
+    user_profile_data['卖家注册时长'] = registration_duration_text
+    return user_profile_data
+
+
+def _notify_early(job: dict, recommended: bool, reason: str) -> None:
+    """流式分析中 is_recommended/reason 一到达就发送通知，不等模型写完其余分析。"""
+    if not recommended or job.get("notify_task"):
+        return
+    log_time("商品被AI推荐（流式结论），提前发送通知...")
+    job["notify_task"] = asyncio.create_task(
+        send_ntfy_notification(job["record"]["商品信息"], reason or "无")
+    )
+
+
+async def _send_verdict_notification(job: dict) -> None:
+    """
+    按最终结论发送推荐通知。
+    提前推送的流式结论可能来自随后被重试丢弃的响应，最终结论不是推荐时补发一条更正通知。
+    """
+    item_data = job["record"]["商品信息"]
+    ai_analysis_result = job.get("ai_result")
+    recommended = bool(ai_analysis_result and ai_analysis_result.get('is_recommended'))
+    if job.get("notify_task"):
+        # 已在流式解析时提前发送
+        await asyncio.gather(job["notify_task"], return_exceptions=True)
+        if not recommended:
+            reason = ai_analysis_result.get("reason", "无") if ai_analysis_result else "AI分析未得到有效结论"
+            log_time("最终结论与提前推送的流式结论不一致，发送更正通知...")
+            await send_ntfy_notification(item_data, f"【更正】此前的推荐通知作废，最终结论为不推荐: {reason}")
+    elif recommended:
+        log_time("商品被AI推荐，准备发送通知...")
+        await send_ntfy_notification(item_data, ai_analysis_result.get("reason", "无"))
+
+
 async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
     """
     【核心执行器】
@@ -205,26 +636,236 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
     max_price = task_config.get('max_price')
     ai_prompt_text = task_config.get('ai_prompt_text', '')
     max_items_per_round = task_config.get('max_items_per_round', 2)
+    filter_mode = resolve_filter_mode(task_config, os.getenv("SEARCH_FILTER_MODE"))
+    scrape_mode = _resolve_scrape_mode(task_config)
+    resource_policy = _get_resource_policy(task_config)
+    seller_cache_settings = _get_seller_cache_settings(task_config)
+    pacing_profile = resolve_pacing_profile(task_config, os.getenv("PACING_PROFILE"))
+    registry_settings = _get_item_registry_settings(task_config)
+    item_registry = get_item_registry() if registry_settings["enabled"] else None
+    current_prompt_hash = prompt_hash(ai_prompt_text)
+    ai_cache_settings = _get_ai_cache_settings(task_config)
+    compaction_settings = _get_prompt_compaction_settings(task_config)
+    try:
+        prefilter = Prefilter.from_config(task_config.get("prefilter"))
+    except (re.error, TypeError, ValueError) as e:
+        print(f"LOG: 任务的 prefilter 配置无效，已跳过预筛选: {e}")
+        prefilter = None
+    prefilter_hits = {}
+    cascade_settings = _get_cascade_settings(task_config)
+    cascade_stats = CascadeStats()
+    batch_settings = _get_batch_settings(task_config)
+    stream_responses = _as_bool(task_config.get("ai_streaming"), _as_bool(os.getenv("AI_STREAM_RESPONSES"), False))
+    ai_batcher = None
+    if batch_settings.enabled and ai_prompt_text:
+        # 批量请求只发送文本；需要附加图片时仍逐个分析
+        if ai_analysis_uses_images():
+            print("LOG: 已启用 AI_SEND_IMAGES，批量分析仅支持纯文本，继续逐个分析。")
+        else:
+            ai_batcher = AIBatcher(
+                lambda records: get_ai_batch_analysis(
+                    records, ai_prompt_text, compaction_settings, batch_settings.tokens_per_item
+                ),
+                max_items=batch_settings.max_items,
+                max_wait=batch_settings.max_wait,
+            )
+    ai_cache = get_ai_verdict_cache() if ai_cache_settings["enabled"] and ai_prompt_text else None
+    if ai_cache:
+        ai_cache.purge_older_than(ai_cache_settings["ttl"])
+    if seller_cache_settings["enabled"]:
+        purged = get_seller_cache().purge_older_than(seller_cache_settings["max_age"])
+        if purged:
+            print(f"LOG: 已清理 {purged} 条过期的卖家缓存。")
+
+    # 打开持久化的去重索引（索引缺失时会自动从 JSONL 结果文件重建）
+    processed_links = open_item_index(keyword)
+    print(f"LOG: 已加载去重索引，已记录 {len(processed_links)} 个已处理过的商品。")
+
+    task_name = task_config.get('task_name', 'Untitled Task')
+    # 已提交到流水线、但尚未写入结果文件的商品，避免同一轮中重复抓取
+    pending_links = set()
+
+    async def _analysis_stage(job: dict) -> dict:
+        """流水线阶段1：下载图片并进行AI分析。任何失败都记录到 ai_analysis 中，商品仍交给保存阶段。"""
+        if job.get("skip_ai"):
+            return job
+        try:
+            return await _analyze_item(job)
+        except Exception as e:
+            # 预筛选规则、登记表或缓存出错时同样按分析失败处理，否则商品既不会保存，也会一直留在 pending_links 中
+            item_id = job["record"]["商品信息"].get("商品ID", "N/A")
+            print(f"   -> 商品 #{item_id} 分析阶段发生错误: {type(e).__name__}: {e}")
+            job["record"]['ai_analysis'] = {'error': f"{type(e).__name__}: {e}"}
+            job["ai_result"] = None
+            return job
+
+    async def _analyze_item(job: dict) -> dict:
+        final_record = job["record"]
+        item_data = final_record["商品信息"]
+
+        # 规则预筛选：明显不符合要求的商品不下载图片、也不请求AI
+        if prefilter:
+            rejection = prefilter.evaluate(item_data, final_record.get("卖家信息"))
+            if rejection:
+                prefilter_hits[rejection.rule] = prefilter_hits.get(rejection.rule, 0) + 1
+                final_record['ai_analysis'] = rejection.to_analysis()
+                log_time(f"商品 #{item_data['商品ID']} 未通过预筛选 [{rejection.rule}]: {rejection.detail}")
+                job["ai_result"] = final_record['ai_analysis']
+                return job
+
+        # 其他任务已用同一份 prompt 分析过该商品且售价未变，直接复用结论
+        registry_entry = job.get("registry_entry")
+        if registry_entry and ai_prompt_text:
+            reused = registry_entry.reusable_analysis(
+                current_prompt_hash, item_data.get('当前售价'), registry_settings["analysis_ttl"]
+            )
+            if reused:
+                reused['reused_from_registry'] = True
+                final_record['ai_analysis'] = reused
+                log_time(f"商品 #{item_data['商品ID']} 复用其他任务的AI分析结果。推荐状态: {reused.get('is_recommended')}")
+                job["ai_result"] = reused
+                return job
+
+        # 内容相同的商品（重新上架、擦亮）已用同一 prompt 和模型分析过，直接复用缓存结论
+        cache_key = None
+        if ai_cache:
+            cache_key = verdict_cache_key(
+                record_content_hash(final_record, include_images=ai_analysis_uses_images()),
+                current_prompt_hash,
+                MODEL_NAME,
+            )
+            cached = ai_cache.get(cache_key, ai_cache_settings["ttl"])
+            if cached:
+                final_record['ai_analysis'] = cached
+                log_time(f"商品 #{item_data['商品ID']} 命中AI结论缓存。推荐状态: {cached.get('is_recommended')}")
+                item_key = registry_key(item_data)
+                if item_registry and item_key:
+                    item_registry.record_analysis(item_key, current_prompt_hash, item_data.get('当前售价'), cached)
+                job["ai_result"] = cached
+                return job
+
+        # 级联模式：先用初筛模型快速排除明显不合格的商品，只有候选商品才进行完整分析
+        if cascade_settings.enabled and ai_prompt_text:
+            started = time.monotonic()
+            triage = await get_ai_triage(final_record, ai_prompt_text, cascade_settings)
+            passed = triage is None or triage[0] >= cascade_settings.threshold
+            cascade_stats.record_triage(time.monotonic() - started, passed, failed=triage is None)
+            if not passed:
+                score, reason = triage
+                rejected = triage_rejection(score, reason, cascade_settings, cascade_settings.triage_model)
+                final_record['ai_analysis'] = rejected
+                log_time(f"商品 #{item_data['商品ID']} 初筛未通过 (分数 {score:.2f} < {cascade_settings.threshold:.2f}): {reason}")
+                job["ai_result"] = rejected
+                return job
+            if triage:
+                log_time(f"商品 #{item_data['商品ID']} 通过初筛 (分数 {triage[0]:.2f})，进行完整分析。")
+
+        log_time(f"开始对商品 #{item_data['商品ID']} 进行实时AI分析...")
+        # 1. 图片按需下载：只有分析后端确实要附加图片时才会调用
+        async def _load_images() -> list:
+            return await download_all_images(
+                item_data['商品ID'],
+                item_data.get('商品图片列表', []),
+                task_config.get('task_name', 'default')
+            )
 
-    processed_links = set()
-    output_filename = os.path.join("jsonl", f"{keyword.replace(' ', '_')}_full_data.jsonl")
-    if os.path.exists(output_filename):
-        print(f"LOG: 发现已存在文件 {output_filename}，正在加载历史记录以去重...")
+        # 2. Get AI analysis
+        ai_analysis_result = None
+        if ai_prompt_text:
+            try:
+                # 注意：这里我们将整个记录传给AI，让它拥有最全的上下文
+                started = time.monotonic()
+                if ai_batcher:
+                    ai_analysis_result = await ai_batcher.submit(final_record)
+                    if ai_analysis_result is None:
+                        log_time(f"商品 #{item_data['商品ID']} 未在批量结果中获得有效结论，单独分析...")
+                if ai_analysis_result is None:
+                    ai_analysis_result = await get_ai_analysis(
+                        final_record,
+                        prompt_text=ai_prompt_text,
+                        image_loader=_load_images,
+                        compaction=compaction_settings,
+                        stream=stream_responses,
+                        on_verdict=(lambda recommended, reason: _notify_early(job, recommended, reason))
+                        if stream_responses else None,
+                    )
+                cascade_stats.record_full(time.monotonic() - started)
+                if ai_analysis_result:
+                    ai_analysis_result['prompt_hash'] = current_prompt_hash
+                    final_record['ai_analysis'] = ai_analysis_result
+                    log_time(f"AI分析完成。推荐状态: {ai_analysis_result.get('is_recommended')}")
+                    item_key = registry_key(item_data)
+                    if item_registry and item_key:
+                        item_registry.record_analysis(
+                            item_key, current_prompt_hash, item_data.get('当前售价'), ai_analysis_result
+                        )
+                    if ai_cache and cache_key:
+                        ai_cache.put(cache_key, current_prompt_hash, MODEL_NAME, ai_analysis_result)
+                else:
+                    final_record['ai_analysis'] = {
+                        'error': 'AI analysis returned None after retries.'
+                    }
+            except Exception as e:
+                print(f"   -> AI分析过程中发生严重错误: {e}")
+                final_record['ai_analysis'] = {'error': str(e)}
+        else:
+            print("   -> 任务未配置AI prompt，跳过分析。")
+
+        job["ai_result"] = ai_analysis_result
+        return job
+
+    async def _submit_item(item_data: dict, user_profile_data: dict, registry_entry=None) -> None:
+        """构建基础记录并提交到流水线，AI 分析、通知与保存异步进行，浏览器继续按节奏处理下一个商品。"""
+        final_record = {
+            "爬取时间": datetime.now().isoformat(),
+            "搜索关键字": keyword,
+            "任务名称": task_config.get('task_name', 'Untitled Task'),
+            "商品信息": item_data,
+            "卖家信息": user_profile_data
+        }
+        pending_links.add(item_data["商品链接"])
+        await pipeline.submit({"record": final_record, "skip_ai": False, "registry_entry": registry_entry})
+
+    async def _output_stage(job: dict) -> None:
+        """流水线阶段2：发送通知并保存完整记录。"""
+        final_record = job["record"]
+        item_data = final_record["商品信息"]
         try:
-            with open(output_filename, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        record = json.loads(line)
-                        link = record.get('商品信息', {}).get('商品链接', '')
-                        if link:
-                            processed_links.add(get_link_unique_key(link))
-                    except json.JSONDecodeError:
-                        print(f"   [警告] 文件中有一行无法解析为JSON，已跳过。")
-            print(f"LOG: 加载完成，已记录 {len(processed_links)} 个已处理过的商品。")
-        except IOError as e:
-            print(f"   [警告] 读取历史文件时发生错误: {e}")
-    else:
-        print(f"LOG: 输出文件 {output_filename} 不存在，将创建新文件。")
+            if job.get("skip_ai"):
+                # 保存记录
+                await save_to_jsonl(final_record, keyword)
+                # 直接推送通知（不经过AI筛选）
+                await send_ntfy_notification(item_data, "新商品（未经过AI分析）")
+                return None
+
+            # 3. Send notification if recommended
+            await _send_verdict_notification(job)
+
+            # 4. 保存包含AI结果的完整记录
+            await save_to_jsonl(final_record, keyword)
+            log_time(f"商品 #{item_data['商品ID']} 处理流程完毕。")
+        finally:
+            pending_links.discard(item_data["商品链接"])
+        return None
+
+    # 增量爬取：记录上次运行看到的最新发布时间，整页都是旧商品时提前停止翻页
+    incremental_settings = _get_incremental_settings(task_config)
+    high_water_mark = load_high_water_mark(task_name) if incremental_settings["enabled"] else None
+    newest_publish_time = high_water_mark
+    if high_water_mark:
+        print(f"LOG: 增量爬取已启用，上次运行的发布时间高水位线: {high_water_mark.strftime('%Y-%m-%d %H:%M')}")
+
+    pipeline_settings = _get_pipeline_settings(task_config)
+    # 批量模式下每个等待中的商品都占用一个分析 worker，worker 数至少要能凑满一批
+    analysis_workers = max(pipeline_settings["ai_workers"], batch_settings.max_items if ai_batcher else 0)
+    pipeline = StagePipeline(
+        [
+            Stage("AI分析", _analysis_stage, workers=analysis_workers, queue_size=pipeline_settings["queue_size"]),
+            Stage("通知与保存", _output_stage, workers=1, queue_size=pipeline_settings["queue_size"]),
+        ],
+        name=f"任务 '{task_name}'",
+    )
+    await pipeline.start()
 
     rotation_settings = _get_rotation_settings(task_config)
     forced_account = task_config.get("account_state_file") or None
@@ -267,51 +908,31 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
         return picked or selected_proxy
 
     async def _run_scrape_attempt(state_file: str, proxy_server: Optional[str]) -> int:
+        nonlocal newest_publish_time
         processed_item_count = 0
         stop_scraping = False
+        pacer = AccountPacer(account_key_for(state_file), pacing_profile)
 
         if not os.path.exists(state_file):
             raise FileNotFoundError(f"登录状态文件不存在: {state_file}")
 
-        async with async_playwright() as p:
-            # 反检测启动参数
-            launch_args = [
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process'
-            ]
-
-            launch_kwargs = {"headless": RUN_HEADLESS, "args": launch_args}
-            if proxy_server:
-                launch_kwargs["proxy"] = {"server": proxy_server}
-
-            if LOGIN_IS_EDGE:
-                launch_kwargs["channel"] = "msedge"
-            else:
-                if not RUNNING_IN_DOCKER:
-                    launch_kwargs["channel"] = "chrome"
-
-            browser = await p.chromium.launch(**launch_kwargs)
-
-            # 使用移动设备模拟（与真实Chrome移动模式一致）
-            # 基于HAR分析：真实浏览器使用Android移动设备模拟
-            context = await browser.new_context(
-                storage_state=state_file,
-                user_agent="Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Mobile Safari/537.36",
-                viewport={'width': 412, 'height': 915},  # Pixel 5尺寸
-                device_scale_factor=2.625,
-                is_mobile=True,
-                has_touch=True,
-                locale='zh-CN',
-                timezone_id='Asia/Shanghai',
-                permissions=['geolocation'],
-                geolocation={'longitude': 121.4737, 'latitude': 31.2304},
-                color_scheme='light'
-            )
-
+        # 从共享浏览器池中获取浏览器，只为本次尝试创建独立的上下文
+        # 使用移动设备模拟（与真实Chrome移动模式一致）
+        # 基于HAR分析：真实浏览器使用Android移动设备模拟
+        async with get_browser_pool().context(
+            proxy_server,
+            storage_state=state_file,
+            user_agent="Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Mobile Safari/537.36",
+            viewport={'width': 412, 'height': 915},  # Pixel 5尺寸
+            device_scale_factor=2.625,
+            is_mobile=True,
+            has_touch=True,
+            locale='zh-CN',
+            timezone_id='Asia/Shanghai',
+            permissions=['geolocation'],
+            geolocation={'longitude': 121.4737, 'latitude': 31.2304},
+            color_scheme='light'
+        ) as context:
             # 增强反检测脚本（模拟真实移动设备）
             await context.add_init_script("""
                 // 移除webdriver标识
@@ -335,6 +956,10 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                         originalQuery(parameters)
                 );
             """)
+            # 拦截图片/视频/字体与无关脚本，只保留读取接口 JSON 所需的请求
+            resource_stats = await install_resource_policy(context, resource_policy)
+            # 详情页与卖家主页在池中复用，避免每个商品都新建、销毁渲染进程中的页面
+            page_pool = PagePool(context, max_idle=_as_int(os.getenv("PAGE_POOL_SIZE"), 2))
 
             page = await context.new_page()
 
@@ -349,114 +974,20 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                 await page.evaluate("window.scrollBy(0, Math.random() * 500 + 200)")
                 await random_sleep(1, 2)
 
-                log_time("步骤 1 - 导航到搜索结果页...")
-                # 使用 'q' 参数构建正确的搜索URL，并进行URL编码
-                params = {'q': keyword}
-                search_url = f"https://www.goofish.com/search?{urlencode(params)}"
-                log_time(f"目标URL: {search_url}")
-
-                # 使用 expect_response 在导航的同时捕获初始搜索的API数据
-                async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=30000) as response_info:
-                    await page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
-
-                initial_response = await response_info.value
-
-                # 等待页面加载出关键筛选元素，以确认已成功进入搜索结果页
-                await page.wait_for_selector('text=新发布', timeout=15000)
-
-                # 模拟真实用户行为：页面加载后的初始停留和浏览
-                log_time("[反爬] 模拟用户查看页面...")
-                await random_sleep(5, 10)
-
-                # --- 新增：检查是否存在验证弹窗 ---
-                baxia_dialog = page.locator("div.baxia-dialog-mask")
-                middleware_widget = page.locator("div.J_MIDDLEWARE_FRAME_WIDGET")
-                try:
-                    # 等待弹窗在2秒内出现。如果出现，则执行块内代码。
-                    await baxia_dialog.wait_for(state='visible', timeout=2000)
-                    print("\n==================== CRITICAL BLOCK DETECTED ====================")
-                    print("检测到闲鱼反爬虫验证弹窗 (baxia-dialog)，无法继续操作。")
-                    print("这通常是因为操作过于频繁或被识别为机器人。")
-                    print("建议：")
-                    print("1. 停止脚本一段时间再试。")
-                    print("2. (推荐) 在 .env 文件中设置 RUN_HEADLESS=false，以非无头模式运行，这有助于绕过检测。")
-                    print(f"任务 '{keyword}' 将在此处中止。")
-                    print("===================================================================")
-                    raise RiskControlError("baxia-dialog")
-                except PlaywrightTimeoutError:
-                    # 2秒内弹窗未出现，这是正常情况，继续执行
-                    pass
-
-                # 检查是否有J_MIDDLEWARE_FRAME_WIDGET覆盖层
-                try:
-                    await middleware_widget.wait_for(state='visible', timeout=2000)
-                    print("\n==================== CRITICAL BLOCK DETECTED ====================")
-                    print("检测到闲鱼反爬虫验证弹窗 (J_MIDDLEWARE_FRAME_WIDGET)，无法继续操作。")
-                    print("这通常是因为操作过于频繁或被识别为机器人。")
-                    print("建议：")
-                    print("1. 停止脚本一段时间再试。")
-                    print("2. (推荐) 更新登录状态文件，确保登录状态有效。")
-                    print("3. 降低任务执行频率，避免被识别为机器人。")
-                    print(f"任务 '{keyword}' 将在此处中止。")
-                    print("===================================================================")
-                    raise RiskControlError("J_MIDDLEWARE_FRAME_WIDGET")
-                except PlaywrightTimeoutError:
-                    # 2秒内弹窗未出现，这是正常情况，继续执行
-                    pass
-                # --- 结束新增 ---
-
-                try:
-                    await page.click("div[class*='closeIconBg']", timeout=3000)
-                    print("LOG: 已关闭广告弹窗。")
-                except PlaywrightTimeoutError:
-                    print("LOG: 未检测到广告弹窗。")
-
-                final_response = None
-                log_time("步骤 2 - 应用筛选条件...")
-                await page.click('text=新发布')
-                await random_sleep(2, 4) # 原来是 (1.5, 2.5)
-                async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=20000) as response_info:
-                    await page.click('text=最新')
-                    # --- 修改: 增加排序后的等待时间 ---
-                    await random_sleep(4, 7) # 原来是 (3, 5)
-                final_response = await response_info.value
-
-                if personal_only:
-                    async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=20000) as response_info:
-                        await page.click('text=个人闲置')
-                        # --- 修改: 将固定等待改为随机等待，并加长 ---
-                        await random_sleep(4, 6) # 原来是 asyncio.sleep(5)
-                    final_response = await response_info.value
-
-                if min_price or max_price:
-                    price_container = page.locator('div[class*="search-price-input-container"]').first
-                    if await price_container.is_visible():
-                        if min_price:
-                            await price_container.get_by_placeholder("¥").first.fill(min_price)
-                            # --- 修改: 将固定等待改为随机等待 ---
-                            await random_sleep(1, 2.5) # 原来是 asyncio.sleep(5)
-                        if max_price:
-                            await price_container.get_by_placeholder("¥").nth(1).fill(max_price)
-                            # --- 修改: 将固定等待改为随机等待 ---
-                            await random_sleep(1, 2.5) # 原来是 asyncio.sleep(5)
-
-                        async with page.expect_response(lambda r: API_URL_PATTERN in r.url, timeout=20000) as response_info:
-                            await page.keyboard.press('Tab')
-                            # --- 修改: 增加确认价格后的等待时间 ---
-                            await random_sleep(4, 7) # 原来是 asyncio.sleep(5)
-                        final_response = await response_info.value
-                    else:
-                        print("LOG: 警告 - 未找到价格输入容器。")
+                mtop_client = MtopClient(context) if scrape_mode == "api" else None
+                current_response = None
+                if mtop_client:
+                    log_time("步骤 1 - API 模式：直接调用搜索接口，跳过搜索页渲染与UI筛选。")
+                else:
+                    current_response = await _open_search_results(page, keyword, filter_mode, personal_only, min_price, max_price)
 
                 log_time("所有筛选已完成，开始处理商品列表...")
-
-                current_response = final_response if final_response and final_response.ok else initial_response
                 for page_num in range(1, max_pages + 1):
                     if stop_scraping:
                         break
                     log_time(f"开始处理第 {page_num}/{max_pages} 页 ...")
 
-                    if page_num > 1:
+                    if page_num > 1 and not mtop_client:
                         # 查找未被禁用的“下一页”按钮。闲鱼通过添加 'disabled' 类名来禁用按钮，而不是使用 disabled 属性。
                         next_btn = page.locator("[class*='search-pagination-arrow-right']:not([class*='disabled'])")
                         if not await next_btn.count():
@@ -472,13 +1003,37 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                             log_time(f"翻页到第 {page_num} 页超时，停止翻页。")
                             break
 
-                    if not (current_response and current_response.ok):
-                        log_time(f"第 {page_num} 页响应无效，跳过。")
-                        continue
+                    if mtop_client:
+                        if page_num > 1:
+                            await random_sleep(5, 8)
+                        try:
+                            search_json = await mtop_client.search(keyword, page_num, personal_only, min_price, max_price)
+                        except MtopError as e:
+                            if e.is_risk_control:
+                                raise RiskControlError("FAIL_SYS_USER_VALIDATE") from e
+                            log_time(f"第 {page_num} 页搜索接口调用失败，停止翻页: {e}")
+                            break
+                    else:
+                        if not (current_response and current_response.ok):
+                            log_time(f"第 {page_num} 页响应无效，跳过。")
+                            continue
+                        search_json = await current_response.json()
 
-                    basic_items = await _parse_search_results_json(await current_response.json(), f"第 {page_num} 页")
+                    basic_items = await _parse_search_results_json(search_json, f"第 {page_num} 页")
                     if not basic_items:
                         break
+
+                    for basic_item in basic_items:
+                        published = parse_publish_time(basic_item.get("发布时间"))
+                        if published and (newest_publish_time is None or published > newest_publish_time):
+                            newest_publish_time = published
+                    page_exhausted = incremental_settings["enabled"] and is_page_exhausted(
+                        basic_items,
+                        lambda item: item["商品链接"] in processed_links,
+                        high_water_mark,
+                        incremental_settings["stop_after_seen"],
+                    )
+
                     if max_items_per_round > 0:
                         basic_items = basic_items[:max_items_per_round]
 
@@ -489,8 +1044,8 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                             stop_scraping = True
                             break
 
-                        unique_key = get_link_unique_key(item_data["商品链接"])
-                        if unique_key in processed_links:
+                        item_link = item_data["商品链接"]
+                        if item_link in processed_links or item_link in pending_links:
                             log_time(f"[页内进度 {i}/{total_items_on_page}] 商品 '{item_data['商品标题'][:20]}...' 已存在，跳过。")
                             continue
 
@@ -508,172 +1063,96 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                                 # 保持与原有结构兼容，卖家信息留空对象，前端不会报错
                                 "卖家信息": {},
                             }
-                            # 保存记录
-                            await save_to_jsonl(final_record, keyword)
-                            # 直接推送通知（不经过AI筛选）
-                            await send_ntfy_notification(item_data, "新商品（未经过AI分析）")
-
-                            processed_links.add(unique_key)
+                            # 保存与推送交给流水线的输出阶段（不经过AI筛选）
+                            pending_links.add(item_link)
+                            await pipeline.submit({"record": final_record, "skip_ai": True})
                             processed_item_count += 1
-                            log_time(f"商品处理流程完毕（纯爬虫模式）。累计处理 {processed_item_count} 个新商品。")
+                            log_time(f"商品已提交处理（纯爬虫模式）。累计处理 {processed_item_count} 个新商品。")
                             # 仍然保持主要延迟，降低被风控概率
                             log_time("[反爬] 执行一次主要的随机延迟以模拟用户浏览间隔（纯爬虫模式）...")
-                            await random_sleep(15, 30)
+                            await pacer.pause("item")
+                            continue
+
+                        item_key = registry_key(item_data)
+                        registry_entry = item_registry.get(item_key) if item_registry and item_key else None
+                        if registry_entry and registry_entry.has_fresh_detail(registry_settings["detail_ttl"]):
+                            log_time(
+                                f"[页内进度 {i}/{total_items_on_page}] 商品已由其他任务获取过详情，复用详情与卖家信息: "
+                                f"{item_data['商品标题'][:30]}..."
+                            )
+                            item_data.update(registry_entry.detail)
+                            await _submit_item(item_data, registry_entry.seller or {}, registry_entry)
+                            processed_item_count += 1
+                            log_time(f"商品已提交到分析流水线。累计处理 {processed_item_count} 个新商品。")
                             continue
 
                         log_time(f"[页内进度 {i}/{total_items_on_page}] 发现新商品，获取详情: {item_data['商品标题'][:30]}...")
                         # --- 修改: 访问详情页前的等待时间，模拟用户在列表页上看了一会儿 ---
-                        await random_sleep(3, 6) # 原来是 (2, 4)
+                        await pacer.pause("detail")
 
-                        detail_page = await context.new_page()
+                        detail_page = None
                         try:
-                            async with detail_page.expect_response(lambda r: DETAIL_API_URL_PATTERN in r.url, timeout=25000) as detail_info:
-                                await detail_page.goto(item_data["商品链接"], wait_until="domcontentloaded", timeout=25000)
-
-                            detail_response = await detail_info.value
-                            if detail_response.ok:
+                            detail_json = None
+                            if mtop_client:
+                                try:
+                                    detail_json = await mtop_client.item_detail(item_data["商品ID"])
+                                except MtopError as e:
+                                    if e.is_risk_control:
+                                        detail_json = {"ret": e.ret}
+                                    else:
+                                        print(f"   [API模式] 详情接口调用失败，回退为打开详情页: {e}")
+
+                            if detail_json is None:
+                                detail_page = await page_pool.acquire()
+                                async with detail_page.expect_response(lambda r: DETAIL_API_URL_PATTERN in r.url, timeout=25000) as detail_info:
+                                    await page_pool.goto(detail_page, item_data["商品链接"], wait_until="domcontentloaded", timeout=25000)
+
+                                detail_response = await detail_info.value
+                                if not detail_response.ok:
+                                    print(f"   错误: 获取商品详情API响应失败，状态码: {detail_response.status}")
+                                    if AI_DEBUG_MODE:
+                                        print(f"--- [DETAIL DEBUG] FAILED RESPONSE from {item_data['商品链接']} ---")
+                                        try:
+                                            print(await detail_response.text())
+                                        except Exception as e:
+                                            print(f"无法读取响应内容: {e}")
+                                        print("----------------------------------------------------")
+                                    continue
                                 detail_json = await detail_response.json()
 
-                                ret_string = str(await safe_get(detail_json, 'ret', default=[]))
-                                if "FAIL_SYS_USER_VALIDATE" in ret_string:
-                                    print("\n==================== CRITICAL BLOCK DETECTED ====================")
-                                    print("检测到闲鱼反爬虫验证 (FAIL_SYS_USER_VALIDATE)，程序将终止。")
-                                    long_sleep_duration = random.randint(3, 60)
-                                    print(f"为避免账户风险，将执行一次长时间休眠 ({long_sleep_duration} 秒) 后再退出...")
-                                    await asyncio.sleep(long_sleep_duration)
-                                    print("长时间休眠结束，现在将安全退出。")
-                                    print("===================================================================")
-                                    raise RiskControlError("FAIL_SYS_USER_VALIDATE")
-
-                                # 解析商品详情数据并更新 item_data
-                                item_do = await safe_get(detail_json, 'data', 'itemDO', default={})
-                                seller_do = await safe_get(detail_json, 'data', 'sellerDO', default={})
-
-                                reg_days_raw = await safe_get(seller_do, 'userRegDay', default=0)
-                                registration_duration_text = format_registration_days(reg_days_raw)
-
-                                # --- START: 新增代码块 ---
-
-                                # 1. 提取卖家的芝麻信用信息
-                                zhima_credit_text = await safe_get(seller_do, 'zhimaLevelInfo', 'levelName')
-
-                                # 2. 提取该商品的完整图片列表
-                                image_infos = await safe_get(item_do, 'imageInfos', default=[])
-                                if image_infos:
-                                    # 使用列表推导式获取所有有效的图片URL
-                                    all_image_urls = [img.get('url') for img in image_infos if img.get('url')]
-                                    if all_image_urls:
-                                        # 用新的字段存储图片列表，替换掉旧的单个链接
-                                        item_data['商品图片列表'] = all_image_urls
-                                        # (可选) 仍然保留主图链接，以防万一
-                                        item_data['商品主图链接'] = all_image_urls[0]
-
-                                # --- END: 新增代码块 ---
-                                item_data['“想要”人数'] = await safe_get(item_do, 'wantCnt', default=item_data.get('“想要”人数', 'NaN'))
-                                item_data['浏览量'] = await safe_get(item_do, 'browseCnt', default='-')
-                                # ...[此处可添加更多从详情页解析出的商品信息]...
-
-                                # 调用核心函数采集卖家信息
-                                user_profile_data = {}
-                                user_id = await safe_get(seller_do, 'sellerId')
-                                if user_id:
-                                    # 新的、高效的调用方式:
-                                    user_profile_data = await scrape_user_profile(context, str(user_id))
-                                else:
-                                    print("   [警告] 未能从详情API中获取到卖家ID。")
-                                user_profile_data['卖家芝麻信用'] = zhima_credit_text
-                                user_profile_data['卖家注册时长'] = registration_duration_text
-
-                                # 构建基础记录
-                                final_record = {
-                                    "爬取时间": datetime.now().isoformat(),
-                                    "搜索关键字": keyword,
-                                    "任务名称": task_config.get('task_name', 'Untitled Task'),
-                                    "商品信息": item_data,
-                                    "卖家信息": user_profile_data
-                                }
-
-                                # --- START: Real-time AI Analysis & Notification ---
-                                log_time(f"开始对商品 #{item_data['商品ID']} 进行实时AI分析...")
-                                # 1. Download images
-                                image_urls = item_data.get('商品图片列表', [])
-                                downloaded_image_paths = await download_all_images(
-                                    item_data['商品ID'],
-                                    image_urls,
-                                    task_config.get('task_name', 'default')
-                                )
-
-                                # 2. Get AI analysis
-                                ai_analysis_result = None
-                                if ai_prompt_text:
-                                    try:
-                                        # 注意：这里我们将整个记录传给AI，让它拥有最全的上下文
-                                        ai_analysis_result = await get_ai_analysis(
-                                            final_record,
-                                            downloaded_image_paths,
-                                            prompt_text=ai_prompt_text
-                                        )
-                                        if ai_analysis_result:
-                                            final_record['ai_analysis'] = ai_analysis_result
-                                            log_time(f"AI分析完成。推荐状态: {ai_analysis_result.get('is_recommended')}")
-                                        else:
-                                            final_record['ai_analysis'] = {
-                                                'error': 'AI analysis returned None after retries.'
-                                            }
-                                    except Exception as e:
-                                        print(f"   -> AI分析过程中发生严重错误: {e}")
-                                        final_record['ai_analysis'] = {'error': str(e)}
-                                else:
-                                    print("   -> 任务未配置AI prompt，跳过分析。")
-
-                                # 删除下载的图片文件，节省空间
-                                for img_path in downloaded_image_paths:
-                                    try:
-                                        if os.path.exists(img_path):
-                                            os.remove(img_path)
-                                            print(f"   [图片] 已删除临时图片文件: {img_path}")
-                                    except Exception as e:
-                                        print(f"   [图片] 删除图片文件时出错: {e}")
-
-                                # 3. Send notification if recommended
-                                if ai_analysis_result and ai_analysis_result.get('is_recommended'):
-                                    log_time("商品被AI推荐，准备发送通知...")
-                                    await send_ntfy_notification(item_data, ai_analysis_result.get("reason", "无"))
-                                # --- END: Real-time AI Analysis & Notification ---
-
-                                # 4. 保存包含AI结果的完整记录
-                                await save_to_jsonl(final_record, keyword)
-
-                                processed_links.add(unique_key)
-                                processed_item_count += 1
-                                log_time(f"商品处理流程完毕。累计处理 {processed_item_count} 个新商品。")
-
-                                # --- 修改: 增加单个商品处理后的主要延迟 ---
-                                log_time("[反爬] 执行一次主要的随机延迟以模拟用户浏览间隔...")
-                                await random_sleep(15, 30) # 原来是 (8, 15)，这是最重要的修改之一
-                            else:
-                                print(f"   错误: 获取商品详情API响应失败，状态码: {detail_response.status}")
-                                if AI_DEBUG_MODE:
-                                    print(f"--- [DETAIL DEBUG] FAILED RESPONSE from {item_data['商品链接']} ---")
-                                    try:
-                                        print(await detail_response.text())
-                                    except Exception as e:
-                                        print(f"无法读取响应内容: {e}")
-                                    print("----------------------------------------------------")
+                            await _check_detail_risk(detail_json)
+                            user_profile_data = await _apply_item_detail(page_pool, item_data, detail_json, seller_cache_settings)
+                            if item_registry and item_key:
+                                item_registry.record_detail(item_key, item_data, user_profile_data)
+
+                            await _submit_item(item_data, user_profile_data, registry_entry)
+                            processed_item_count += 1
+                            log_time(f"商品已提交到分析流水线。累计处理 {processed_item_count} 个新商品。")
+
+                            # --- 修改: 增加单个商品处理后的主要延迟 ---
+                            log_time("[反爬] 执行一次主要的随机延迟以模拟用户浏览间隔...")
+                            await pacer.pause("item")
 
+                        except RiskControlError:
+                            raise
                         except PlaywrightTimeoutError:
                             print(f"   错误: 访问商品详情页或等待API响应超时。")
                         except Exception as e:
                             print(f"   错误: 处理商品详情时发生未知错误: {e}")
                         finally:
-                            await detail_page.close()
+                            if detail_page is not None:
+                                await page_pool.release(detail_page)
                             # --- 修改: 增加关闭页面后的短暂整理时间 ---
-                            await random_sleep(2, 4) # 原来是 (1, 2.5)
+                            await pacer.pause("after_detail")
+
+                    if page_exhausted and not stop_scraping and page_num < max_pages:
+                        log_time(f"[增量爬取] 第 {page_num} 页的商品均已处理且不晚于上次运行的高水位线，停止翻页。")
+                        stop_scraping = True
 
                     # --- 新增: 在处理完一页所有商品后，翻页前，增加一个更长的“休息”时间 ---
                     if not stop_scraping and page_num < max_pages:
                         print(f"--- 第 {page_num} 页处理完毕，准备翻页。执行一次页面间的长时休息... ---")
-                        await random_sleep(25, 50)
+                        await pacer.pause("page")
 
             except PlaywrightTimeoutError as e:
                 print(f"\n操作超时错误: 页面元素或网络响应未在规定时间内出现。\n{e}")
@@ -682,11 +1161,12 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                 print(f"\n爬取过程中发生未知错误: {e}")
                 raise
             finally:
-                log_time("任务执行完毕，浏览器将在5秒后自动关闭...")
-                await asyncio.sleep(5)
+                log_time(f"[流量统计] {resource_stats.format()}")
+                log_time(f"[页面池] {page_pool.stats.format()}")
+                await page_pool.close()
+                log_time("任务执行完毕，释放浏览器上下文（浏览器实例保留在池中复用）...")
                 if debug_limit:
                     input("按回车键关闭浏览器...")
-                await browser.close()
 
         return processed_item_count
 
@@ -723,12 +1203,15 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
         if rotation_settings["proxy_enabled"] and proxy_server:
             print(f"IP 轮换：使用代理 {proxy_server}")
 
+        account_pacer = AccountPacer(account_key_for(state_path), pacing_profile)
         try:
             processed_item_count += await _run_scrape_attempt(state_path, proxy_server)
+            await account_pacer.record_clean_run()
             break
         except RiskControlError as e:
             last_error = str(e)
             print(f"检测到风控或验证触发: {e}")
+            await account_pacer.record_risk()
             if attempt < attempt_limit:
                 print("将尝试轮换账号/IP 后重试...")
         except Exception as e:
@@ -737,7 +1220,22 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
             if attempt < attempt_limit:
                 print("将尝试轮换账号/IP 后重试...")
 
-    # 清理任务图片目录
+    # 等待流水线中尚未完成的AI分析、通知和保存全部结束
+    if ai_batcher:
+        await ai_batcher.close()
+    await pipeline.close()
+    if ai_batcher and ai_batcher.batches:
+        print(f"LOG: 批量分析共发送 {ai_batcher.batches} 次请求，覆盖 {ai_batcher.items} 个商品。")
+    if cascade_settings.enabled and cascade_stats.triaged:
+        print(f"LOG: AI级联分析统计: {cascade_stats.format()}")
+    if prefilter_hits:
+        summary = ", ".join(f"{rule} {count} 个" for rule, count in sorted(prefilter_hits.items()))
+        print(f"LOG: 预筛选共拦截 {sum(prefilter_hits.values())} 个商品（{summary}），未调用AI。")
+
+    if incremental_settings["enabled"] and newest_publish_time and newest_publish_time != high_water_mark:
+        save_high_water_mark(task_name, newest_publish_time)
+
+    # 清理旧版本遗留的任务图片目录（图片现已存放在共享缓存中）
     cleanup_task_images(task_config.get('task_name', 'default'))
 
     return processed_item_count
@@ -0,0 +1,119 @@
+"""
+搜索筛选条件编码
+将“最新发布”排序、个人闲置和价格区间直接写入搜索 API 请求参数，
+省去在页面上逐个点击筛选项并等待刷新的过程。
+"""
+import json
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from src.mtop import MTOP_APP_KEY, get_mtop_token, is_mtop_success, mtop_sign
+
+
+SEARCH_API_ROUTE = "**/h5/mtop.taobao.idlemtopsearch.pc.search/**"
+
+
+def _normalize_price(value) -> str:
+    if value is None:
+        return ""
+    text = str(value).strip()
+    return text if text.replace(".", "", 1).isdigit() else ""
+
+
+def build_search_filter(personal_only: bool, min_price=None, max_price=None) -> str:
+    """生成 propValueStr.searchFilter 字段，例如 "priceRange:100,500;quickFilter:filterPersonal;"。"""
+    parts = []
+    low, high = _normalize_price(min_price), _normalize_price(max_price)
+    if low or high:
+        parts.append(f"priceRange:{low or 0},{high};")
+    if personal_only:
+        parts.append("quickFilter:filterPersonal;")
+    return "".join(parts)
+
+
+def encode_search_filters(data: dict, personal_only: bool, min_price=None, max_price=None) -> dict:
+    """在搜索 API 的 data 参数中写入排序与筛选条件，返回新的 data 字典。"""
+    encoded = dict(data)
+    encoded["sortField"] = "create"
+    encoded["sortValue"] = "desc"
+
+    prop_value = encoded.get("propValueStr") or {}
+    if isinstance(prop_value, str):
+        try:
+            prop_value = json.loads(prop_value) if prop_value.strip() else {}
+        except json.JSONDecodeError:
+            prop_value = {}
+    prop_value = dict(prop_value)
+
+    search_filter = build_search_filter(personal_only, min_price, max_price)
+    if search_filter:
+        prop_value["searchFilter"] = search_filter
+        encoded["fromFilter"] = True
+    encoded["propValueStr"] = prop_value
+    return encoded
+
+
+class SearchFilterRoute:
+    """拦截页面发出的搜索 API 请求，写入筛选条件并重新签名。"""
+
+    def __init__(self, page, personal_only: bool, min_price=None, max_price=None):
+        self.page = page
+        self.personal_only = personal_only
+        self.min_price = min_price
+        self.max_price = max_price
+        self.rewritten = 0
+        self._installed = False
+
+    async def install(self) -> None:
+        await self.page.route(SEARCH_API_ROUTE, self._handle)
+        self._installed = True
+
+    async def uninstall(self) -> None:
+        if self._installed:
+            await self.page.unroute(SEARCH_API_ROUTE, self._handle)
+            self._installed = False
+
+    async def _handle(self, route) -> None:
+        request = route.request
+        try:
+            form = dict(parse_qsl(request.post_data or "", keep_blank_values=True))
+            if "data" not in form:
+                await route.continue_()
+                return
+
+            url_parts = list(urlparse(request.url))
+            query = dict(parse_qsl(url_parts[4], keep_blank_values=True))
+            token = get_mtop_token(await self.page.context.cookies())
+            if not token or "t" not in query:
+                await route.continue_()
+                return
+
+            data = encode_search_filters(json.loads(form["data"]), self.personal_only, self.min_price, self.max_price)
+            form["data"] = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            query["sign"] = mtop_sign(token, query["t"], query.get("appKey", MTOP_APP_KEY), form["data"])
+            url_parts[4] = urlencode(query)
+
+            self.rewritten += 1
+            await route.continue_(url=urlunparse(url_parts), post_data=urlencode(form))
+        except Exception as e:
+            print(f"   [筛选编码] 改写搜索请求失败，按原请求发送: {e}")
+            await route.continue_()
+
+
+async def is_search_response_accepted(response) -> bool:
+    """判断改写后的搜索请求是否被服务端接受。"""
+    if response is None or not response.ok:
+        return False
+    try:
+        payload = await response.json()
+    except Exception:
+        return False
+    if not is_mtop_success(payload):
+        return False
+    data = payload.get("data") or {}
+    return isinstance(data, dict) and "resultList" in data
+
+
+def resolve_filter_mode(task_config: dict, default: Optional[str] = None) -> str:
+    mode = (task_config.get("filter_mode") or default or "encoded").strip().lower()
+    return mode if mode in {"encoded", "click"} else "encoded"
@@ -0,0 +1,141 @@
+"""
+卖家信息持久化缓存
+按 sellerId 保存解析后的卖家头部信息、在售商品列表和信用统计，
+同一卖家在 TTL 内再次出现时（同一轮的多个商品或其他关键字任务）直接复用，不再打开主页滚动采集。
+"""
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from src.config import DATA_DIR
+from src.parsers import RatingTally
+from src.utils import open_sqlite
+
+
+SELLER_CACHE_PATH = os.path.join(DATA_DIR, "seller_cache.sqlite")
+
+
+@dataclass
+class CachedSeller:
+    seller_id: str
+    profile: dict
+    rating_count: Optional[str]
+    updated_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+
+@dataclass
+class RatingSyncState:
+    """卖家评价的增量同步进度：上次见到的最新 rateId、累计计数与保留的少量原始评价。"""
+    newest_rate_id: Optional[str]
+    tally: RatingTally
+    recent_ratings: list
+
+
+def normalize_rating_count(value) -> Optional[str]:
+    """头部接口中的评价总数可能是数字或字符串，统一为字符串便于比较。"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+class SellerCache:
+    """SQLite 存储的卖家信息缓存，WAL 模式下可被多个任务进程同时读写。"""
+
+    def __init__(self, path: str = SELLER_CACHE_PATH):
+        self.path = path
+        self._conn = open_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sellers ("
+            "seller_id TEXT PRIMARY KEY, profile TEXT NOT NULL, rating_count TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seller_ratings ("
+            "seller_id TEXT PRIMARY KEY, newest_rate_id TEXT, tally TEXT NOT NULL, "
+            "recent_ratings TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, seller_id: str) -> Optional[CachedSeller]:
+        row = self._conn.execute(
+            "SELECT profile, rating_count, updated_at FROM sellers WHERE seller_id = ?", (str(seller_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            profile = json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+        return CachedSeller(str(seller_id), profile, row[1], row[2])
+
+    def put(self, seller_id: str, profile: dict) -> None:
+        self._conn.execute(
+            "INSERT INTO sellers (seller_id, profile, rating_count, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(seller_id) DO UPDATE SET profile = excluded.profile, "
+            "rating_count = excluded.rating_count, updated_at = excluded.updated_at",
+            (
+                str(seller_id),
+                json.dumps(profile, ensure_ascii=False),
+                normalize_rating_count(profile.get("卖家收到的评价总数")),
+                time.time(),
+            ),
+        )
+        self._conn.commit()
+
+    def get_rating_state(self, seller_id: str) -> Optional[RatingSyncState]:
+        row = self._conn.execute(
+            "SELECT newest_rate_id, tally, recent_ratings FROM seller_ratings WHERE seller_id = ?", (str(seller_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return RatingSyncState(row[0], RatingTally(**json.loads(row[1])), json.loads(row[2]))
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    def save_rating_state(self, seller_id: str, state: RatingSyncState) -> None:
+        self._conn.execute(
+            "INSERT INTO seller_ratings (seller_id, newest_rate_id, tally, recent_ratings, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(seller_id) DO UPDATE SET "
+            "newest_rate_id = excluded.newest_rate_id, tally = excluded.tally, "
+            "recent_ratings = excluded.recent_ratings, updated_at = excluded.updated_at",
+            (
+                str(seller_id),
+                state.newest_rate_id,
+                json.dumps(asdict(state.tally)),
+                json.dumps(state.recent_ratings, ensure_ascii=False),
+                time.time(),
+            ),
+        )
+        self._conn.commit()
+
+    def delete(self, seller_id: str) -> None:
+        self._conn.execute("DELETE FROM sellers WHERE seller_id = ?", (str(seller_id),))
+        self._conn.execute("DELETE FROM seller_ratings WHERE seller_id = ?", (str(seller_id),))
+        self._conn.commit()
+
+    def purge_older_than(self, max_age_seconds: float) -> int:
+        cursor = self._conn.execute("DELETE FROM sellers WHERE updated_at < ?", (time.time() - max_age_seconds,))
+        self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_seller_cache: Optional[SellerCache] = None
+
+
+def get_seller_cache() -> SellerCache:
+    global _seller_cache
+    if _seller_cache is None:
+        _seller_cache = SellerCache()
+    return _seller_cache
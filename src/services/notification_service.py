@@ -3,8 +3,17 @@
 统一管理所有通知渠道
 """
 import asyncio
-from typing import Dict, List
-from src.infrastructure.external.notification_clients.base import NotificationClient
+from typing import Dict, List, Optional
+from src.infrastructure.config.settings import notification_settings
+from src.infrastructure.external.notification_clients import (
+    BarkClient,
+    GotifyClient,
+    NotificationClient,
+    NtfyClient,
+    TelegramClient,
+    WebhookClient,
+    WeComClient,
+)
 
 
 class NotificationService:
@@ -13,6 +22,27 @@ class NotificationService:
     def __init__(self, clients: List[NotificationClient]):
         self.clients = [client for client in clients if client.is_enabled()]
 
+    @classmethod
+    def from_settings(cls, settings) -> "NotificationService":
+        """按 NotificationSettings 创建包含全部已配置渠道的通知服务"""
+        common = {"pcurl_to_mobile": settings.pcurl_to_mobile}
+        return cls([
+            NtfyClient(settings.ntfy_topic_url, **common),
+            GotifyClient(settings.gotify_url, settings.gotify_token, **common),
+            BarkClient(settings.bark_url, **common),
+            WeComClient(settings.wx_bot_url, **common),
+            TelegramClient(settings.telegram_bot_token, settings.telegram_chat_id, **common),
+            WebhookClient(
+                settings.webhook_url,
+                method=settings.webhook_method,
+                headers=settings.webhook_headers,
+                content_type=settings.webhook_content_type,
+                query_parameters=settings.webhook_query_parameters,
+                body=settings.webhook_body,
+                **common,
+            ),
+        ])
+
     async def send_notification(self, product_data: Dict, reason: str) -> Dict[str, bool]:
         """
         发送通知到所有启用的渠道
@@ -28,7 +58,7 @@ class NotificationService:
             print("警告：未配置任何通知服务")
             return {}
 
-        # 并发发送到所有渠道
+        # 并发发送到所有渠道，每个渠道各自超时和重试，总耗时取决于最慢的渠道
         tasks = [client.send(product_data, reason) for client in self.clients]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -39,3 +69,14 @@ class NotificationService:
             result_dict[client_name] = result if not isinstance(result, Exception) else False
 
         return result_dict
+
+
+_notification_service: Optional[NotificationService] = None
+
+
+def get_notification_service() -> NotificationService:
+    """爬虫进程内共享的通知服务（按启动时的通知配置创建）"""
+    global _notification_service
+    if _notification_service is None:
+        _notification_service = NotificationService.from_settings(notification_settings)
+    return _notification_service
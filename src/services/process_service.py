@@ -7,8 +7,8 @@ import sys
 import os
 import signal
 from datetime import datetime
-from typing import Dict
-from src.utils import build_task_log_path
+from typing import Dict, Optional
+from src.utils import build_task_log_path, sanitize_filename
 
 
 class ProcessService:
@@ -17,6 +17,8 @@ class ProcessService:
     def __init__(self):
         self.processes: Dict[int, asyncio.subprocess.Process] = {}
         self.log_paths: Dict[int, str] = {}
+        # 重新分析任务，按结果文件名索引
+        self.reanalysis_processes: Dict[str, asyncio.subprocess.Process] = {}
 
     def is_running(self, task_id: int) -> bool:
         """检查任务是否正在运行"""
@@ -105,8 +107,69 @@ class ProcessService:
             print(f"停止任务进程 (ID: {task_id}) 时出错: {e}")
             return False
 
+    def is_reanalysis_running(self, filename: str) -> bool:
+        process = self.reanalysis_processes.get(filename)
+        return process is not None and process.returncode is None
+
+    @staticmethod
+    def reanalysis_log_path(filename: str) -> str:
+        return os.path.join("logs", f"reanalyze_{sanitize_filename(filename)}.log")
+
+    async def start_reanalysis(self, filename: str, task_name: Optional[str] = None,
+                               workers: Optional[int] = None, replace: bool = False) -> bool:
+        """启动结果文件的重新分析进程（reanalyze.py）"""
+        if self.is_reanalysis_running(filename):
+            print(f"结果文件 '{filename}' 的重新分析已在运行中")
+            return False
+
+        try:
+            os.makedirs("logs", exist_ok=True)
+            log_file_handle = open(self.reanalysis_log_path(filename), 'a', encoding='utf-8')
+
+            args = [sys.executable, "-u", "reanalyze.py", filename]
+            if task_name:
+                args += ["--task-name", task_name]
+            if workers:
+                args += ["--workers", str(workers)]
+            if replace:
+                args.append("--replace")
+
+            child_env = os.environ.copy()
+            child_env["PYTHONIOENCODING"] = "utf-8"
+            child_env["PYTHONUTF8"] = "1"
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=log_file_handle,
+                stderr=log_file_handle,
+                preexec_fn=os.setsid if sys.platform != "win32" else None,
+                env=child_env
+            )
+            self.reanalysis_processes[filename] = process
+            print(f"启动结果文件 '{filename}' 的重新分析 (PID: {process.pid})")
+            return True
+        except Exception as e:
+            print(f"启动结果文件 '{filename}' 的重新分析失败: {e}")
+            return False
+
+    async def stop_reanalysis(self, filename: str) -> bool:
+        """停止重新分析进程，已写出的部分会在下次启动时从断点继续"""
+        process = self.reanalysis_processes.pop(filename, None)
+        if not process or process.returncode is not None:
+            return False
+        try:
+            if sys.platform != "win32":
+                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            else:
+                process.terminate()
+            await process.wait()
+            return True
+        except ProcessLookupError:
+            return False
+
     async def stop_all(self):
         """停止所有任务进程"""
         task_ids = list(self.processes.keys())
         for task_id in task_ids:
             await self.stop_task(task_id)
+        for filename in list(self.reanalysis_processes.keys()):
+            await self.stop_reanalysis(filename)
@@ -0,0 +1,103 @@
+"""
+任务运行状态持久化
+每个任务一个 JSON 文件，保存跨运行的状态（如增量爬取的发布时间高水位线）。
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from src.config import DATA_DIR
+from src.utils import sanitize_filename
+
+
+TASK_STATE_DIR = os.path.join(DATA_DIR, "task_state")
+PUBLISH_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def _task_state_path(task_name: str) -> str:
+    # 任务名可能全是中文，sanitize 后容易冲突，追加一段哈希保证唯一
+    digest = hashlib.sha1(task_name.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(TASK_STATE_DIR, f"{sanitize_filename(task_name)}_{digest}.json")
+
+
+def load_task_state(task_name: str) -> dict:
+    """读取任务状态，文件不存在或损坏时返回空字典。"""
+    path = _task_state_path(task_name)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"   [警告] 读取任务状态文件 {path} 失败: {e}")
+        return {}
+
+
+def update_task_state(task_name: str, **updates) -> dict:
+    """合并更新任务状态并原子写回。"""
+    state = load_task_state(task_name)
+    state.update(updates)
+    path = _task_state_path(task_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except IOError as e:
+        print(f"   [警告] 写入任务状态文件 {path} 失败: {e}")
+    return state
+
+
+def parse_publish_time(value: str) -> Optional[datetime]:
+    """解析搜索结果中的“发布时间”字段，无法解析时返回 None。"""
+    try:
+        return datetime.strptime(value, PUBLISH_TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_high_water_mark(task_name: str) -> Optional[datetime]:
+    """读取上一次运行记录的最新发布时间。"""
+    return parse_publish_time(load_task_state(task_name).get("publish_high_water_mark"))
+
+
+def save_high_water_mark(task_name: str, high_water_mark: datetime) -> None:
+    update_task_state(
+        task_name,
+        publish_high_water_mark=high_water_mark.strftime(PUBLISH_TIME_FORMAT),
+        last_run_at=datetime.now().isoformat(),
+    )
+
+
+def is_page_exhausted(
+    items: Iterable[dict],
+    is_seen: Callable[[dict], bool],
+    high_water_mark: Optional[datetime],
+    stop_after_seen: int = 0,
+) -> bool:
+    """
+    判断按“最新”排序的一页结果是否已无新内容：整页（或连续 stop_after_seen 个）商品
+    都已处理过，且发布时间不晚于上次运行的高水位线。
+    """
+    if high_water_mark is None:
+        return False
+
+    items = list(items)
+    if not items:
+        return False
+
+    consecutive = 0
+    for item in items:
+        published = parse_publish_time(item.get("发布时间"))
+        is_old = published is None or published <= high_water_mark
+        if is_seen(item) and is_old:
+            consecutive += 1
+            if stop_after_seen > 0 and consecutive >= stop_after_seen:
+                return True
+        else:
+            consecutive = 0
+    return consecutive == len(items)
@@ -1,10 +1,12 @@
 import asyncio
+import hashlib
 import json
 import math
 import os
 import random
 import re
 import glob
+import sqlite3
 from datetime import datetime
 from functools import wraps
 from urllib.parse import quote
@@ -117,6 +119,33 @@ def get_link_unique_key(link: str) -> str:
     return link.split('&', 1)[0]
 
 
+def extract_item_id(link: str):
+    """从商品链接中提取整数形式的商品ID，无法识别时返回 None。"""
+    if not link:
+        return None
+    match = re.search(r'[?&]id=(\d+)', link)
+    return int(match.group(1)) if match else None
+
+
+def prompt_hash(prompt_text: str) -> str:
+    """计算 prompt 文本的短哈希，用于判断缓存的AI结果是否基于同一份 prompt。"""
+    return hashlib.sha256((prompt_text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def open_sqlite(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    打开一个可被多个进程共享的 SQLite 数据库（WAL 模式）。
+    check_same_thread=False 时连接可在线程池中使用，调用方需自行保证同一时刻只有一个线程使用连接。
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
 async def save_to_jsonl(data_record: dict, keyword: str):
     """将一个包含商品和卖家信息的完整记录追加保存到 .jsonl 文件。"""
     output_dir = "jsonl"
@@ -125,6 +154,9 @@ async def save_to_jsonl(data_record: dict, keyword: str):
     try:
         with open(filename, "a", encoding="utf-8") as f:
             f.write(json.dumps(data_record, ensure_ascii=False) + "\n")
+        # 同步写入去重索引，下次启动无需重新解析整个 JSONL 文件
+        from src.item_index import record_processed_item
+        record_processed_item(keyword, data_record)
         return True
     except IOError as e:
         print(f"写入文件 {filename} 出错: {e}")
@@ -1,6 +1,8 @@
 import asyncio
 
 from src.parsers import (
+    IncrementalRatingCollector,
+    RatingTally,
     _parse_search_results_json,
     _parse_user_items_data,
     calculate_reputation_from_ratings,
@@ -42,3 +44,26 @@ def test_parse_ratings_and_reputation(load_json_fixture):
     reputation = asyncio.run(calculate_reputation_from_ratings(ratings_json))
     assert reputation["作为卖家的好评数"].startswith("1/")
     assert reputation["作为买家的好评数"].startswith("1/")
+
+
+def test_incremental_rating_collector(load_json_fixture):
+    ratings_json = load_json_fixture("ratings.json")
+
+    full = IncrementalRatingCollector(max_kept=2)
+    assert asyncio.run(full.add_cards(ratings_json)) is False
+    assert full.tally(complete=True).to_stats()["作为卖家的好评数"] == "1/2"
+    assert [r["评价ID"] for r in full.ratings(complete=True)] == ["r1", "r2"]
+    assert full.latest_rate_id() == "r1"
+
+    # 上次同步到 r2：只统计 r1，并与历史计数合并
+    previous = RatingTally(seller_total=10, seller_positive=9)
+    incremental = IncrementalRatingCollector("r2", previous, [{"评价ID": "r2"}], max_kept=5)
+    assert asyncio.run(incremental.add_cards(ratings_json)) is True
+    assert incremental.seen == 1
+    assert incremental.tally(complete=False).to_stats()["作为卖家的好评数"] == "10/11"
+    assert [r["评价ID"] for r in incremental.ratings(complete=False)] == ["r1", "r2"]
+
+    # 滚动到底仍未遇到旧 rateId 时以本次全量统计为准
+    missing = IncrementalRatingCollector("gone", previous, max_kept=5)
+    asyncio.run(missing.add_cards(ratings_json))
+    assert missing.tally(complete=True).to_stats()["作为卖家的好评数"] == "1/2"
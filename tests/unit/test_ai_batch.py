@@ -0,0 +1,83 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src import ai_handler
+from src.ai_batch import AIBatcher, split_batch_results
+from src.ai_executor import AIExecutor, AIRateLimitStore
+from src.infrastructure.external.ai_gateway import AIGateway
+
+
+def _record(item_id):
+    return {"商品信息": {"商品ID": item_id, "商品标题": f"A7M4 #{item_id}"}, "卖家信息": {}}
+
+
+def _verdict(item_id, **overrides):
+    verdict = {
+        "商品ID": item_id,
+        "prompt_version": "1",
+        "is_recommended": False,
+        "reason": "价格偏高",
+        "risk_tags": [],
+        "criteria_analysis": {"seller_type": {"status": "ok"}},
+    }
+    verdict.update(overrides)
+    return verdict
+
+
+def test_split_batch_results_accepts_object_or_array():
+    assert set(split_batch_results({"results": [_verdict("1"), _verdict("2")]})) == {"1", "2"}
+    assert set(split_batch_results([_verdict(3)])) == {"3"}
+    assert split_batch_results({"unexpected": True}) == {}
+
+
+def test_batcher_groups_items_and_returns_none_for_missing():
+    batches = []
+
+    async def analyze_batch(records):
+        batches.append([r["商品信息"]["商品ID"] for r in records])
+        return {"1": {"is_recommended": True}, "3": {"is_recommended": False}}
+
+    async def run():
+        batcher = AIBatcher(analyze_batch, max_items=3, max_wait=30)
+        return await asyncio.gather(*(batcher.submit(_record(i)) for i in ("1", "2", "3")))
+
+    results = asyncio.run(run())
+    assert batches == [["1", "2", "3"]]
+    assert results[0]["is_recommended"] is True
+    assert results[1] is None
+
+
+def test_batcher_close_flushes_partial_batch():
+    async def analyze_batch(records):
+        return {r["商品信息"]["商品ID"]: {"ok": True} for r in records}
+
+    async def run():
+        batcher = AIBatcher(analyze_batch, max_items=10, max_wait=3600)
+        pending = asyncio.ensure_future(batcher.submit(_record("1")))
+        await asyncio.sleep(0)
+        await batcher.close()
+        return await pending, batcher.batches
+
+    result, batches = asyncio.run(run())
+    assert result == {"ok": True} and batches == 1
+
+
+def test_batch_analysis_sends_criteria_once_and_validates(monkeypatch, tmp_path):
+    captured = []
+
+    async def create(**params):
+        captured.append(params)
+        content = json.dumps({"results": [_verdict("1"), _verdict("2", risk_tags="bad")]}, ensure_ascii=False)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    executor = AIExecutor(store=AIRateLimitStore(str(tmp_path / "limit.sqlite")))
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    gateway = AIGateway(client=fake_client, executor=executor)
+    monkeypatch.setattr(ai_handler, "get_ai_gateway", lambda: gateway)
+
+    verdicts = asyncio.run(ai_handler.get_ai_batch_analysis([_record("1"), _record("2")], "评判标准XYZ"))
+
+    assert list(verdicts) == ["1"]
+    assert len(captured) == 1
+    assert captured[0]["messages"][0]["content"].count("评判标准XYZ") == 1
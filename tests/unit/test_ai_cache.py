@@ -0,0 +1,36 @@
+from src.ai_cache import AIVerdictCache, record_content_hash, verdict_cache_key
+
+
+def _record(item_id, price="¥100", wants=3):
+    return {
+        "爬取时间": f"2025-01-0{item_id}T10:00:00",
+        "任务名称": "camera",
+        "商品信息": {
+            "商品ID": str(item_id),
+            "商品链接": f"https://www.goofish.com/item?id={item_id}",
+            "商品标题": "索尼 A7M4 单机身",
+            "当前售价": price,
+            "“想要”人数": wants,
+        },
+        "卖家信息": {"卖家昵称": "alice", "卖家信用等级": "极好", "卖家收到的评价列表": [{"评价ID": item_id}]},
+    }
+
+
+def test_relisted_item_has_same_content_hash():
+    assert record_content_hash(_record(1)) == record_content_hash(_record(2, wants=9))
+    assert record_content_hash(_record(1)) != record_content_hash(_record(1, price="¥90"))
+
+
+def test_cache_hit_is_marked_and_keyed_by_prompt_and_model(tmp_path):
+    cache = AIVerdictCache(str(tmp_path / "ai.sqlite"))
+    content = record_content_hash(_record(1))
+    key = verdict_cache_key(content, "p1", "model-a")
+    cache.put(key, "p1", "model-a", {"is_recommended": False, "reason": "机身有磕碰"})
+
+    hit = cache.get(verdict_cache_key(record_content_hash(_record(2)), "p1", "model-a"), ttl=3600)
+    assert hit["is_recommended"] is False
+    assert hit["cached"] is True
+    assert cache.get(verdict_cache_key(content, "p2", "model-a"), ttl=3600) is None
+    assert cache.get(verdict_cache_key(content, "p1", "model-b"), ttl=3600) is None
+    assert cache.get(key, ttl=0) is None
+    cache.close()
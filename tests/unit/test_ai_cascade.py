@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+
+from src import ai_handler
+from src.ai_cascade import CascadeSettings, CascadeStats, parse_triage_response, triage_rejection
+from src.ai_executor import AIExecutor, AIRateLimitStore
+from src.infrastructure.external.ai_gateway import AIGateway
+
+
+def test_parse_triage_response_handles_wrapped_json():
+    assert parse_triage_response('{"score": 0.8, "reason": "型号匹配"}') == (0.8, "型号匹配")
+    assert parse_triage_response('```json\n{"score": 3, "reason": ""}\n```') == (1.0, "")
+    assert parse_triage_response("无法判断") is None
+    assert parse_triage_response('{"reason": "缺少分数"}') is None
+
+
+def test_triage_uses_triage_model_and_small_output(monkeypatch, tmp_path):
+    captured = {}
+
+    async def create(**params):
+        captured.update(params)
+        content = '{"score": 0.1, "reason": "求购帖"}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    executor = AIExecutor(store=AIRateLimitStore(str(tmp_path / "limit.sqlite")))
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    gateway = AIGateway(client=fake_client, executor=executor)
+    monkeypatch.setattr(ai_handler, "get_ai_gateway", lambda: gateway)
+
+    settings = CascadeSettings(enabled=True, triage_model="small-model", triage_max_tokens=120)
+    record = {"商品信息": {"商品ID": "1", "商品标题": "求购 A7M4"}, "卖家信息": {}}
+    score, reason = asyncio.run(ai_handler.get_ai_triage(record, "只要 A7M4 机身", settings))
+
+    assert (score, reason) == (0.1, "求购帖")
+    assert captured["model"] == "small-model"
+    assert captured["max_tokens"] == 120
+    rejection = triage_rejection(score, reason, settings, "small-model")
+    assert rejection["is_recommended"] is False
+    assert rejection["cascade"]["tier"] == "triage"
+
+
+def test_cascade_stats_pass_rate():
+    stats = CascadeStats()
+    stats.record_triage(0.5, passed=False)
+    stats.record_triage(0.5, passed=True)
+    stats.record_full(4.0)
+    assert "通过率 50%" in stats.format()
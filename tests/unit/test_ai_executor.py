@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from src import ai_executor
+from src.ai_executor import AIExecutor, AIRateLimitStore, retry_after_seconds
+
+
+def _rate_limit_error(retry_after="1"):
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_rpm_limit_is_shared_between_stores(tmp_path):
+    path = str(tmp_path / "limit.sqlite")
+    first, second = AIRateLimitStore(path), AIRateLimitStore(path)
+
+    assert first.try_reserve(10, rpm=2, tpm=0)[0] is not None
+    assert second.try_reserve(10, rpm=2, tpm=0)[0] is not None
+    reservation_id, wait = first.try_reserve(10, rpm=2, tpm=0)
+    assert reservation_id is None and 0 < wait <= 60
+
+
+def test_tpm_limit_counts_settled_usage(tmp_path):
+    store = AIRateLimitStore(str(tmp_path / "limit.sqlite"))
+    reservation_id, _ = store.try_reserve(900, rpm=0, tpm=1000)
+    assert store.try_reserve(200, rpm=0, tpm=1000)[0] is None
+    store.settle(reservation_id, 300)
+    assert store.try_reserve(200, rpm=0, tpm=1000)[0] is not None
+
+
+def test_retry_after_header_is_honoured(monkeypatch, tmp_path):
+    assert retry_after_seconds(_rate_limit_error("7")) == 7.0
+
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(ai_executor.asyncio, "sleep", fake_sleep)
+    store = AIRateLimitStore(str(tmp_path / "limit.sqlite"))
+    monkeypatch.setattr(store, "set_cooldown", lambda seconds: None)
+    executor = AIExecutor(store=store)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _rate_limit_error("3")
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=42))
+
+    result = asyncio.run(executor.run(call, input_tokens=10))
+    assert result.usage.total_tokens == 42
+    assert len(calls) == 2
+    assert 3 <= sleeps[0] <= 4
+
+
+def test_reservation_does_not_block_event_loop(tmp_path):
+    path = str(tmp_path / "limit.sqlite")
+    executor = AIExecutor(store=AIRateLimitStore(path))
+    # 另一个进程正持有写锁，BEGIN IMMEDIATE 需要等它提交
+    other = sqlite3.connect(path, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def call():
+            return SimpleNamespace(usage=SimpleNamespace(total_tokens=5))
+
+        ticking = asyncio.create_task(ticker())
+        threading.Timer(0.3, other.commit).start()
+        await executor.run(call, input_tokens=1)
+        ticking.cancel()
+        return ticks
+
+    assert len(asyncio.run(scenario())) > 5
+    other.close()
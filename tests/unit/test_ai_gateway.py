@@ -0,0 +1,162 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from src.ai_executor import AIExecutor, AIRateLimitStore
+from src.infrastructure.external import ai_gateway
+from src.infrastructure.external.ai_gateway import (
+    AIDeadlineExceeded,
+    AIGateway,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+def _status_error(status):
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def _response(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+def _gateway(tmp_path, create, **kwargs):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    executor = AIExecutor(store=AIRateLimitStore(str(tmp_path / "limit.sqlite")))
+    return AIGateway(client=client, executor=executor, **kwargs)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+
+    async def fake_sleep(seconds):
+        recorded.append(seconds)
+
+    monkeypatch.setattr(ai_gateway.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def test_transport_errors_are_retried_with_backoff(tmp_path, sleeps):
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        if len(calls) < 3:
+            raise httpx.ConnectError("connection reset")
+        return _response('{"ok": true}')
+
+    gateway = _gateway(tmp_path, create, max_attempts=3, backoff_base=1, backoff_max=5)
+    assert asyncio.run(gateway.chat_text(model="m", messages=[])) == '{"ok": true}'
+    assert len(calls) == 3
+    assert len(sleeps) == 2 and all(0 <= s <= 5 for s in sleeps)
+    assert gateway.breaker.state == "closed"
+
+
+def test_client_errors_are_not_retried(tmp_path, sleeps):
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        raise _status_error(400)
+
+    gateway = _gateway(tmp_path, create)
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(gateway.chat(model="m", messages=[]))
+    assert len(calls) == 1 and not sleeps
+    assert gateway.breaker.failures == 0
+
+
+def test_breaker_opens_after_repeated_outages(tmp_path, sleeps):
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        raise _status_error(503)
+
+    gateway = _gateway(tmp_path, create, max_attempts=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        with pytest.raises(openai.APIStatusError):
+            asyncio.run(gateway.chat(model="m", messages=[]))
+    assert gateway.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(gateway.chat(model="m", messages=[]))
+    assert len(calls) == 2
+
+    # 超过 reset_timeout 后放行一个试探请求，成功即恢复
+    gateway.breaker.opened_at = time.monotonic() - 61
+
+    async def recovered(**params):
+        return _response("{}")
+
+    gateway.client.chat.completions.create = recovered
+    asyncio.run(gateway.chat(model="m", messages=[]))
+    assert gateway.breaker.state == "closed"
+
+
+def test_deadline_bounds_a_slow_call(tmp_path):
+    async def create(**params):
+        await asyncio.sleep(5)
+        return _response("{}")
+
+    gateway = _gateway(tmp_path, create)
+    started = time.monotonic()
+    with pytest.raises(AIDeadlineExceeded):
+        asyncio.run(gateway.chat(deadline=time.monotonic() + 0.2, model="m", messages=[]))
+    assert time.monotonic() - started < 2
+
+
+def test_half_open_probe_is_always_released(tmp_path):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    errors = [_status_error(400)]
+
+    async def create(**params):
+        if errors:
+            raise errors.pop()
+        await asyncio.sleep(5)
+
+    gateway = _gateway(tmp_path, create, breaker=breaker)
+
+    # 试探请求收到 400：服务有响应，熔断器恢复
+    breaker.opened_at = time.monotonic() - 61
+    assert breaker.state == "half_open"
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(gateway.chat(model="m", messages=[]))
+    assert breaker.state == "closed" and breaker.allow()
+
+    # 试探请求超过截止时间：重新熔断，reset_timeout 之后可以再次试探
+    breaker.opened_at = time.monotonic() - 61
+    with pytest.raises(AIDeadlineExceeded):
+        asyncio.run(gateway.chat(deadline=time.monotonic() + 0.1, model="m", messages=[]))
+    assert breaker.state == "open"
+    breaker.opened_at = time.monotonic() - 61
+    assert breaker.allow()
+
+
+def test_cancelled_probe_reopens_breaker(tmp_path):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    async def create(**params):
+        await asyncio.sleep(5)
+
+    gateway = _gateway(tmp_path, create, breaker=breaker)
+    breaker.opened_at = time.monotonic() - 61
+
+    async def scenario():
+        task = asyncio.create_task(gateway.chat(model="m", messages=[]))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert breaker.state == "open"
+    breaker.opened_at = time.monotonic() - 61
+    assert breaker.allow()
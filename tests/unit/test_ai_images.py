@@ -0,0 +1,58 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src import ai_handler
+from src.ai_executor import AIExecutor, AIRateLimitStore
+from src.infrastructure.external.ai_gateway import AIGateway
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.messages = None
+
+    async def create(self, **params):
+        self.messages = params["messages"]
+        content = json.dumps({
+            "prompt_version": "1",
+            "is_recommended": True,
+            "reason": "ok",
+            "risk_tags": [],
+            "criteria_analysis": {"seller_type": {"status": "ok"}},
+        })
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _run_analysis(monkeypatch, tmp_path, send_images):
+    completions = _FakeCompletions()
+    monkeypatch.chdir(tmp_path)
+    executor = AIExecutor(store=AIRateLimitStore(str(tmp_path / "limit.sqlite")))
+    gateway = AIGateway(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)), executor=executor)
+    monkeypatch.setattr(ai_handler, "get_ai_gateway", lambda: gateway)
+    monkeypatch.setattr(ai_handler, "AI_SEND_IMAGES", send_images)
+
+    image_path = tmp_path / "1.jpg"
+    image_path.write_bytes(b"jpeg")
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return [str(image_path)]
+
+    record = {"商品信息": {"商品ID": "1", "商品标题": "A7M4"}}
+    result = asyncio.run(ai_handler.get_ai_analysis(record, prompt_text="prompt", image_loader=loader))
+    return result, calls, completions.messages
+
+
+def test_text_only_backend_never_downloads_images(monkeypatch, tmp_path):
+    result, calls, messages = _run_analysis(monkeypatch, tmp_path, send_images=False)
+    assert result["is_recommended"] is True
+    assert calls == []
+    assert isinstance(messages[0]["content"], str)
+
+
+def test_vision_backend_loads_images_on_demand(monkeypatch, tmp_path):
+    result, calls, messages = _run_analysis(monkeypatch, tmp_path, send_images=True)
+    assert result["is_recommended"] is True
+    assert calls == [1]
+    assert messages[0]["content"][0]["type"] == "image_url"
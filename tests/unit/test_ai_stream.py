@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.ai_executor import AIExecutor, AIRateLimitStore
+from src.ai_stream import StreamingVerdictParser
+from src.infrastructure.external.ai_gateway import AIGateway
+
+
+VERDICT = (
+    '```json\n{"prompt_version": "v1", "is_recommended": true, '
+    '"reason": "价格合理，卖家说\\"全新\\"{未拆封}", "risk_tags": ["a,b"], '
+    '"criteria_analysis": {"seller_type": {"status": "个人", "reason": "x}"}}}\n```\n后面是多余的解释……'
+)
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_reports_early_fields_and_stops_at_closing_brace():
+    verdicts = []
+    parser = StreamingVerdictParser(lambda recommended, reason: verdicts.append((recommended, reason)))
+    fed = 0
+    for chunk in _chunks(VERDICT):
+        fed += 1
+        if parser.feed(chunk):
+            break
+        if parser.fields.get("reason") is not None:
+            # 结论在 criteria_analysis 之前就已回调
+            assert verdicts == [(True, '价格合理，卖家说"全新"{未拆封}')]
+
+    assert parser.complete
+    assert fed < len(_chunks(VERDICT))
+    assert parser.text.startswith("{") and parser.text.endswith("}}}")
+    assert parser.fields["risk_tags"] == ["a,b"]
+    assert parser.fields["criteria_analysis"]["seller_type"]["reason"] == "x}"
+    assert len(verdicts) == 1
+
+
+def test_parser_reset_discards_partial_output():
+    parser = StreamingVerdictParser()
+    parser.feed('{"is_recommended": fa')
+    parser.reset()
+    assert parser.feed('{"is_recommended": false}')
+    assert parser.fields == {"is_recommended": False}
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent >= len(self.chunks):
+            raise StopAsyncIteration
+        self.sent += 1
+        delta = SimpleNamespace(content=self.chunks[self.sent - 1])
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        self.closed = True
+
+
+def test_gateway_closes_stream_after_top_level_object(tmp_path):
+    stream = _FakeStream(_chunks(VERDICT))
+    requests = []
+
+    async def create(**params):
+        requests.append(params)
+        return stream
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    executor = AIExecutor(store=AIRateLimitStore(str(tmp_path / "limit.sqlite")))
+    gateway = AIGateway(client=client, executor=executor)
+
+    text = asyncio.run(gateway.chat_stream(StreamingVerdictParser(), model="m", messages=[]))
+
+    assert requests[0]["stream"] is True
+    assert text.startswith('{"prompt_version"') and text.endswith("}}}")
+    assert stream.closed and stream.sent < len(stream.chunks)
@@ -0,0 +1,93 @@
+import asyncio
+
+from src.browser_pool import BrowserPool, PooledBrowser
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+def _make_pool(**kwargs):
+    pool = BrowserPool(**kwargs)
+    launched = []
+
+    async def fake_launch(key, proxy_server):
+        pooled = PooledBrowser(key=key, browser=FakeBrowser())
+        launched.append(pooled)
+        return pooled
+
+    pool._launch = fake_launch
+    return pool, launched
+
+
+def test_pool_reuses_browser_per_proxy():
+    pool, launched = _make_pool(max_browsers=2, max_contexts_per_browser=10)
+
+    async def run():
+        async with pool.context(None) as ctx1:
+            pass
+        async with pool.context(None) as ctx2:
+            pass
+        async with pool.context("http://127.0.0.1:7890"):
+            pass
+        return ctx1, ctx2
+
+    ctx1, ctx2 = asyncio.run(run())
+    assert len(launched) == 2
+    assert ctx1.closed and ctx2.closed
+    assert launched[0].browser.closed is False
+
+
+def test_pool_recycles_after_max_contexts():
+    pool, launched = _make_pool(max_browsers=1, max_contexts_per_browser=2)
+
+    async def run():
+        for _ in range(3):
+            async with pool.context(None):
+                pass
+
+    asyncio.run(run())
+    assert len(launched) == 2
+    assert launched[0].browser.closed is True
+    assert launched[1].browser.closed is False
+
+
+def test_releasing_retired_browser_keeps_replacement():
+    pool, launched = _make_pool(max_browsers=2, max_contexts_per_browser=10)
+
+    async def run():
+        async with pool.context(None):
+            x = launched[0]
+            # X 退役但仍有上下文在使用，再次获取会在同一代理键下启动替代实例 Y
+            x.retiring = True
+            async with pool.context(None):
+                y = launched[1]
+                assert pool._browsers["direct"] is y
+        # X 的最后一个上下文释放后被关闭，不能把 Y 从池中摘除
+        return x, y
+
+    x, y = asyncio.run(run())
+    assert x.browser.closed is True
+    assert pool._browsers.get("direct") is y
+    assert y.browser.closed is False
@@ -0,0 +1,98 @@
+import asyncio
+import base64
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+from src import image_downloader
+from src.image_cache import ImageCache
+
+
+def _png_bytes(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_originals_are_cached_by_url(monkeypatch, tmp_path):
+    downloads = []
+
+    class _FakeDownloader:
+        async def download_many(self, targets):
+            results = []
+            for url, path in targets:
+                downloads.append(url)
+                with open(path, "wb") as f:
+                    f.write(_png_bytes(10, 10))
+                results.append(path)
+            return results
+
+    monkeypatch.setattr(image_downloader, "get_image_downloader", lambda: _FakeDownloader())
+    cache = ImageCache(root=str(tmp_path))
+
+    first = asyncio.run(cache.fetch_many(["https://img.example.com/a.jpg", "https://img.example.com/b.jpg"]))
+    second = asyncio.run(cache.fetch_many(["https://img.example.com/a.jpg"]))
+
+    assert len(downloads) == 2
+    assert second[0] == first[0]
+    assert os.path.exists(first[1])
+    cache.close()
+
+
+def test_variant_is_resized_and_base64_cached(tmp_path):
+    cache = ImageCache(root=str(tmp_path / "cache"), variant_max_side=100)
+    source = tmp_path / "big.png"
+    source.write_bytes(_png_bytes(400, 200))
+
+    encoded = cache.encode_variant(str(source))
+    with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
+        assert image.format == "JPEG"
+        assert image.size == (100, 50)
+
+    _, b64_path = cache._variant_paths(hashlib.sha256(source.read_bytes()).hexdigest())
+    assert os.path.exists(b64_path)
+    assert cache.encode_variant(str(source)) == encoded
+    cache.close()
+
+
+def test_lru_eviction_keeps_recently_used_files(tmp_path):
+    cache = ImageCache(root=str(tmp_path), max_bytes=250)
+    paths = []
+    for name in ("old", "recent", "new"):
+        path = tmp_path / f"{name}.bin"
+        path.write_bytes(b"x" * 100)
+        paths.append(str(path))
+
+    cache._record(paths[0])
+    cache._record(paths[1])
+    cache._touch(paths[0])
+    cache._record(paths[2])
+
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[2])
+    assert cache.total_bytes() <= 250
+    cache.close()
+
+
+def test_fetched_originals_are_not_evicted_during_the_run(monkeypatch, tmp_path):
+    class _FakeDownloader:
+        async def download_many(self, targets):
+            for url, path in targets:
+                with open(path, "wb") as f:
+                    f.write(_png_bytes(40, 40))
+            return [path for _, path in targets]
+
+    monkeypatch.setattr(image_downloader, "get_image_downloader", lambda: _FakeDownloader())
+    cache = ImageCache(root=str(tmp_path / "cache"), max_bytes=1)
+
+    # 上限极小：下载第二张时会触发淘汰，但已交给分析流程的第一张原图仍可编码
+    first = asyncio.run(cache.fetch_many(["https://img.example.com/a.jpg"]))[0]
+    asyncio.run(cache.fetch_many(["https://img.example.com/b.jpg"]))
+    assert os.path.exists(first)
+    assert asyncio.run(cache.encode_variant_async(first))
+
+    assert cache.encode_variant(str(tmp_path / "gone.png")) is None
+    cache.close()
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from src.image_downloader import ImageDownloader
+
+
+def _downloader_with(handler, **kwargs):
+    downloader = ImageDownloader(**kwargs)
+    downloader._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return downloader
+
+
+def test_download_many_streams_to_disk(tmp_path):
+    def handler(request):
+        return httpx.Response(200, content=request.url.path.encode() * 10)
+
+    async def run():
+        downloader = _downloader_with(handler, max_concurrency=2, per_host_concurrency=1)
+        targets = [(f"https://img.example.com/{i}.jpg", str(tmp_path / f"{i}.jpg")) for i in range(4)]
+        results = await downloader.download_many(targets)
+        await downloader.close()
+        return targets, results
+
+    targets, results = asyncio.run(run())
+    assert results == [path for _, path in targets]
+    assert (tmp_path / "2.jpg").read_bytes() == b"/2.jpg" * 10
+
+
+def test_download_rejects_oversized_and_failed_images(tmp_path):
+    def handler(request):
+        if request.url.path == "/missing.jpg":
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"x" * 2048)
+
+    async def run():
+        downloader = _downloader_with(handler, max_bytes=1024)
+        results = await downloader.download_many([
+            ("https://img.example.com/big.jpg", str(tmp_path / "big.jpg")),
+            ("https://img.example.com/missing.jpg", str(tmp_path / "missing.jpg")),
+        ])
+        await downloader.close()
+        return results
+
+    assert asyncio.run(run()) == [None, None]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_downloads_of_same_image_do_not_collide(tmp_path):
+    payload = b"0123456789" * 1000
+
+    async def chunks():
+        for i in range(0, len(payload), 1000):
+            await asyncio.sleep(0.01)
+            yield payload[i:i + 1000]
+
+    def handler(request):
+        return httpx.Response(200, content=chunks())
+
+    async def run():
+        # 两个任务进程各自的下载器同时把同一张图片写到同一个缓存路径
+        first, second = _downloader_with(handler), _downloader_with(handler)
+        save_path = str(tmp_path / "same.jpg")
+        results = await asyncio.gather(
+            first.download("https://img.example.com/same.jpg", save_path),
+            second.download("https://img.example.com/same.jpg", save_path),
+        )
+        await first.close()
+        await second.close()
+        return results
+
+    assert asyncio.run(run()) == [str(tmp_path / "same.jpg")] * 2
+    assert (tmp_path / "same.jpg").read_bytes() == payload
+    assert [p.name for p in tmp_path.iterdir()] == ["same.jpg"]
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from src import item_index
+from src.item_index import ProcessedItemIndex, open_item_index
+from src.utils import extract_item_id, save_to_jsonl
+
+
+def _record(item_id: int) -> dict:
+    return {
+        "商品信息": {
+            "商品ID": str(item_id),
+            "商品链接": f"https://www.goofish.com/item?id={item_id}&categoryId=1",
+        }
+    }
+
+
+def test_extract_item_id():
+    assert extract_item_id("https://www.goofish.com/item?id=123&foo=bar") == 123
+    assert extract_item_id("https://www.goofish.com/item") is None
+
+
+def test_index_rebuilds_from_existing_jsonl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    jsonl_dir = tmp_path / "jsonl"
+    jsonl_dir.mkdir()
+    lines = [json.dumps(_record(i), ensure_ascii=False) for i in (11, 22)] + ["not-json"]
+    (jsonl_dir / "sony_a7m4_full_data.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    index = ProcessedItemIndex("jsonl/sony_a7m4_full_data.jsonl")
+    assert len(index) == 2
+    assert "https://www.goofish.com/item?id=11&spm=x" in index
+    assert "https://www.goofish.com/item?id=33" not in index
+    index.close()
+
+
+def test_save_to_jsonl_updates_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(item_index, "_indexes", {})
+
+    asyncio.run(save_to_jsonl(_record(42), keyword="sony a7m4"))
+    index = open_item_index("sony a7m4")
+    assert "https://www.goofish.com/item?id=42" in index
+
+    # 结果文件被删除后，索引视为过期并清空
+    index.close()
+    monkeypatch.setattr(item_index, "_indexes", {})
+    (tmp_path / "jsonl" / "sony_a7m4_full_data.jsonl").unlink()
+    assert len(open_item_index("sony a7m4")) == 0
+
+
+def test_links_without_item_id_survive_restart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(item_index, "_indexes", {})
+    record = {"商品信息": {"商品ID": "", "商品链接": "https://www.goofish.com/item/abc&spm=1"}}
+
+    asyncio.run(save_to_jsonl(record, keyword="sony a7m4"))
+    open_item_index("sony a7m4").close()
+
+    # 模拟进程重启：重新打开的索引无需重建就能识别该链接
+    monkeypatch.setattr(item_index, "_indexes", {})
+    monkeypatch.setattr(ProcessedItemIndex, "rebuild", lambda self: pytest.fail("索引不应重建"))
+    index = open_item_index("sony a7m4")
+    assert "https://www.goofish.com/item/abc&spm=2" in index
+    assert len(index) == 1
+    index.close()
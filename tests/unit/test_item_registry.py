@@ -0,0 +1,36 @@
+from src.item_registry import ItemRegistry, registry_key
+from src.utils import prompt_hash
+
+
+def test_registry_reuses_detail_and_matching_analysis(tmp_path):
+    registry = ItemRegistry(str(tmp_path / "registry.sqlite"))
+    item = {
+        "商品ID": "123",
+        "商品链接": "https://www.goofish.com/item?id=123&categoryId=1",
+        "当前售价": "¥100",
+        "商品图片列表": ["https://img/1.jpg"],
+        "浏览量": 10,
+        "商品描述": "仅拆封试用",
+    }
+    key = registry_key(item)
+    assert key == "123"
+    assert registry.get(key) is None
+
+    registry.record_detail(key, item, {"卖家昵称": "seller"})
+    registry.record_analysis(key, prompt_hash("prompt A"), item["当前售价"], {"is_recommended": True})
+
+    entry = registry.get(key)
+    assert entry.has_fresh_detail(60)
+    assert not entry.has_fresh_detail(0)
+    # 描述也要随详情复用，否则预筛选的描述规则、AI prompt 和结论缓存键都会与重新获取时不同
+    assert entry.detail == {"商品图片列表": ["https://img/1.jpg"], "浏览量": 10, "商品描述": "仅拆封试用"}
+    assert entry.seller == {"卖家昵称": "seller"}
+
+    assert entry.reusable_analysis(prompt_hash("prompt A"), "¥100", 60) == {"is_recommended": True}
+    assert entry.reusable_analysis(prompt_hash("prompt B"), "¥100", 60) is None
+    assert entry.reusable_analysis(prompt_hash("prompt A"), "¥90", 60) is None
+
+    # 重新获取详情不会覆盖已有的AI结论
+    registry.record_detail(key, item, {"卖家昵称": "seller2"})
+    assert registry.get(key).ai_analysis == {"is_recommended": True}
+    registry.close()
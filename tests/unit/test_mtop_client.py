@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from src.mtop import DETAIL_API, SEARCH_API, MtopClient, MtopError
+
+
+class _FakeResponse:
+    def __init__(self, payload, status=200):
+        self._payload = payload
+        self.status = status
+        self.ok = 200 <= status < 300
+
+    async def json(self):
+        return self._payload
+
+
+class _FakeRequest:
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+        self.calls = []
+
+    async def post(self, url, params=None, form=None, headers=None, timeout=None):
+        self.calls.append({"url": url, "params": params, "form": form})
+        return _FakeResponse(self.payloads.pop(0))
+
+
+class _FakeContext:
+    def __init__(self, payloads):
+        self.request = _FakeRequest(payloads)
+
+    async def cookies(self, *urls):
+        return [{"name": "_m_h5_tk", "value": "tok_1700000000000"}]
+
+
+def test_search_encodes_filters_and_returns_payload():
+    context = _FakeContext([{"ret": ["SUCCESS::调用成功"], "data": {"resultList": []}}])
+    client = MtopClient(context)
+
+    payload = asyncio.run(client.search("sony a7m4", 3, personal_only=True, min_price="100"))
+
+    assert payload["data"] == {"resultList": []}
+    call = context.request.calls[0]
+    assert call["url"].endswith(f"/{SEARCH_API}/1.0/")
+    data = json.loads(call["form"]["data"])
+    assert data["pageNumber"] == 3
+    assert data["sortField"] == "create"
+    assert data["propValueStr"]["searchFilter"] == "priceRange:100,;quickFilter:filterPersonal;"
+
+
+def test_call_retries_once_on_expired_token():
+    context = _FakeContext([
+        {"ret": ["FAIL_SYS_TOKEN_EXOIRED::令牌过期"]},
+        {"ret": ["SUCCESS::调用成功"], "data": {"itemDO": {}}},
+    ])
+    payload = asyncio.run(MtopClient(context).item_detail(123))
+
+    assert payload["data"] == {"itemDO": {}}
+    assert len(context.request.calls) == 2
+    assert context.request.calls[0]["url"].endswith(f"/{DETAIL_API}/1.0/")
+
+
+def test_call_raises_risk_control_error():
+    context = _FakeContext([{"ret": ["FAIL_SYS_USER_VALIDATE::哎哟喂,被挤爆啦"]}])
+    with pytest.raises(MtopError) as exc_info:
+        asyncio.run(MtopClient(context).item_detail(123))
+    assert exc_info.value.is_risk_control
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from src.infrastructure.config.settings import NotificationSettings
+from src.infrastructure.external.notification_clients import (
+    BarkClient,
+    NtfyClient,
+    WebhookClient,
+    WeComClient,
+)
+from src.services.notification_service import NotificationService
+
+
+PRODUCT = {"商品标题": "Sony A7M4 全画幅微单", "当前售价": "¥9800", "商品链接": "https://www.goofish.com/item?id=1"}
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_channels_are_sent_concurrently_with_own_timeout():
+    async def scenario():
+        async def slow(request):
+            await asyncio.sleep(5)
+            return httpx.Response(200)
+
+        async def fast(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={"errcode": 0})
+
+        async with _client(slow) as slow_http, _client(fast) as fast_http:
+            service = NotificationService([
+                NtfyClient("https://ntfy.example/topic", timeout=0.5, retries=0, http_client=slow_http),
+                BarkClient("https://bark.example/key", timeout=1, retries=0, http_client=fast_http),
+                WeComClient("https://wecom.example/hook", timeout=1, retries=0, http_client=fast_http),
+            ])
+            started = time.monotonic()
+            results = await service.send_notification(PRODUCT, "价格合适")
+            return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == {"NtfyClient": False, "BarkClient": True, "WeComClient": True}
+    # 总耗时取决于最慢的渠道（超时 0.5s），而不是各渠道耗时之和
+    assert elapsed < 0.9
+
+
+def test_failed_channel_is_retried(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr("src.infrastructure.external.notification_clients.base.asyncio.sleep", fake_sleep)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503 if len(calls) < 3 else 200)
+
+    async def scenario():
+        async with _client(handler) as http:
+            client = NtfyClient("https://ntfy.example/topic", retries=2, http_client=http)
+            return await client.send(PRODUCT, "价格合适")
+
+    assert asyncio.run(scenario()) is True
+    assert len(calls) == 3 and sleeps == [1, 2]
+    assert calls[0].content.decode("utf-8").startswith("价格: ¥9800")
+
+
+def test_wecom_markdown_and_webhook_templates():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"errcode": 0})
+
+    async def scenario():
+        async with _client(handler) as http:
+            await WeComClient("https://wecom.example/hook", pcurl_to_mobile=False, http_client=http).send(PRODUCT, "好")
+            await WebhookClient(
+                "https://hook.example/notify?a=b",
+                method="POST",
+                query_parameters='{"t": "{{title}}"}',
+                body='{"text": "{{content}}"}',
+                http_client=http,
+            ).send(PRODUCT, "换行\n测试")
+
+    asyncio.run(scenario())
+    markdown = json.loads(requests[0].content)["markdown"]["content"]
+    assert "[https://www.goofish.com/item?id=1](https://www.goofish.com/item?id=1)" in markdown
+    webhook = requests[1]
+    assert webhook.url.params["a"] == "b" and webhook.url.params["t"].startswith("🚨 新推荐!")
+    assert "换行\n测试" in json.loads(webhook.content)["text"]
+
+
+def test_service_from_settings_enables_configured_channels():
+    settings = SimpleNamespace(
+        ntfy_topic_url="https://ntfy.example/topic", gotify_url="https://gotify.example", gotify_token=None,
+        bark_url=None, wx_bot_url="https://wecom.example/hook", telegram_bot_token=None, telegram_chat_id=None,
+        webhook_url=None, webhook_method="POST", webhook_headers=None, webhook_content_type="JSON",
+        webhook_query_parameters=None, webhook_body=None, pcurl_to_mobile=True,
+    )
+    service = NotificationService.from_settings(settings)
+    assert [type(c).__name__ for c in service.clients] == ["NtfyClient", "WeComClient"]
+
+
+def test_mobile_links_are_off_unless_configured(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("PCURL_TO_MOBILE", raising=False)
+    monkeypatch.setenv("NTFY_TOPIC_URL", "https://ntfy.example/topic")
+    service = NotificationService.from_settings(NotificationSettings())
+    assert service.clients[0].pcurl_to_mobile is False
+
+    monkeypatch.setenv("PCURL_TO_MOBILE", "true")
+    assert NotificationService.from_settings(NotificationSettings()).clients[0].pcurl_to_mobile is True
@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+import threading
+
+from src.pacing import (
+    PACING_PROFILES,
+    AccountPacer,
+    PacingStore,
+    account_key_for,
+    resolve_pacing_profile,
+)
+
+
+def test_resolve_pacing_profile():
+    assert resolve_pacing_profile({"pacing_profile": "Aggressive"}).name == "aggressive"
+    assert resolve_pacing_profile({}, "conservative").name == "conservative"
+    assert resolve_pacing_profile({"pacing_profile": "unknown"}).name == "balanced"
+    assert account_key_for("state/acc_1.json") == "acc_1.json"
+
+
+def test_token_bucket_limits_burst(tmp_path):
+    store = PacingStore(str(tmp_path / "pacing.sqlite"))
+    profile = PACING_PROFILES["conservative"]
+
+    assert store.try_acquire("acc", profile) == 0
+    assert store.try_acquire("acc", profile) == 0
+    # 桶容量为 2，第三次需要等待约 60 / 每分钟动作数 秒
+    wait = store.try_acquire("acc", profile)
+    assert 15 < wait <= 20
+    store.close()
+
+
+def test_speed_backs_off_on_risk_and_recovers_slowly(tmp_path):
+    store = PacingStore(str(tmp_path / "pacing.sqlite"))
+    pacer = AccountPacer("acc", PACING_PROFILES["balanced"], store=store)
+
+    assert pacer.speed == 1.0
+    assert asyncio.run(pacer.record_risk()) == 0.5
+    assert store.try_acquire("acc", pacer.profile) > 0
+    assert round(asyncio.run(pacer.record_clean_run()), 3) == 0.525
+
+    async def clean_runs():
+        for _ in range(100):
+            await pacer.record_clean_run()
+
+    asyncio.run(clean_runs())
+    assert pacer.speed == PACING_PROFILES["balanced"].max_speed
+
+    # 同一个数据库中的其他连接（其他任务进程）看到相同的调速系数
+    other = PacingStore(store.path)
+    assert other.get_speed("acc", pacer.profile) == pacer.speed
+    other.close()
+    store.close()
+
+
+def test_acquire_does_not_block_event_loop(tmp_path):
+    store = PacingStore(str(tmp_path / "pacing.sqlite"))
+    pacer = AccountPacer("acc", PACING_PROFILES["balanced"], store=store)
+    # 另一个任务进程正持有写锁，BEGIN IMMEDIATE 需要等它提交
+    other = sqlite3.connect(store.path, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        threading.Timer(0.3, other.commit).start()
+        await pacer.acquire()
+        ticking.cancel()
+        return ticks
+
+    assert len(asyncio.run(scenario())) > 5
+    other.close()
+    store.close()
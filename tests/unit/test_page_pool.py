@@ -0,0 +1,64 @@
+import asyncio
+
+from src.page_pool import BLANK_URL, PagePool
+
+
+class _FakePage:
+    def __init__(self):
+        self.closed = False
+        self.urls = []
+        self.listeners = {}
+
+    def is_closed(self):
+        return self.closed
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    async def goto(self, url, **kwargs):
+        self.urls.append(url)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = _FakePage()
+        self.pages.append(page)
+        return page
+
+
+def test_page_pool_recycles_pages_and_resets_listeners():
+    async def run():
+        context = _FakeContext()
+        pool = PagePool(context, max_idle=1)
+        handler = lambda response: None
+
+        page = await pool.acquire()
+        await pool.goto(page, "https://www.goofish.com/item?id=1")
+        # 借出期间再借一个（例如详情页处理中打开卖家主页），会临时新建页面
+        nested = await pool.acquire({"response": handler})
+        await pool.release(nested)
+        await pool.release(page)
+
+        assert nested.listeners["response"] == []
+        assert nested.urls[-1] == BLANK_URL
+        assert page.closed is True  # 超出 max_idle 的页面直接关闭
+
+        again = await pool.acquire()
+        assert again is nested
+        assert pool.stats.created == 2
+        assert pool.stats.reused == 1
+        assert pool.stats.navigations == 1
+        await pool.release(again)
+        await pool.close()
+        assert all(p.closed for p in context.pages)
+
+    asyncio.run(run())
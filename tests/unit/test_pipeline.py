@@ -0,0 +1,63 @@
+import asyncio
+
+from src.pipeline import Stage, StagePipeline
+
+
+def test_pipeline_runs_all_stages_and_drains():
+    outputs = []
+
+    async def double(value):
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def collect(value):
+        outputs.append(value)
+        return None
+
+    async def run():
+        pipeline = StagePipeline([Stage("double", double, workers=3), Stage("collect", collect)])
+        await pipeline.start()
+        for value in range(10):
+            await pipeline.submit(value)
+        await pipeline.close()
+        return pipeline.stats()
+
+    stats = asyncio.run(run())
+    assert sorted(outputs) == [value * 2 for value in range(10)]
+    assert stats["double"].processed == 10
+    assert stats["collect"].processed == 10
+
+
+def test_pipeline_isolates_failures_and_applies_backpressure():
+    outputs = []
+    release = None
+
+    async def maybe_fail(value):
+        await release.wait()
+        if value == 1:
+            raise ValueError("boom")
+        return value
+
+    async def collect(value):
+        outputs.append(value)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        pipeline = StagePipeline([Stage("work", maybe_fail, workers=1, queue_size=1), Stage("collect", collect)])
+        await pipeline.start()
+        await pipeline.submit(0)
+        await asyncio.sleep(0)
+        await pipeline.submit(1)
+        # 阶段被阻塞且队列已满时，继续提交会等待
+        blocked = asyncio.create_task(pipeline.submit(2))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        release.set()
+        await blocked
+        await pipeline.close()
+        return pipeline.stats()
+
+    stats = asyncio.run(run())
+    assert sorted(outputs) == [0, 2]
+    assert stats["work"].failed == 1
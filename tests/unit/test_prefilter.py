@@ -0,0 +1,41 @@
+from src.prefilter import Prefilter
+
+
+def _item(title="索尼 A7M4 单机身 95新", price="¥9800", region="上海"):
+    return {"商品ID": "1", "商品标题": title, "当前售价": price, "发货地区": region}
+
+
+def test_unconfigured_prefilter_is_disabled():
+    assert Prefilter.from_config(None) is None
+    assert Prefilter.from_config({"enabled": False, "min_price": 1}) is None
+
+
+def test_rules_report_which_rule_fired():
+    prefilter = Prefilter.from_config({
+        "min_price": 5000,
+        "max_price": "12000",
+        "exclude_patterns": ["求购|回收", "配件"],
+        "include_patterns": ["(?i)a7m4|a7 ?iv"],
+        "regions_exclude": "新疆,西藏",
+        "min_seller_positive_rate": 95,
+        "min_seller_ratings": 5,
+    })
+
+    assert prefilter.evaluate(_item()) is None
+    assert prefilter.evaluate(_item(price="¥1.3万")).rule == "max_price"
+    assert prefilter.evaluate(_item(price="¥300")).rule == "min_price"
+    rejection = prefilter.evaluate(_item(title="回收 A7M4"))
+    assert rejection.rule == "exclude_patterns" and "回收" in rejection.detail
+    assert prefilter.evaluate(_item(title="尼康 Z6")).rule == "include_patterns"
+    assert prefilter.evaluate(_item(region="新疆乌鲁木齐")).rule == "regions_exclude"
+
+    seller = {"作为卖家的好评数": "18/20", "作为卖家的好评率": "90.00%"}
+    assert prefilter.evaluate(_item(), seller).rule == "min_seller_positive_rate"
+    assert prefilter.evaluate(_item(), {"作为卖家的好评数": "2/2", "作为卖家的好评率": "100.00%"}).rule == "min_seller_ratings"
+    assert prefilter.evaluate(_item(), {"作为卖家的好评数": "0/0", "作为卖家的好评率": "N/A"}).rule == "min_seller_ratings"
+
+
+def test_rejection_is_recorded_as_analysis():
+    analysis = Prefilter.from_config({"max_price": 100}).evaluate(_item()).to_analysis()
+    assert analysis["is_recommended"] is False
+    assert analysis["prefilter"]["rule"] == "max_price"
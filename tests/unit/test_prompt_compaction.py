@@ -0,0 +1,54 @@
+import json
+
+from src.prompt_compaction import CompactionSettings, compact_product_record, estimate_tokens
+
+
+def _big_record(ratings=200, items=150):
+    return {
+        "爬取时间": "2025-01-01T10:00:00",
+        "商品信息": {"商品ID": "1", "商品标题": "索尼 A7M4", "商品链接": "https://www.goofish.com/item?id=1"},
+        "卖家信息": {
+            "卖家昵称": "alice",
+            "卖家头像链接": "https://img/avatar.png",
+            "作为卖家的好评率": "98.00%",
+            "卖家收到的评价列表": [
+                {"评价ID": str(i), "评价内容": "发货很快，成色和描述一致" * 3, "评价类型": "差评" if i == 0 else "好评"}
+                for i in range(ratings)
+            ],
+            "卖家发布的商品列表": [
+                {"商品ID": str(i), "商品标题": f"镜头 {i}", "商品状态": "在售", "商品主图": "https://img/x.jpg"}
+                for i in range(items)
+            ],
+        },
+    }
+
+
+def test_compaction_keeps_recent_entries_and_summary():
+    result = compact_product_record(_big_record(), "请判断卖家信誉", CompactionSettings(token_budget=100000))
+    data = json.loads(result.text)
+    seller = data["卖家信息"]
+
+    assert result.tokens_after < result.tokens_before
+    assert len(seller["卖家收到的评价列表"]) == 10
+    assert seller["卖家收到的评价概况"] == {"总条数": 200, "差评": 1, "好评": 199}
+    assert seller["卖家发布的商品概况"]["总数"] == 150
+    assert "卖家头像链接" not in seller and "爬取时间" not in data
+    assert "评价ID" not in seller["卖家收到的评价列表"][0]
+
+
+def test_fields_referenced_by_prompt_are_kept():
+    result = compact_product_record(_big_record(), "商品链接必须是闲鱼域名")
+    assert "商品链接" in json.loads(result.text)["商品信息"]
+
+
+def test_budget_tightens_lists():
+    result = compact_product_record(_big_record(), "", CompactionSettings(token_budget=300))
+    seller = json.loads(result.text)["卖家信息"]
+    assert len(seller["卖家收到的评价列表"]) < 10
+    assert result.tokens_after == estimate_tokens(result.text)
+
+
+def test_disabled_returns_original_payload():
+    record = _big_record(ratings=2, items=2)
+    result = compact_product_record(record, "", CompactionSettings(enabled=False))
+    assert result.text == json.dumps(record, ensure_ascii=False, indent=2)
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+from src import reanalysis
+from src.reanalysis import Reanalyzer, ReanalysisCheckpoint, find_task_for_results
+from src.utils import prompt_hash
+
+
+PROMPT = "请判断是否值得购买"
+
+
+def _record(item_id, analysis=None):
+    record = {"商品信息": {"商品ID": str(item_id), "商品标题": f"商品{item_id}"}, "卖家信息": {}}
+    if analysis is not None:
+        record["ai_analysis"] = analysis
+    return record
+
+
+def _write_results(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _read_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _fake_analysis(monkeypatch, calls):
+    async def fake_get_ai_analysis(product_data, prompt_text="", image_loader=None, compaction=None, **kwargs):
+        item_id = product_data["商品信息"]["商品ID"]
+        calls.append(item_id)
+        # 后提交的商品先完成，输出仍需保持原顺序
+        await asyncio.sleep(0.01 * (10 - int(item_id)))
+        return {"is_recommended": item_id == "3", "reason": "新标准", "risk_tags": []}
+
+    monkeypatch.setattr(reanalysis, "get_ai_analysis", fake_get_ai_analysis)
+
+
+def test_reanalysis_skips_unchanged_and_keeps_order(monkeypatch, tmp_path):
+    source = tmp_path / "demo_full_data.jsonl"
+    _write_results(source, [
+        _record(1, {"is_recommended": False, "reason": "旧", "prompt_hash": "old"}),
+        _record(2, {"is_recommended": True, "reason": "当前", "prompt_hash": prompt_hash(PROMPT)}),
+        _record(3, {"is_recommended": False, "reason": "规则", "prefilter": {"rule": "max_price"}}),
+        _record(4),
+    ])
+    calls = []
+    _fake_analysis(monkeypatch, calls)
+
+    reanalyzer = Reanalyzer(str(source), PROMPT, workers=4, use_cache=False)
+    stats = asyncio.run(reanalyzer.run())
+
+    output = _read_results(reanalyzer.output_path)
+    assert [r["商品信息"]["商品ID"] for r in output] == ["1", "2", "3", "4"]
+    assert sorted(calls) == ["1", "4"]
+    assert output[0]["ai_analysis"]["prompt_hash"] == prompt_hash(PROMPT)
+    assert output[1]["ai_analysis"]["reason"] == "当前"
+    assert output[2]["ai_analysis"]["reason"] == "规则"
+    assert stats.analyzed == 2 and stats.unchanged == 2
+    assert ReanalysisCheckpoint.load(reanalyzer.checkpoint_path).finished
+
+
+def test_reanalysis_resumes_from_checkpoint(monkeypatch, tmp_path):
+    source = tmp_path / "demo_full_data.jsonl"
+    _write_results(source, [_record(i) for i in range(1, 6)])
+    calls = []
+    _fake_analysis(monkeypatch, calls)
+
+    reanalyzer = Reanalyzer(str(source), PROMPT, workers=2, use_cache=False)
+    # 模拟上次运行在写完两行后中断，输出文件尾部还有未确认的半行
+    done = [json.dumps(_record(i, {"is_recommended": False, "prompt_hash": prompt_hash(PROMPT)}), ensure_ascii=False) + "\n"
+            for i in (1, 2)]
+    confirmed = "".join(done).encode("utf-8")
+    with open(reanalyzer.output_path, "wb") as f:
+        f.write(confirmed + b'{"half')
+    ReanalysisCheckpoint(
+        source=str(source.resolve()), prompt_hash=prompt_hash(PROMPT), lines_done=2, output_bytes=len(confirmed)
+    ).save(reanalyzer.checkpoint_path)
+
+    asyncio.run(reanalyzer.run())
+
+    assert sorted(calls) == ["3", "4", "5"]
+    output = _read_results(reanalyzer.output_path)
+    assert [r["商品信息"]["商品ID"] for r in output] == ["1", "2", "3", "4", "5"]
+
+    assert reanalyzer.replace_source()
+    assert _read_results(source) == output
+
+
+def test_find_task_matches_keyword_file():
+    tasks = [{"task_name": "A", "keyword": "sony a7m4"}, {"task_name": "B", "keyword": "iphone"}]
+    assert find_task_for_results(tasks, "jsonl/sony_a7m4_full_data.jsonl")["task_name"] == "A"
+    assert find_task_for_results(tasks, "jsonl/x.jsonl", task_name="B")["task_name"] == "B"
+    assert find_task_for_results(tasks, "jsonl/x.jsonl") is None
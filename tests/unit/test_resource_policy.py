@@ -0,0 +1,33 @@
+from src.resource_policy import ResourcePolicy, ResourceStats, split_list
+
+
+def test_policy_blocks_types_and_unlisted_scripts():
+    policy = ResourcePolicy()
+
+    assert policy.should_block("image", "https://img.alicdn.com/bao/uploaded/a.jpg")
+    assert policy.should_block("font", "https://at.alicdn.com/t/font.woff2")
+    assert policy.should_block("script", "https://g.alicdn.com/alilog/mlog/aplus_v2.js")
+    assert not policy.should_block("script", "https://g.alicdn.com/mtb/lib-mtop/2.7.2/mtop.js")
+    assert not policy.should_block("script", "https://g.alicdn.com/AWSC/AWSC/awsc.js")
+    assert not policy.should_block("xhr", "https://h5api.m.goofish.com/h5/mtop.taobao.idle.pc.detail/1.0/")
+    assert not policy.should_block("document", "https://www.goofish.com/item?id=1")
+
+
+def test_policy_respects_configuration():
+    policy = ResourcePolicy(blocked_types=["media"], block_scripts=False)
+    assert not policy.should_block("image", "https://img.alicdn.com/a.jpg")
+    assert not policy.should_block("script", "https://g.alicdn.com/alilog/aplus_v2.js")
+    assert split_list("image, media,,font") == ["image", "media", "font"]
+
+
+def test_resource_stats_format():
+    stats = ResourceStats()
+    stats.record_loaded("script", 2048)
+    stats.record_loaded("xhr", 512)
+    stats.record_blocked("image")
+    stats.record_blocked("image")
+
+    assert stats.total_bytes() == 2560
+    text = stats.format()
+    assert "script 1次/2.0KB" in text
+    assert "image 2次" in text
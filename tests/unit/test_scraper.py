@@ -0,0 +1,188 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+
+from src import scraper
+from src.ai_executor import AIExecutor, AIRateLimitStore
+from src.ai_stream import StreamingVerdictParser
+from src.infrastructure.external import ai_gateway
+from src.infrastructure.external.ai_gateway import AIGateway
+from src.parsers import RatingTally
+from src.prefilter import Prefilter
+from src.seller_cache import RatingSyncState, SellerCache
+
+
+class _FakeResponse:
+    def __init__(self, url, payload):
+        self.url = url
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+
+class _FakeLocator:
+    def __init__(self, page):
+        self.page = page
+
+    async def count(self):
+        return 1
+
+    async def click(self):
+        await self.page.emit("mtop.idle.web.trade.rate.list", {"data": {"cardList": self.page.rating_cards, "nextPage": True}})
+
+
+class _FakeProfilePage:
+    """模拟卖家主页：打开时返回头部和最后一页商品，点击评价选项卡返回一页评价（还有下一页）。"""
+
+    def __init__(self, rating_cards):
+        self.rating_cards = rating_cards
+        self.handler = None
+
+    async def emit(self, api, payload):
+        await self.handler(_FakeResponse(f"https://h5api.m.goofish.com/h5/{api}/1.0/", payload))
+
+    async def evaluate(self, script):
+        return None
+
+    def locator(self, selector):
+        return _FakeLocator(self)
+
+
+class _FakePagePool:
+    def __init__(self, page):
+        self.page = page
+
+    async def acquire(self, listeners=None):
+        self.page.handler = listeners["response"]
+        return self.page
+
+    async def goto(self, page, url, **kwargs):
+        await page.emit("mtop.idle.web.user.page.head", {"data": {"module": {"tabs": {"rate": {"number": 3}}}}})
+        await page.emit("mtop.idle.web.xyh.item.list", {"data": {"cardList": [], "nextPage": False}})
+
+    async def release(self, page):
+        pass
+
+
+def _rating_card(rate_id):
+    return {"cardData": {"rateId": rate_id, "rate": 1, "rateTagList": [{"text": "卖家"}]}}
+
+
+def _scrape(monkeypatch, cache, rating_cards, cache_enabled=True):
+    real_wait_for = asyncio.wait_for
+
+    async def fast_wait_for(awaitable, timeout):
+        # 滚动等待下一页评价（timeout=8）时直接模拟超时
+        if timeout == 8:
+            awaitable.close()
+            raise asyncio.TimeoutError
+        return await real_wait_for(awaitable, timeout)
+
+    async def no_sleep(*args):
+        pass
+
+    monkeypatch.setattr(scraper, "get_seller_cache", lambda: cache)
+    monkeypatch.setattr(scraper, "random_sleep", no_sleep)
+    monkeypatch.setattr(scraper.asyncio, "wait_for", fast_wait_for)
+    # ttl 为 0 且不按评价总数沿用缓存，每次都重新滚动评价列表
+    settings = scraper._get_seller_cache_settings({"seller_cache": {
+        "enabled": cache_enabled, "ttl_sec": 0, "refresh_by_rating_count": False, "incremental_ratings": True,
+    }})
+    page_pool = _FakePagePool(_FakeProfilePage(rating_cards))
+    return asyncio.run(scraper.scrape_user_profile(None, "u1", settings, page_pool=page_pool))
+
+
+def test_rating_state_is_kept_when_scrolling_times_out(tmp_path, monkeypatch):
+    cache = SellerCache(str(tmp_path / "sellers.sqlite"))
+    previous = RatingTally(seller_total=10, seller_positive=9)
+    cache.save_rating_state("u1", RatingSyncState("old", previous, [{"评价ID": "old"}]))
+
+    # 只加载到一页新评价就超时：既没遇到 "old" 也没到底，不能把 r2 记为同步进度
+    profile = _scrape(monkeypatch, cache, [_rating_card("r2")])
+    assert profile["作为卖家的好评数"] == "10/11"
+    state = cache.get_rating_state("u1")
+    assert state.newest_rate_id == "old" and state.tally == previous
+
+    # 遇到上次同步的评价后才更新进度
+    _scrape(monkeypatch, cache, [_rating_card("r2"), _rating_card("old")])
+    state = cache.get_rating_state("u1")
+    assert state.newest_rate_id == "r2" and state.tally.seller_total == 11
+    cache.close()
+
+
+
+def test_rating_state_is_not_stored_when_seller_cache_is_disabled(tmp_path, monkeypatch):
+    cache = SellerCache(str(tmp_path / "sellers.sqlite"))
+    previous = RatingTally(seller_total=10, seller_positive=9)
+    cache.save_rating_state("u1", RatingSyncState("r1", previous, []))
+
+    # 关闭卖家缓存后既不读取也不写入同步进度，评价按本次采集全量统计
+    profile = _scrape(monkeypatch, cache, [_rating_card("r2"), _rating_card("r1")], cache_enabled=False)
+    assert profile["作为卖家的好评数"] == "2/2"
+    assert cache.get_rating_state("u1").newest_rate_id == "r1"
+    cache.close()
+
+def test_item_description_from_detail_is_prefiltered():
+    item = {"商品标题": "Sony A7M4 全画幅微单", "当前售价": "¥9800"}
+    detail = {"data": {"itemDO": {"desc": "仅出配件，机身已售", "browseCnt": 12}, "sellerDO": {"sellerId": None}}}
+
+    asyncio.run(scraper._apply_item_detail(None, item, detail))
+    assert item["商品描述"] == "仅出配件，机身已售"
+    rejection = Prefilter.from_config({"exclude_patterns": ["配件"]}).evaluate(item)
+    assert rejection.rule == "exclude_patterns"
+
+
+class _BrokenStream:
+    """先吐出推荐结论，随后连接中断，触发网关重试。"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise httpx.ReadError("connection reset")
+        delta = SimpleNamespace(content=self.chunks.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        pass
+
+
+def test_early_push_is_corrected_when_retry_rejects(tmp_path, monkeypatch):
+    streams = [
+        _BrokenStream(['{"is_recommended": true, ', '"reason": "价格很低", ', '"risk_tags": [']),
+        _BrokenStream(['{"is_recommended": false, "reason": "疑似翻新机"}']),
+    ]
+
+    async def create(**params):
+        return streams.pop(0)
+
+    async def no_sleep(seconds):
+        pass
+
+    sent = []
+
+    async def fake_notify(product, reason):
+        sent.append(reason)
+
+    monkeypatch.setattr(ai_gateway.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(scraper, "send_ntfy_notification", fake_notify)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    gateway = AIGateway(client=client, executor=AIExecutor(store=AIRateLimitStore(str(tmp_path / "limit.sqlite"))))
+    job = {"record": {"商品信息": {"商品ID": "1", "商品标题": "iPhone 15"}}}
+
+    async def scenario():
+        parser = StreamingVerdictParser(lambda recommended, reason: scraper._notify_early(job, recommended, reason))
+        text = await gateway.chat_stream(parser, model="m", messages=[])
+        job["ai_result"] = json.loads(text)
+        await scraper._send_verdict_notification(job)
+
+    asyncio.run(scenario())
+    assert sent[0] == "价格很低"
+    assert len(sent) == 2 and "更正" in sent[1] and "疑似翻新机" in sent[1]
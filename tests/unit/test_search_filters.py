@@ -0,0 +1,31 @@
+import hashlib
+
+from src.mtop import get_mtop_token, is_mtop_success, mtop_sign
+from src.search_filters import build_search_filter, encode_search_filters
+
+
+def test_build_search_filter():
+    assert build_search_filter(True, "8000", "16000") == "priceRange:8000,16000;quickFilter:filterPersonal;"
+    assert build_search_filter(False, None, "500") == "priceRange:0,500;"
+    assert build_search_filter(False, "abc", None) == ""
+
+
+def test_encode_search_filters_keeps_existing_fields():
+    data = {"pageNumber": 2, "keyword": "sony a7m4", "propValueStr": "{\"foo\":\"bar\"}"}
+    encoded = encode_search_filters(data, personal_only=True, min_price="8000", max_price=None)
+
+    assert encoded["pageNumber"] == 2
+    assert encoded["sortField"] == "create"
+    assert encoded["sortValue"] == "desc"
+    assert encoded["propValueStr"] == {"foo": "bar", "searchFilter": "priceRange:8000,;quickFilter:filterPersonal;"}
+    assert data["propValueStr"] == "{\"foo\":\"bar\"}"
+
+
+def test_mtop_sign_helpers():
+    cookies = [{"name": "_m_h5_tk", "value": "abc123_1700000000000"}]
+    token = get_mtop_token(cookies)
+    assert token == "abc123"
+    expected = hashlib.md5("abc123&1&34839810&{}".encode("utf-8")).hexdigest()
+    assert mtop_sign(token, "1", "34839810", "{}") == expected
+    assert is_mtop_success({"ret": ["SUCCESS::调用成功"]}) is True
+    assert is_mtop_success({"ret": ["FAIL_SYS_USER_VALIDATE"]}) is False
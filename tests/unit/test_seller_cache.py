@@ -0,0 +1,33 @@
+import time
+
+from src.seller_cache import SellerCache, normalize_rating_count
+
+
+def test_seller_cache_roundtrip(tmp_path):
+    cache = SellerCache(str(tmp_path / "sellers.sqlite"))
+    assert cache.get("42") is None
+
+    profile = {"卖家昵称": "张三", "卖家收到的评价总数": 128, "作为卖家的好评率": "99.00%"}
+    cache.put("42", profile)
+
+    cached = cache.get(42)
+    assert cached.profile == profile
+    assert cached.rating_count == "128"
+    assert cached.age < 5
+
+    cache.put("42", {**profile, "卖家收到的评价总数": "130"})
+    assert cache.get("42").rating_count == "130"
+    cache.close()
+
+
+def test_seller_cache_purge(tmp_path):
+    cache = SellerCache(str(tmp_path / "sellers.sqlite"))
+    cache.put("1", {"卖家昵称": "a"})
+    cache._conn.execute("UPDATE sellers SET updated_at = ?", (time.time() - 3600,))
+    cache.put("2", {"卖家昵称": "b"})
+
+    assert cache.purge_older_than(60) == 1
+    assert cache.get("1") is None
+    assert cache.get("2") is not None
+    assert normalize_rating_count(" ") is None
+    cache.close()
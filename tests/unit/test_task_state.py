@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from src import task_state
+from src.task_state import (
+    is_page_exhausted,
+    load_high_water_mark,
+    load_task_state,
+    save_high_water_mark,
+    update_task_state,
+)
+
+
+def _item(link: str, published: str) -> dict:
+    return {"商品链接": link, "发布时间": published}
+
+
+def test_task_state_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_state, "TASK_STATE_DIR", str(tmp_path))
+
+    update_task_state("索尼相机", foo=1)
+    update_task_state("索尼相机", bar=2)
+    assert load_task_state("索尼相机") == {"foo": 1, "bar": 2}
+    assert load_task_state("佳能相机") == {}
+
+    save_high_water_mark("索尼相机", datetime(2025, 1, 2, 3, 4))
+    assert load_high_water_mark("索尼相机") == datetime(2025, 1, 2, 3, 4)
+
+
+def test_is_page_exhausted():
+    seen = {"a", "b", "c"}
+    hwm = datetime(2025, 1, 1, 12, 0)
+    page = [_item("a", "2025-01-01 11:00"), _item("b", "2025-01-01 10:00"), _item("c", "未知时间")]
+
+    assert is_page_exhausted(page, lambda it: it["商品链接"] in seen, hwm) is True
+    # 没有高水位线时永远不会提前停止
+    assert is_page_exhausted(page, lambda it: it["商品链接"] in seen, None) is False
+
+    # 出现新商品或比高水位线更新的商品时继续翻页
+    fresh = [_item("x", "2025-01-01 13:00")] + page
+    assert is_page_exhausted(fresh, lambda it: it["商品链接"] in seen, hwm) is False
+    # 但允许按连续已处理数量提前停止
+    assert is_page_exhausted(fresh, lambda it: it["商品链接"] in seen, hwm, stop_after_seen=2) is True